@@ -0,0 +1,145 @@
+"""
+Event-based ADB device presence.
+
+Keeps one connection to the adb server (localhost:5037) open with the
+`host:track-devices` service. The server pushes the full device list on
+every connect/disconnect/state change, so reconnects are seen within
+milliseconds and no `adb devices` process is spawned every second.
+"""
+import socket
+import subprocess
+import threading
+
+ADB_HOST = "127.0.0.1"
+ADB_PORT = 5037
+RETRY_MIN_S = 0.5
+RETRY_MAX_S = 5.0
+
+
+def parse_device_list(payload):
+    """'serial\\tdevice\\nserial2\\toffline\\n' → ['serial'] (only ready devices)."""
+    devices = []
+    for line in payload.splitlines():
+        parts = line.split("\t")
+        if len(parts) >= 2 and parts[1].strip() == "device":
+            devices.append(parts[0].strip())
+    return devices
+
+
+class AdbDeviceTracker:
+    """
+    Background thread following `adb track-devices`.
+    `devices` is the current list of ready serials (None before the first
+    report); listeners are called as callback(devices) on the tracker
+    thread for the first report and whenever it changes.
+    """
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT):
+        self.host = host
+        self.port = port
+        self.devices = None    # None until the first report → it always reaches the listeners
+        self.listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._sock = None
+        self._tracking = False
+
+    @property
+    def connected(self):
+        return bool(self.devices)
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="adb-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                # close() alone does not reliably wake a recv() blocked in
+                # another thread on Linux; shutdown() does
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ------------- internals -------------
+    def _set_devices(self, devices):
+        if devices == self.devices:
+            return
+        self.devices = devices
+        for callback in list(self.listeners):
+            try:
+                callback(list(devices))
+            except Exception as e:
+                print(f"⚠️ adb listener error: {e}")
+
+    def _recv_exact(self, sock, size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("adb server closed the connection")
+            data += chunk
+        return data
+
+    def _track(self):
+        sock = socket.create_connection((self.host, self.port), timeout=2)
+        self._sock = sock
+        try:
+            request = b"host:track-devices"
+            sock.sendall(b"%04x" % len(request) + request)
+            status = self._recv_exact(sock, 4)
+            if status != b"OKAY":
+                raise ConnectionError(f"adb server refused track-devices: {status!r}")
+            self._tracking = True
+
+            sock.settimeout(None)   # block until the server pushes an update
+            while not self._stop.is_set():
+                length = int(self._recv_exact(sock, 4), 16)
+                payload = self._recv_exact(sock, length).decode(errors="replace") if length else ""
+                self._set_devices(parse_device_list(payload))
+        finally:
+            self._sock = None
+            sock.close()
+
+    def _start_server(self):
+        try:
+            subprocess.run(["adb", "start-server"], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=10)
+        except FileNotFoundError:
+            print("ADB not found — make sure it's installed and in PATH.")
+        except Exception as e:
+            print(f"⚠️ adb start-server failed: {e}")
+
+    def _run(self):
+        retry = RETRY_MIN_S
+        while not self._stop.is_set():
+            self._tracking = False
+            try:
+                self._track()
+            except (OSError, ConnectionError, ValueError) as e:
+                if self._stop.is_set():
+                    break
+                if self._tracking:
+                    # lost an established stream → retry quickly
+                    retry = RETRY_MIN_S
+                # server gone → no device is reachable until it is back
+                self._set_devices([])
+                if isinstance(e, ConnectionRefusedError):
+                    self._start_server()
+                self._stop.wait(retry)
+                retry = min(retry * 2, RETRY_MAX_S)
@@ -0,0 +1,367 @@
+"""
+Optional asyncio core (config.Async_core = True, or --async-core on the CLI).
+
+One event-loop thread runs the heartbeat sender, the VHAL RX poller, the
+step runner of an auto-send and the PEAK link monitor as asyncio tasks
+instead of separate daemon threads:
+
+  - the heartbeat sleeps until its next 80 ms deadline (no 10 ms polling);
+  - adb dumpsys runs as an asyncio subprocess, streamed into the dump parser;
+  - a step waits on "new RX snapshot" / link-change events, not sleep loops;
+  - stop = task.cancel(), awaited, so stop latency is bounded and known.
+
+Results still reach Tk through backend.ui_queue (thread-safe), so the GUI
+side is unchanged. backend.start_*/stop_* dispatch here when enabled.
+"""
+import asyncio
+import subprocess
+import threading
+import time
+
+import backend
+import log
+import vhal_stream
+import tx_dispatch
+
+HEARTBEAT_PERIOD = 0.08     # same cycle as the heartbeat thread
+RX_SETTLE_DELAY = 0.5       # wait after a step before taking its RX snapshot
+RX_SNAPSHOT_TIMEOUT = 1.5   # max wait for a fresh snapshot
+ADB_TIMEOUT = 10.0
+
+
+class AsyncCore:
+    """Event loop thread + named, cancellable tasks."""
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.tasks = {}          # { name: asyncio.Task }, touched on the loop thread only
+        self.done_events = {}    # { name: threading.Event } set when the task ends
+        self.snapshot_seq = 0
+        self.snapshot_event = None
+        self._start_lock = threading.Lock()
+
+    # ------------- loop thread -------------
+    def ensure_running(self):
+        with self._start_lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(self.loop)
+                self.snapshot_event = asyncio.Event()
+                self.loop.call_soon(ready.set)
+                self.loop.run_forever()
+                self.loop.close()
+
+            self.thread = threading.Thread(target=run, name="async-core", daemon=True)
+            self.thread.start()
+            ready.wait(2.0)
+            print("✅ backend: asyncio core started")
+
+    def _call(self, coro, timeout=None):
+        """Run coro on the loop from another thread; wait for its result if timeout is given."""
+        if threading.current_thread() is self.thread:
+            return asyncio.ensure_future(coro)
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return future.result(timeout) if timeout is not None else future
+
+    # ------------- task management -------------
+    TASKS = ("heartbeat", "rx_poll", "steps", "peak_monitor")
+
+    def start(self, name):
+        """Start task `name` unless it is already running. Returns True if started."""
+        self.ensure_running()
+        if self.is_running(name):
+            return False
+        done = threading.Event()
+        self.done_events[name] = done
+        return self._call(self._start_task(name, done), timeout=2.0)
+
+    async def _start_task(self, name, done):
+        task = self.tasks.get(name)
+        if task is not None and not task.done():
+            return False
+        task = asyncio.ensure_future(getattr(self, name)())
+        task.add_done_callback(lambda _t: done.set())
+        self.tasks[name] = task
+        return True
+
+    def is_running(self, name):
+        task = self.tasks.get(name)
+        return task is not None and not task.done()
+
+    def wait(self, name, timeout=None):
+        """Block until task `name` has finished; True if it has."""
+        done = self.done_events.get(name)
+        return True if done is None else done.wait(timeout)
+
+    def cancel(self, name, timeout=None):
+        """Cancel task `name`; with a timeout, also wait for it to unwind."""
+        if self.loop is None or not self.is_running(name):
+            return False
+        self._call(self._cancel(name))
+        if timeout is not None and threading.current_thread() is not self.thread:
+            self.wait(name, timeout)
+        return True
+
+    async def _cancel(self, name):
+        task = self.tasks.get(name)
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def stop(self, timeout=2.0):
+        """Cancel every task, then stop and join the loop thread."""
+        if self.loop is None or self.thread is None or not self.thread.is_alive():
+            return
+        for name in list(self.tasks):
+            self.cancel(name)
+        deadline = time.time() + timeout
+        for name in list(self.tasks):
+            self.wait(name, max(0.0, deadline - time.time()))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(max(0.1, deadline - time.time()))
+        print("🛑 backend: asyncio core stopped")
+
+    # ------------- tasks -------------
+    async def heartbeat(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, backend.rebuild_frame_table)
+        local_bus = backend.get_bus()
+        if local_bus is None:
+            print("❌ Heartbeat: CAN bus not available on start")
+            return
+        dispatcher = tx_dispatch.TxDispatcher(lambda entry: backend.send_frame_entry(local_bus, entry),
+                                              HEARTBEAT_PERIOD)
+
+        next_time = loop.time()
+        previous_start = None
+        while True:
+            start = time.perf_counter()
+            if previous_start is not None:
+                backend.heartbeat_jitter_seconds.observe(abs(start - previous_start - HEARTBEAT_PERIOD))
+            previous_start = start
+
+            if backend.check_whether_can_interface_is_up() and backend.adb_device_connected:
+                for pause in dispatcher.cycle(backend.tx_frames.current):
+                    await asyncio.sleep(pause)
+            else:
+                if not backend.check_whether_can_interface_is_up():
+                    log.every("hb_peak_down", 5, "❌ PEAK interface is down")
+                if not backend.adb_device_connected:
+                    log.every("hb_no_adb", 5, "❌ No ADB device detected")
+                if not backend.check_device_mode():
+                    log.every("hb_not_drive", 5, "❌ Device not in drive mode")
+            backend.heartbeat_loop_seconds.observe(time.perf_counter() - start)
+
+            next_time += HEARTBEAT_PERIOD
+            delay = next_time - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # if we're running late, resync
+                next_time = loop.time()
+                await asyncio.sleep(0)
+
+    async def read_vhal_dump(self, parser, serial=None):
+        """Stream dumpsys car_service into parser via an asyncio subprocess (or the simulation provider)."""
+        if backend.vhal_dump_provider is not None:
+            parser.feed_text(backend.vhal_dump_provider(serial))
+            return parser
+        args = ["adb"] + (["-s", serial] if serial else []) + vhal_stream.ADB_DUMP_ARGS
+        proc = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+        try:
+            await asyncio.wait_for(self.feed_dump(proc, parser), ADB_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise subprocess.TimeoutExpired(args, ADB_TIMEOUT)
+        finally:
+            # early stop, timeout or cancel: adb must not outlive the poll
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        parser.close()
+        return parser
+
+    @staticmethod
+    async def feed_dump(proc, parser):
+        while True:
+            chunk = await proc.stdout.read(vhal_stream.CHUNK_SIZE)
+            if not chunk:
+                return
+            vhal_stream.dump_bytes.inc(len(chunk))
+            parser.feed(chunk)
+            if parser.complete:
+                vhal_stream.early_stops.inc()
+                return
+
+    async def validate_vhal_layer(self, serial=None):
+        """backend.validate_vhal_layer() with a non-blocking adb call."""
+        loop = asyncio.get_running_loop()
+        property_list = await loop.run_in_executor(None, backend.cached_property_list)
+        canid_to_signalname = await loop.run_in_executor(None, backend.cached_canid_to_signalname)
+        parser = backend.vhal_dump_parser(property_list)
+        try:
+            with backend.adb_poll_seconds.time():
+                await self.read_vhal_dump(parser, serial)
+        except subprocess.TimeoutExpired:
+            log.every("adb_timeout", 5, "❌ ADB timeout", lvl=log.ERROR)
+            return backend.fill_device_not_found(property_list, canid_to_signalname)
+        except (OSError, ValueError) as e:
+            log.every("adb_failure", 5, f"❌ ADB failure: {e}", lvl=log.ERROR)
+            return backend.fill_device_not_found(property_list, canid_to_signalname)
+        return await loop.run_in_executor(
+            None, backend.process_vhal_parser, parser, property_list, canid_to_signalname
+        )
+
+    async def rx_poll(self):
+        while True:
+            start = time.perf_counter()
+            try:
+                adb_rx = await self.validate_vhal_layer()
+                with backend.shared_rx_lock:
+                    backend.shared_rx_latest = dict(adb_rx)
+                backend.rx_poller.observe(time.perf_counter() - start, adb_rx)
+                self.snapshot_seq += 1
+                self.snapshot_event.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.every("adb_worker_error", 5, f"⚠️ ADB worker error: {e}")
+            backend.rx_poll_loop_seconds.observe(time.perf_counter() - start)
+            await backend.rx_poller.wait_async()
+
+    async def fresh_snapshot(self, timeout=RX_SNAPSHOT_TIMEOUT):
+        """Wait for the next RX snapshot; returns (values, got_snapshot)."""
+        loop = asyncio.get_running_loop()
+        seq = self.snapshot_seq
+        deadline = loop.time() + timeout
+        while self.snapshot_seq == seq:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self.snapshot_event.clear()
+            try:
+                await asyncio.wait_for(self.snapshot_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        with backend.shared_rx_lock:
+            latest = dict(backend.shared_rx_latest) if backend.shared_rx_latest else {}
+        return latest, self.snapshot_seq != seq
+
+    async def steps(self):
+        """The synchronized worker: one TX/RX cycle per time delay."""
+        loop = asyncio.get_running_loop()
+        status = "failed"
+        try:
+            plan = await loop.run_in_executor(None, backend.prepare_synchronized_run)
+            if plan is None:
+                return
+
+            if not self.is_running("rx_poll"):
+                await self._start_task("rx_poll", self.done_events.setdefault("rx_poll", threading.Event()))
+
+            for td in plan["timedelay"]:
+                log.info(f"\n🕒 Starting cycle for {td} ms")
+                await asyncio.sleep(td / 1000.0)
+                cycle_start = time.perf_counter()
+
+                await loop.run_in_executor(None, self.publish_step, plan, td)
+
+                await asyncio.sleep(RX_SETTLE_DELAY)
+                latest, got_snapshot = await self.fresh_snapshot()
+                await loop.run_in_executor(None, self.record_step, plan, td, latest)
+                log.debug(f"📡 Async RX updated for {td} ms (got_snapshot={got_snapshot})")
+
+                backend.sync_loop_seconds.observe(time.perf_counter() - cycle_start)
+                log.info(f"✔ Completed Tx/Rx cycle {td} ms")
+
+            print("\n🏁 ALL cycles done successfully!")
+            status = "completed"
+            backend.print_verdict_summary(plan)
+            await loop.run_in_executor(None, backend.stop_can_rx_capture)
+            await loop.run_in_executor(None, self.finish_run, plan)
+
+        except asyncio.CancelledError:
+            print("🛑 Sync worker stop requested — exiting loop")
+            status = "stopped"
+            await asyncio.shield(loop.run_in_executor(None, backend.save_fast_excel))
+            raise
+        except Exception as e:
+            print(f"❌ Worker crashed:", e)
+        finally:
+            backend.stop_can_rx_capture()
+            backend.synchronized_worker_status = status
+            backend.mark_synchronized_worker_finished()
+            print("🛑 Worker exiting…")
+
+    # Step bodies run in the executor: they encode frames and take
+    # excel_lock (shared with the GUI), which must not stall the loop.
+    @staticmethod
+    def publish_step(plan, td):
+        frame_groups = backend.publish_step(plan, td)
+        backend.ui_queue.put(backend.tx_ui_message(frame_groups))
+
+    @staticmethod
+    def record_step(plan, td, latest):
+        with backend.excel_lock:
+            backend.fast_update_excel_rx(int(td), latest)
+            backend.record_can_rx(int(td))
+            backend.judge_step(plan, td, latest)
+        backend.ui_queue.put(latest)
+
+    @staticmethod
+    def finish_run(plan):
+        with backend.excel_lock:
+            backend.finish_delta(plan)
+        backend.save_fast_excel()
+
+    async def peak_monitor(self):
+        """backend.monitor_peak_device() driven by link_watcher events."""
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def on_link_change(_name, _state):
+            loop.call_soon_threadsafe(changed.set)
+
+        backend.link_watcher.add_listener(on_link_change)
+        last_status = None
+        try:
+            while True:
+                changed.clear()
+                try:
+                    status = backend.check_whether_can_interface_is_up()
+                    if status == 0:
+                        log.every("peak_bring_up", 5, "🔧 PEAK interface down — trying to bring it UP...", lvl=log.INFO)
+                        if backend.testing_device() == "Linux":
+                            await loop.run_in_executor(None, backend.make_can_interface_up)
+                        await asyncio.sleep(0.5)
+                        status = await loop.run_in_executor(None, backend.link_watcher.refresh)
+
+                    if status != last_status:
+                        if status == 1:
+                            backend.ui_queue.put({"peak_status": "connected"})
+                            print("🔌 PEAK Device Connected")
+                        else:
+                            backend.ui_queue.put({"peak_status": "disconnected"})
+                            print("❌ PEAK Device Removed / Not Ready")
+                        last_status = status
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log.every("peak_monitor_error", 5, f"⚠️ PEAK monitor error: {e}")
+
+                try:
+                    await asyncio.wait_for(changed.wait(), 1.0)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if on_link_change in backend.link_watcher.listeners:
+                backend.link_watcher.listeners.remove(on_link_change)
+
+
+core = AsyncCore()
@@ -1,16 +1,47 @@
 import re, os, time, threading, subprocess, importlib, atexit, signal
-import openpyxl
 from queue import Queue
-from openpyxl.utils import get_column_letter, column_index_from_string
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-import cantools, can
-import config, gui
+import config
+import runtime_config
+import link_monitor
+import adb_tracker
+import drive_mode
+import metrics
+import log
+import profiling
+import frame_table
+import vhal_stream
+import rx_poll
+import tx_dispatch
 import sys
 import copy
 from functools import lru_cache
 
 
+#------------------------
+#Lazy imports
+#------------------------
+class LazyModule:
+    """
+    Stand-in for a heavy module that is imported on first attribute access.
+    Keeps `import backend` cheap (check with `python -X importtime -c "import backend"`)
+    while call sites keep using cantools.xxx / can.xxx / openpyxl.xxx as before.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+openpyxl = LazyModule("openpyxl")
+cantools = LazyModule("cantools")
+can = LazyModule("can")
+
+
 
 #------------------------
 #Global objects
@@ -21,6 +52,8 @@ send_lock = threading.Lock()
 stop_heartbeat = threading.Event()
 stop_synchronized_event = threading.Event()   # 👈 new event for user signal thread
 _synchronized_worker_started = False
+synchronized_worker_thread = None
+synchronized_worker_status = "idle"   # idle / running / completed / stopped / failed
 signal_thread = None
 user_signal_queue = Queue()
 rx_queue = Queue()                     # for received signals
@@ -47,37 +80,112 @@ _frameid_map_loaded = False
 # shared memory for async ADB RX
 shared_rx_latest = {}
 shared_rx_lock = threading.Lock()
+shared_vhal_props = {}     # { prop_key: raw value } from the last VHAL dump
 adb_worker_stop = threading.Event()
 
+# encoded frames the heartbeat sender transmits (heartbeat + user frames), see frame_table.py
+tx_frames = frame_table.FrameTable()
+
+# CAN link state, updated from rtnetlink/sysfs events (started by lifecycle.start())
+link_watcher = link_monitor.CanLinkWatcher(device=lambda: testing_device())
+
+# simulation mode (see simulation.py): virtual bus + fake car_service
+simulation_enabled = False
+vhal_dump_provider = None   # callable(serial) -> dumpsys text; None → real adb
+
+
+# runtime metrics (see metrics.snapshot() / metrics.write_prometheus())
+heartbeat_loop_seconds = metrics.histogram("loop_seconds", "Worker loop iteration time", loop="heartbeat")
+rx_poll_loop_seconds = metrics.histogram("loop_seconds", "Worker loop iteration time", loop="rx_poll")
+sync_loop_seconds = metrics.histogram("loop_seconds", "Worker loop iteration time", loop="sync_worker")
+heartbeat_jitter_seconds = metrics.histogram("heartbeat_jitter_seconds", "|actual - nominal| heartbeat period")
+frames_sent_total = metrics.counter("frames_sent_total", "CAN frames sent")
+frame_send_errors_total = metrics.counter("frame_send_errors_total", "CAN frames that failed to encode or send")
+adb_poll_seconds = metrics.histogram("adb_poll_seconds", "dumpsys car_service round trip")
+dumpsys_parse_seconds = metrics.histogram("dumpsys_parse_seconds", "VHAL dump parse time")
+excel_rx_write_seconds = metrics.histogram("excel_write_seconds", "Results workbook write time", op="rx_update")
+excel_save_seconds = metrics.histogram("excel_write_seconds", "Results workbook write time", op="save")
+metrics.gauge("ui_queue_depth", "Messages waiting for the GUI", func=lambda: ui_queue.qsize())
+
+
+def metrics_summary(snap=None):
+    """One status line for the GUI panel / headless runner."""
+    snap = snap or metrics.snapshot()
+    hist = snap["histograms"]
+
+    def ms(key, field):
+        value = (hist.get(key) or {}).get(field)
+        return "–" if value is None else f"{value * 1000:.1f}"
+
+    excel_key = 'excel_write_seconds{op="rx_update"}'
+    tx = snap["counters"].get("frames_sent_total", {})
+    rate = tx.get("rate")
+    bus_rx = snap["counters"].get("can_rx_frames_total")
+    bus_dropped = snap["counters"].get("can_rx_dropped_total", {})
+    tx_load = snap["gauges"].get('tx_bus_load_ratio{bus="heartbeat"}')
+    tx_dropped = snap["counters"].get('tx_frames_dropped_total{bus="heartbeat"}', {})
+    return (
+        f"TX {rate:.0f} fr/s" if rate is not None else f"TX {tx.get('value', 0)} fr"
+    ) + (
+        f" (load {tx_load:.0%}, {tx_dropped.get('value', 0)} dropped)" if tx_load else ""
+    ) + (
+        f" | HB jitter p95 {ms('heartbeat_jitter_seconds', 'p95')} ms"
+        f" | ADB poll {ms('adb_poll_seconds', 'last')} ms"
+        f" | parse {ms('dumpsys_parse_seconds', 'last')} ms"
+        f" | Excel {ms(excel_key, 'last')} ms"
+        f" | UI queue {snap['gauges'].get('ui_queue_depth', 0)}"
+    ) + (
+        f" | bus RX {bus_rx.get('value', 0)} fr ({bus_dropped.get('value', 0)} dropped)" if bus_rx and bus_rx.get('value') else ""
+    )
+
+
+def testing_device():
+    """config.Testing_device, or "Simulation" while simulation.enable() is active."""
+    return "Simulation" if simulation_enabled else config.Testing_device
+
+
 # -----------------------------
 # Initialize Bus
 # -----------------------------
 
-def get_bus():
-    global bus
-    if bus is not None:
-        return bus  # already initialized
+def open_bus(channel):
+    """
+    Open a new CAN bus on `channel` for the configured Testing_device.
+    Returns None if the bus can't be opened. Callers own the bus.
+    """
     try:
-        if config.Testing_device == "Linux":
+        if testing_device() == "Simulation":
+            # in-process virtual bus; simulation.FakeCarService listens on the same channel
+            return can.interface.Bus(
+                channel=channel,
+                bustype="virtual"
+            )
+        elif testing_device() == "Linux":
             # Linux uses socketcan (PCAN-USB also appears as canX)
-            bus = can.interface.Bus(
-                channel=config.Peak_interface_name,
+            return can.interface.Bus(
+                channel=channel,
                 bustype="socketcan"
             )
-        elif config.Testing_device == "Windows":
+        elif testing_device() == "Windows":
             # Windows uses pcan (PEAK driver)
-            bus = can.interface.Bus(
-                channel=config.Peak_interface_name,
+            return can.interface.Bus(
+                channel=channel,
                 bustype="pcan"
             )
         else:
-            print(f"❌ Invalid Testing_device: {config.Testing_device}")
-            bus = None
+            print(f"❌ Invalid Testing_device: {testing_device()}")
+            return None
 
     except Exception as e:
-        print(f"❌ CAN initialization failed for {config.Testing_device}: {e}")
-        bus = None
+        print(f"❌ CAN initialization failed for {testing_device()} ({channel}): {e}")
+        return None
+
 
+def get_bus():
+    global bus
+    if bus is not None:
+        return bus  # already initialized
+    bus = open_bus(config.Peak_interface_name)
     return bus
 
 def shutdown_bus():
@@ -154,7 +262,7 @@ def check_auto_send_time_in_excel_update_config_file():
                             break
                         time_list.append(time_ms)
                         row += 1
-        gui.update_config_file_runtime("timedelay", time_list ) #update config sheet list of time delay given on runtime
+        runtime_config.update_config_file_runtime("timedelay", time_list ) #update config sheet list of time delay given on runtime
     finally:
         wb.close()
 
@@ -163,58 +271,58 @@ def check_auto_send_time_in_excel_update_config_file():
 #make peak interface
 #-----------------------
 
+def list_can_interfaces():
+    """
+    Return every CAN channel of the attached PEAK adapter(s), in order
+    (e.g. ['can0', 'can1', ...] on Linux, ['PCAN_USBBUS1', ...] on Windows).
+    """
+    if testing_device() == "Linux":
+        try:
+            names = os.listdir("/sys/class/net")
+        except OSError:
+            return []
+        return sorted(n for n in names if n.startswith("can"))
+    elif testing_device() == "Windows":
+        channels = []
+        for interface_dict in can.detect_available_configs(interfaces="pcan"):
+            channel = interface_dict.get("channel") or interface_dict.get("device")
+            if channel:
+                channels.append(channel)
+        return channels
+    return []
+
+
 def check_peak_device_interface_name():
     """
     Detect CAN interface name and update config.Peak_interface_name.
     Works safely on both Linux and Windows.
     """
     try:
-        if config.Testing_device == "Linux":
-            # List only interfaces that start with can
-            output = subprocess.run(
-                "ls /sys/class/net | grep '^can'",
-                shell=True,
-                capture_output=True,
-                text=True
-            )
-            interfaces = [i.strip() for i in output.stdout.splitlines() if i.strip()]
-            if interfaces:
-                # Choose first valid CAN interface (usually can0)
-                peak_interface = interfaces[0]
-                gui.update_config_file_runtime("Peak_interface_name", peak_interface)
-                #print(f"Linux CAN interface detected: {peak_interface}")
-            else:
-                print("❌ No CAN interface found on Linux")
-        elif config.Testing_device == "Windows":
-            interface_list = can.detect_available_configs(interfaces="pcan")
-            if not interface_list:
-                print("❌ No PCAN interface detected on Windows")
-                return
-            # Pick the first config
-            interface_dict = interface_list[0]
-            # Safely extract channel
-            channel = interface_dict.get("channel") or interface_dict.get("device")
-            if channel:
-                gui.update_config_file_runtime("Peak_interface_name", channel)
-                #print(f"Windows PCAN channel detected: {channel}")
-            else:
-                print("❌ PCAN config missing 'channel' entry")
+        interfaces = list_can_interfaces()
+        if interfaces:
+            # Choose first valid CAN interface (usually can0 / PCAN_USBBUS1)
+            runtime_config.update_config_file_runtime("Peak_interface_name", interfaces[0])
+        elif testing_device() == "Linux":
+            print("❌ No CAN interface found on Linux")
+        elif testing_device() == "Windows":
+            print("❌ No PCAN interface detected on Windows")
     except Exception as e:
         print("❌ Error detecting CAN interface:", e)
 
 
-def make_can_interface_up():
+def make_can_interface_up(interface_name=None):
     """
     By default, in linux can interface will be down
     using linux cmd we are making interface up
     so that peak interface can start send signal
     """
-    if config.Testing_device == "Linux":
+    if testing_device() == "Linux":
         password = config.Password
-        cmd_list = [f'echo {password} | sudo -S ip link set {config.Peak_interface_name} down',
-                    f'echo {password} | sudo -S ip link set {config.Peak_interface_name} type can',
-                    f'echo {password} | sudo -S ip link set {config.Peak_interface_name} type can bitrate {config.Bit_rate}',
-                    f'echo {password} | sudo -S ip link set {config.Peak_interface_name} up']     # writing the above cmd in Linux machine to make the interface up
+        interface_name = interface_name or config.Peak_interface_name
+        cmd_list = [f'echo {password} | sudo -S ip link set {interface_name} down',
+                    f'echo {password} | sudo -S ip link set {interface_name} type can',
+                    f'echo {password} | sudo -S ip link set {interface_name} type can bitrate {config.Bit_rate}',
+                    f'echo {password} | sudo -S ip link set {interface_name} up']     # writing the above cmd in Linux machine to make the interface up
 
         for cmd in cmd_list:
             try:
@@ -224,38 +332,33 @@ def make_can_interface_up():
     else:
         pass
 
-def check_whether_can_interface_is_up():
+def check_whether_can_interface_is_up(interface_name=None):
     """
     Checks if the CAN interface (PEAK) is UP.
     Works safely on both Linux and Windows.
-    No ADB commands inside this check!
+    No ADB commands and no process spawn inside this check!
+    The watched interface is answered from link_watcher's cached flag.
     """
+    interface_name = interface_name or config.Peak_interface_name
+
+    # virtual bus is always up
+    if testing_device() == "Simulation":
+        return 1
+
+    if link_watcher.is_running() and link_watcher.watched_name == interface_name:
+        return link_watcher.state
 
     # -------------------------
-    # Linux: use socketcan
+    # Linux: read sysfs
     # -------------------------
-    if config.Testing_device == "Linux":
-        try:
-            result = subprocess.run(
-                ["ip", "link", "show", config.Peak_interface_name],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            return 1 if result.returncode == 0 else 0
-        except Exception as e:
-            print("Linux CAN check error:", e)
-            return 0
+    if testing_device() == "Linux":
+        return link_monitor.read_link_state(interface_name)
 
     # -------------------------
     # Windows: use PCAN detection
     # -------------------------
-    elif config.Testing_device == "Windows":
-        try:
-            configs = can.detect_available_configs(interfaces=['pcan'])
-            return 1 if configs else 0
-        except Exception as e:
-            print("PCAN detection error:", e)
-            return 0
+    elif testing_device() == "Windows":
+        return link_monitor.detect_pcan()
 
     return 0
 
@@ -264,24 +367,45 @@ def check_whether_can_interface_is_up():
 #------------------------
 
 
+dbc_cache = {}    # { abs_path: (mtime, size, Database) }
+dbc_cache_lock = threading.Lock()
+
+
+def load_dbc(dbc_path):
+    """
+    cantools.db.load_file() with a cache keyed on path + mtime + size.
+    The parsed database is shared, so callers must not modify it.
+    """
+    path = os.path.abspath(dbc_path)
+    stat = os.stat(path)
+    with dbc_cache_lock:
+        entry = dbc_cache.get(path)
+        if entry and entry[0] == stat.st_mtime and entry[1] == stat.st_size:
+            return entry[2]
+    db_local = cantools.db.load_file(path)
+    with dbc_cache_lock:
+        dbc_cache[path] = (stat.st_mtime, stat.st_size, db_local)
+    return db_local
+
+
 def get_list_of_frames():
     importlib.reload(config)
-    db_local = cantools.db.load_file(config.dbc_file_path)
+    db_local = load_dbc(config.dbc_file_path)
     return [msg.name for msg in db_local.messages]
 
 def get_list_of_signals(frame_name):
-    db_local = cantools.db.load_file(config.dbc_file_path)
+    db_local = load_dbc(config.dbc_file_path)
     for msg in db_local.messages:
         if msg.name == frame_name:
             return [sig.name for sig in msg.signals]
     return []
 
-def load_vector_sheet():
+def load_vector_sheet(read_only=False):
     frame_name = get_list_of_frames()
     signal_list = []
     for frame in frame_name:
         signal_list += get_list_of_signals(frame)
-    wb = openpyxl.load_workbook(config.file_path)
+    wb = openpyxl.load_workbook(config.file_path, read_only=read_only)
     wb._active_sheet_index = 0
     sheet = wb.active
     return signal_list, sheet
@@ -312,6 +436,32 @@ def _parse_type_h_property_map():
     return prop_map
 
 
+def build_signal_property_map_from_header(sheet):
+    """
+    Read the two header rows of the CAN_Signals sheet once and return
+    an exact-match map: { signal_name: '0x....' }
+    Layout expected:
+      Row 1: Property ID | 0x21608350 | 0x21608351 | ...
+      Row 2: Time (ms)   | MCU_DC_Curr | MCU_Temp  | ...
+    Column A holds the row labels and is skipped.
+    """
+    header_map = {}
+    rows = sheet.iter_rows(min_row=1, max_row=2, values_only=True)
+    prop_row = next(rows, ())
+    signal_row = next(rows, ())
+
+    for col in range(1, len(signal_row)):
+        signal_name = signal_row[col]
+        if signal_name is None:
+            continue
+        prop = prop_row[col] if col < len(prop_row) else None
+        key = str(signal_name).strip()
+        # first column wins, same as the old top-left-first cell scan
+        if key and key not in header_map:
+            header_map[key] = str(prop).lower() if prop is not None else ""
+    return header_map
+
+
 def get_property_values():
     """
     Return list of property IDs aligned with the order of signals returned from
@@ -344,32 +494,18 @@ def get_property_values():
     except Exception as e:
         print(f"⚠️ types.h lookup failed: {e}")
 
-    # --- Fallback: scan Excel (existing logic, slightly hardened) ---
+    # --- Fallback: resolve from the vector sheet header rows ---
     try:
+        header_map = build_signal_property_map_from_header(sheet)
         property_list = []
         for word in signal_list:
-            name = None
-            # iterate rows and cells (sheet from load_vector_sheet)
-            for row in sheet.iter_rows():
-                for cell in row:
-                    if cell.value and str(word) in str(cell.value):
-                        column = cell.column
-                        row_idx = cell.row - 1
-                        column_letter = get_column_letter(column)
-                        name = f"{column_letter}{row_idx}"
-                        break
-                if name:
-                    break
-            if name:
-                try:
-                    prop = sheet[name].value
-                    property_list.append(str(prop).lower() if prop is not None else "")
-                except Exception:
-                    property_list.append("")
-            else:
+            prop = header_map.get(str(word).strip())
+            if prop is None:
                 # not found in excel
                 print(f"Warning: No match found for {word}")
                 property_list.append("")
+            else:
+                property_list.append(prop)
         return property_list
     except Exception as e:
         print(f"❌ Excel fallback get_property_values error: {e}")
@@ -433,25 +569,94 @@ def load_vector_sheet_frameid(frame_name):
 #Prepare Signal Dictionary from excel
 #-----------------------------------
 
+def read_signal_columns(sheet, signal_names, timedelay, header_row=2):
+    """
+    Single row-streaming pass over the vector sheet.
+    Signal names are matched exactly against the header row, and the
+    len(timedelay) rows underneath are read as that signal's values.
+
+    Returns (signal_value_dict, problems):
+      signal_value_dict = {signal_name: {timedelay: value}}
+      problems          = {signal_name: "duplicate columns B, F" / "ambiguous ..."}
+    Duplicate columns are reported and the first (left-most) one is used.
+    """
+    # caller's order (frame grouping and warnings follow it), duplicates dropped
+    wanted = list(dict.fromkeys(str(name).strip() for name in signal_names))
+    signal_cols = {}     # {signal_name: column index (0-based)}
+    problems = {}
+    values = {}          # {signal_name: [v1, v2, ...]}
+    last_row = header_row + len(timedelay)
+
+    for row_idx, row in enumerate(
+            sheet.iter_rows(min_row=header_row, max_row=last_row, values_only=True),
+            start=header_row):
+        if row_idx == header_row:
+            exact = {}       # {header: [cols]}
+            folded = {}      # {header.lower(): [(header, col)]}
+            for col, cell in enumerate(row):
+                if col == 0 or cell is None:
+                    continue
+                header = str(cell).strip()
+                exact.setdefault(header, []).append(col)
+                folded.setdefault(header.lower(), []).append((header, col))
+
+            for name in wanted:
+                cols = exact.get(name)
+                if not cols:
+                    # fall back to a case/whitespace-insensitive match,
+                    # but only when it points at exactly one column
+                    candidates = folded.get(name.lower(), [])
+                    if len(candidates) > 1:
+                        problems[name] = "ambiguous columns " + ", ".join(
+                            f"{openpyxl.utils.get_column_letter(c + 1)} ({h})" for h, c in candidates)
+                        continue
+                    cols = [c for _, c in candidates]
+                if not cols:
+                    continue
+                if len(cols) > 1:
+                    problems[name] = "duplicate columns " + ", ".join(
+                        openpyxl.utils.get_column_letter(c + 1) for c in cols)
+                signal_cols[name] = cols[0]
+                values[name] = []
+            continue
+
+        for name, col in signal_cols.items():
+            cell_val = row[col] if col < len(row) else None
+            values[name].append(cell_val or 0)
+
+    signal_value_dict = {}
+    for name in signal_cols:
+        column_values = values[name]
+        # rows missing at the bottom of the sheet read as 0 like empty cells
+        column_values += [0] * (len(timedelay) - len(column_values))
+        signal_value_dict[name] = dict(zip(timedelay, column_values))
+    return signal_value_dict, problems
+
+
+def read_time_steps(sheet, header_row=2):
+    """
+    Return the Time (ms) column of the vector sheet (column A under the
+    signal header row) until the first blank cell.
+    """
+    time_steps = []
+    for row in sheet.iter_rows(min_row=header_row + 1, max_col=1, values_only=True):
+        if not row or row[0] is None:
+            break
+        time_steps.append(row[0])
+    return time_steps
+
+
 def send_signal_values():
     #
    # Returns dict: {signal_name: {timedelay: value}}
     #
-    signal_list, sheet = load_vector_sheet()
-    signal_value_dict = {}
-    for word in signal_list:
-        for row in sheet.iter_rows():
-            for cell in row:
-                if word in str(cell.value):
-                    value = {}
-                    for i in range(1, len(config.timedelay)+1):
-                        col = cell.column
-                        row_idx = cell.row + i
-                        column_letter = get_column_letter(col)
-                        name = f"{column_letter}{row_idx}"
-                        sig_value = sheet[name].value or 0
-                        value[config.timedelay[i-1]] = sig_value
-                    signal_value_dict[word] = value
+    signal_list, sheet = load_vector_sheet(read_only=True)
+    try:
+        signal_value_dict, problems = read_signal_columns(sheet, signal_list, config.timedelay)
+    finally:
+        sheet.parent.close()
+    for sig, problem in problems.items():
+        print(f"⚠️ Vector sheet: {sig} has {problem}")
     return signal_value_dict
 
 # Track if Results sheet was initialized (Time + TX copied)
@@ -466,6 +671,7 @@ EXCEL_FAST_CACHE = {
     "time_row": {},      # {1000: 4, 2000: 5, ...}
     "tx_col": {},        # {signal_name: column}
     "rx_col": {},        # {signal_name: column}
+    "rx_can_col": {},    # {signal_name: column} of the "Rx CAN" columns
     "initialized": False,
     "tx_initialized": False
 }
@@ -491,6 +697,33 @@ def initialize_results_sheet_structure():
         return
 
     wb = openpyxl.load_workbook(file_path)
+    prepare_results_sheet(wb, getattr(config, "timedelay", None))
+
+    save_workbook_atomic(wb, file_path)
+    print("✔ Initial Results sheet structure saved")
+
+    EXCEL_FAST_CACHE["tx_initialized"] = True
+
+
+def save_workbook_atomic(wb, file_path):
+    """
+    Save next to file_path and swap it in, so a thread reading the workbook
+    (ADB worker → cached_signal_dict) never sees a half-written zip.
+    """
+    tmp_path = f"{file_path}.tmp{os.getpid()}.xlsx"
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def prepare_results_sheet(wb, timedelay):
+    """
+    Write the Time(ms) column and copy the TX values from CAN_Signals
+    into the Results sheet of an already loaded workbook (no save).
+    """
     sheet = wb["Results"]
     can_sheet = wb["CAN_Signals"]
 
@@ -498,8 +731,8 @@ def initialize_results_sheet_structure():
     sheet.cell(row=2, column=1).value = "Time (ms)"
 
     # ------------ Write time rows -----------
-    if hasattr(config, "timedelay"):
-        for i, t in enumerate(config.timedelay):
+    if timedelay:
+        for i, t in enumerate(timedelay):
             sheet.cell(row=4 + i, column=1).value = int(t)
         print("⏱ Time(ms) column written")
 
@@ -532,10 +765,19 @@ def initialize_results_sheet_structure():
 
     print("💾 TX columns copied")
 
-    wb.save(file_path)
-    print("✔ Initial Results sheet structure saved")
-
-    EXCEL_FAST_CACHE["tx_initialized"] = True
+    # ------------ Clear RX left over from a previous run -----------
+    # (a step with no VHAL answer must not look validated)
+    if can_rx_enabled():
+        ensure_rx_can_columns(sheet)
+    _, rx_map = map_results_sheet(sheet)
+    no_fill = openpyxl.styles.PatternFill(fill_type=None)
+    for rx_col in list(rx_map.values()) + list(map_rx_can_columns(sheet).values()):
+        for r in range(4, sheet.max_row + 1):
+            cell = sheet.cell(row=r, column=rx_col)
+            cell.value = None
+            if cell.has_style:
+                cell.fill = no_fill
+    reset_verdict_sheet(wb)
 
 
 
@@ -559,7 +801,19 @@ def init_fast_excel():
 
     EXCEL_FAST_CACHE["wb"] = wb
     EXCEL_FAST_CACHE["sheet"] = sheet
+    EXCEL_FAST_CACHE["time_row"], EXCEL_FAST_CACHE["rx_col"] = map_results_sheet(sheet)
+    EXCEL_FAST_CACHE["rx_can_col"] = map_rx_can_columns(sheet)
+
+    print("⚡ FAST Excel initialized (memory mode)")
+    EXCEL_FAST_CACHE["initialized"] = True
+
 
+def map_results_sheet(sheet):
+    """
+    Build the Results sheet lookup tables:
+      time_row = {1000: 4, 2000: 5, ...}
+      rx_col   = {signal_name: column}
+    """
     # -------- time_row mapping --------
     time_map = {}
     for r in range(4, sheet.max_row + 1):
@@ -567,21 +821,73 @@ def init_fast_excel():
         if val is not None:
             time_map[int(val)] = r
 
-    EXCEL_FAST_CACHE["time_row"] = time_map
-
     # -------- rx_col mapping --------
     rx_map = {}
     for c in range(2, sheet.max_column + 1):
         subheader = sheet.cell(row=3, column=c).value
-        if subheader and "rx" in str(subheader).lower():
+        if subheader and "rx" in str(subheader).lower() and not is_rx_can_header(subheader):
             sig = sheet.cell(row=2, column=c - 1).value
             if sig:
                 rx_map[str(sig).strip()] = c
 
-    EXCEL_FAST_CACHE["rx_col"] = rx_map
+    return time_map, rx_map
+
+
+# ================================================================
+# "Rx CAN" COLUMNS (values seen on the bus, see can_rx.py)
+# ================================================================
+RX_CAN_HEADER = "Rx CAN"
+
+
+def is_rx_can_header(value):
+    return value is not None and str(value).strip().lower() == RX_CAN_HEADER.lower()
 
-    print("⚡ FAST Excel initialized (memory mode)")
-    EXCEL_FAST_CACHE["initialized"] = True
+
+def map_rx_can_columns(sheet):
+    """{signal_name: column} of the Rx CAN columns (signal header sits over the Tx column)."""
+    rx_can_map = {}
+    for c in range(2, sheet.max_column + 1):
+        if not is_rx_can_header(sheet.cell(row=3, column=c).value):
+            continue
+        for tx_col in (c - 2, c - 1):
+            sig = sheet.cell(row=2, column=tx_col).value if tx_col >= 2 else None
+            if sig:
+                rx_can_map[str(sig).strip()] = c
+                break
+    return rx_can_map
+
+
+def ensure_rx_can_columns(sheet):
+    """
+    Add an Rx CAN column after every Rx Car Service column of an older
+    Tx | Rx Car Service sheet. The merged Property ID / signal headers are
+    widened to cover the new column. Returns True if columns were added.
+    """
+    if any(is_rx_can_header(sheet.cell(row=3, column=c).value)
+           for c in range(2, sheet.max_column + 1)):
+        return False
+    rx_cols = [c for c in range(2, sheet.max_column + 1)
+               if str(sheet.cell(row=3, column=c).value or "").strip().lower() == "rx car service"]
+    if not rx_cols:
+        return False
+
+    # insert_cols() does not move merged ranges: unmerge, insert, merge again
+    header_ranges = [(r.min_row, r.min_col, r.max_row, r.max_col)
+                     for r in sheet.merged_cells.ranges if r.min_row <= 3]
+    for min_row, min_col, max_row, max_col in header_ranges:
+        sheet.unmerge_cells(start_row=min_row, start_column=min_col, end_row=max_row, end_column=max_col)
+
+    for c in reversed(rx_cols):
+        sheet.insert_cols(c + 1)
+        sheet.cell(row=3, column=c + 1).value = RX_CAN_HEADER
+
+    for min_row, min_col, max_row, max_col in header_ranges:
+        shift_min = sum(1 for c in rx_cols if c < min_col)
+        shift_max = sum(1 for c in rx_cols if c <= max_col)
+        sheet.merge_cells(start_row=min_row, start_column=min_col + shift_min,
+                          end_row=max_row, end_column=max_col + shift_max)
+    print(f"🚌 Added {len(rx_cols)} Rx CAN columns to Results")
+    return True
 
 
 
@@ -597,6 +903,7 @@ def fast_update_excel_rx(time_ms, adb_rx_values):
     """
 
     init_fast_excel()
+    start = time.perf_counter()
 
     sheet = EXCEL_FAST_CACHE["sheet"]
     time_row = EXCEL_FAST_CACHE["time_row"].get(time_ms)
@@ -614,16 +921,82 @@ def fast_update_excel_rx(time_ms, adb_rx_values):
             sheet.cell(row=time_row, column=col).value = val
             updated.append(sig)
 
-    print(f"📥 RX updated in memory for {len(updated)} signals @ {time_ms} ms")
+    excel_rx_write_seconds.observe(time.perf_counter() - start)
+    log.debug(f"📥 RX updated in memory for {len(updated)} signals @ {time_ms} ms")
+
+
+def fast_update_excel_rx_can(time_ms, bus_values):
+    """Write the values seen on the bus into the Rx CAN columns (in memory)."""
+    init_fast_excel()
+    sheet = EXCEL_FAST_CACHE["sheet"]
+    time_row = EXCEL_FAST_CACHE["time_row"].get(time_ms)
+    rx_can_col_map = EXCEL_FAST_CACHE["rx_can_col"]
+    if not time_row or not rx_can_col_map:
+        return
+
+    for sig, col in rx_can_col_map.items():
+        value = bus_values.get(sig)
+        sheet.cell(row=time_row, column=col).value = "Not on bus" if value is None else value
+
+
+
+# ================================================================
+# VERDICTS (TX vs VHAL, see rx_verdict.py)
+# ================================================================
+VERDICT_SHEET = "Verdicts"
+VERDICT_HEADER = ("Time (ms)", "PASS", "FAIL", "NO RX", "Failed signals")
+VERDICT_FILLS = {}
+
+
+def reset_verdict_sheet(wb):
+    """Start an empty Verdicts sheet (one row per step, appended by write_verdicts)."""
+    if VERDICT_SHEET in wb.sheetnames:
+        del wb[VERDICT_SHEET]
+    wb.create_sheet(VERDICT_SHEET).append(VERDICT_HEADER)
 
 
+def verdict_fill(verdict):
+    fill = VERDICT_FILLS.get(verdict)
+    if fill is None:
+        import rx_verdict
+        colour = rx_verdict.COLOURS[verdict]
+        fill = VERDICT_FILLS[verdict] = openpyxl.styles.PatternFill(
+            fill_type="solid", start_color=colour, end_color=colour
+        )
+    return fill
+
+
+def write_verdicts(wb, sheet, row, rx_col_map, time_ms, verdicts):
+    """Colour the Rx Car Service cells of one step and add its row to the Verdicts sheet."""
+    import rx_verdict
+    for sig, verdict in verdicts.items():
+        col = rx_col_map.get(sig)
+        if col:
+            sheet.cell(row=row, column=col).fill = verdict_fill(verdict)
+    passed, failed, missing = rx_verdict.count(verdicts)
+    failed_signals = ", ".join(sig for sig, verdict in verdicts.items() if verdict == rx_verdict.FAIL)
+    wb[VERDICT_SHEET].append((time_ms, passed, failed, missing, failed_signals))
+
+
+def fast_update_excel_verdicts(time_ms, verdicts):
+    """write_verdicts() on the in-memory Results workbook."""
+    init_fast_excel()
+    time_row = EXCEL_FAST_CACHE["time_row"].get(time_ms)
+    if not time_row or not verdicts:
+        return
+    wb = EXCEL_FAST_CACHE["wb"]
+    if VERDICT_SHEET not in wb.sheetnames:
+        reset_verdict_sheet(wb)
+    write_verdicts(wb, EXCEL_FAST_CACHE["sheet"], time_row, EXCEL_FAST_CACHE["rx_col"], time_ms, verdicts)
+
 
 # ================================================================
 # 4️⃣ SAVE ONCE AT END
 # ================================================================
 def save_fast_excel():
     if EXCEL_FAST_CACHE["wb"]:
-        EXCEL_FAST_CACHE["wb"].save(config.file_path)
+        with excel_save_seconds.time():
+            save_workbook_atomic(EXCEL_FAST_CACHE["wb"], config.file_path)
         print("💾 FAST Excel saved (one-time)")
 
 
@@ -631,7 +1004,7 @@ def Update_Value_Tx_column_in_UI(signal_dict_msg):
     try:
         ui_queue.put(signal_dict_msg)
         #gui.root.after_idle(gui.update_ui_from_queue)  # immediately process next queue item
-        print(f"📤 UI TX Update Queued: {signal_dict_msg}")
+        log.debug(f"📤 UI TX Update Queued: {signal_dict_msg}")
         time.sleep(0.01)  # small yield so GUI can breathe
     except Exception as e:
         print(f"⚠️ Failed to queue UI TX update: {e}")
@@ -643,7 +1016,7 @@ def read_property_ids_from_excel(file_path):
     property_id_map = { signal_name: property_id }
     """
     try:
-        wb = load_workbook(file_path, data_only=True)
+        wb = openpyxl.load_workbook(file_path, data_only=True)
         ws = wb["CAN_Signals"]
 
         property_id_map = {}
@@ -675,7 +1048,7 @@ def read_signal_values_from_excel(file_path):
     }
     """
     try:
-        wb = load_workbook(file_path, data_only=True)
+        wb = openpyxl.load_workbook(file_path, data_only=True)
         ws = wb["CAN_Signals"]
 
         signal_values = {}
@@ -724,135 +1097,357 @@ def cached_property_map():
     return read_property_ids_from_excel(config.file_path)
 
 
-def synchronized_signal_worker():
-    global db
+def build_signal_frame_map(db):
+    """
+    Return { signal_name: frame_name } for a loaded DBC.
+    Same answer as get_frame_from_signal() (first frame wins) without
+    re-reading the DBC for every signal.
+    """
+    signal_frame_map = {}
+    for msg in db.messages:
+        for sig in msg.signals:
+            signal_frame_map.setdefault(sig.name, msg.name)
+    return signal_frame_map
 
-    try:
-        # ====================================================
-        # 1) Load DBC only once
-        # ====================================================
-        if db is None:
-            if not config.dbc_file_path or not os.path.exists(config.dbc_file_path):
-                print("❌ Invalid DBC path:", config.dbc_file_path)
-                return
 
-            db = cantools.database.load_file(config.dbc_file_path)
-            print(f"✅ Loaded DBC: {config.dbc_file_path}")
+def group_signals_by_frame(signal_dict, td, signal_frame_map, dbc_frameid_map):
+    """
+    Build frame_groups with CAN-ID + signals for one time step.
+    Format:
+    frame_groups = {
+        "Batt_Sts_Info": {
+            "can_id": 0x12d,
+            "signals": { "Display_SoC": 99, "Batt_Curr": 10 }
+        }
+    }
+    """
+    frame_groups = {}
 
-        # Build fast lookup → {frame_name: frame_id}
-        dbc_frameid_map = {msg.name: msg.frame_id for msg in db.messages}
+    for sig_name, td_values in signal_dict.items():
 
+        frame = signal_frame_map.get(sig_name)
+        if not frame:
+            continue
 
-        # ====================================================
-        # 2) Load Excel only once
-        # ====================================================
-        excel_path = config.file_path
-        initialize_results_sheet_structure()
-        property_map = cached_property_map()
-        signal_dict = cached_signal_dict()
-
-        # Validate timedelay list
-        if not hasattr(config, "timedelay") or not config.timedelay:
-            print("⚠️ No timedelay values in config")
-            return
+        # value for this delay
+        val = td_values.get(td, td_values[max(td_values.keys())])
 
-        print("⏱ Timedelay sequence:", config.timedelay)
+        if frame not in frame_groups:
+            frame_groups[frame] = {
+                "can_id": dbc_frameid_map.get(frame),
+                "signals": {}
+            }
 
+        frame_groups[frame]["signals"][sig_name] = val
 
+    return frame_groups
 
-        # ====================================================
-        # MAIN LOOP — One cycle per delay
-        # ====================================================
-        heartbeat_frames = {hb["frame_name"] for hb in config.heart_beat_signals}
-        first_loop = True
-        for td in config.timedelay:
-            if stop_synchronized_event.is_set():
-                print("🛑 Sync worker stop requested — exiting loop")
-                break
-            print(f"\n🕒 Starting cycle for {td} ms")
-            time.sleep(td / 1000.0)
 
-            # ====================================================
-            # 3) Build frame_groups with CAN-ID + signals
-            # ====================================================
-            # Format:
-            # frame_groups = {
-            #     "Batt_Sts_Info": {
-            #         "can_id": 0x12d,
-            #         "signals": { "Display_SoC": 99, "Batt_Curr": 10 }
-            #     }
-            # }
+def apply_step_to_heartbeat(frame_groups, heartbeat_signals):
+    """
+    Heartbeat frames → update matching signals of heartbeat_signals in place.
+    Every other frame → returned as a user_send_signals style list.
+    """
+    heartbeat_frames = {hb["frame_name"] for hb in heartbeat_signals}
+    new_user_send_signals = []
 
-            frame_groups = {}
+    for frame_name, frame_info in frame_groups.items():
 
-            for sig_name, td_values in signal_dict.items():
+        frame_id = frame_info["can_id"]
+        sig_map = frame_info["signals"]
 
-                frame = get_frame_from_signal(sig_name)
-                if not frame:
-                    continue
+        if not frame_id:
+            print(f"⚠️ Missing CAN-ID for frame {frame_name}, skipping…")
+            continue
 
-                # value for this delay
-                val = td_values.get(td, td_values[max(td_values.keys())])
+        # ------------------------------
+        # HEARTBEAT FRAME → update only heartbeat list
+        # ------------------------------
+        if frame_name in heartbeat_frames:
+
+            for hb in heartbeat_signals:
+                if hb["frame_name"] == frame_name:
+                    # update only matching signal names
+                    for sig, val in sig_map.items():
+                        if sig in hb["signals"]:
+                            hb["signals"][sig] = val
+            continue
 
-                if frame not in frame_groups:
-                    frame_groups[frame] = {
-                        "can_id": dbc_frameid_map.get(frame),
-                        "signals": {}
-                    }
+        # ------------------------------
+        # NORMAL FRAMES → user_send_signals entry
+        # ------------------------------
+        new_user_send_signals.append({
+            "frame_name": frame_name,
+            "can_id": frame_id,
+            "signals": sig_map
+        })
 
-                frame_groups[frame]["signals"][sig_name] = val
+    return new_user_send_signals
 
 
+# ======================================================
+# CAN RX CAPTURE (bus-level validation, config.Kernal = "On")
+# ======================================================
+can_rx_capture = None
 
-            # ====================================================
-            # 4) Build user_send_signals + update heartbeat signals
-            # ====================================================
-            new_user_send_signals = []
 
-            for frame_name, frame_info in frame_groups.items():
+def can_rx_enabled():
+    return str(getattr(config, "Kernal", "Off")).strip().lower() == "on"
 
-                frame_id = frame_info["can_id"]
-                sig_map = frame_info["signals"]
 
-                if not frame_id:
-                    print(f"⚠️ Missing CAN-ID for frame {frame_name}, skipping…")
-                    continue
+def start_can_rx_capture():
+    """Capture + decode the bus during a run (can_rx.py). Returns the capture or None."""
+    global can_rx_capture
+    import can_rx
+    if can_rx_capture is not None:
+        return can_rx_capture
+    dbs = send_dbs()
+    capture = can_rx.CanRxCapture(dbs, config.Peak_interface_name, shared_bus=bus)
+    if not capture.start():
+        return None
+    can_rx_capture = capture
+    return capture
 
 
-                # ------------------------------
-                # HEARTBEAT FRAME → update only heartbeat list
-                # ------------------------------
-                if frame_name in heartbeat_frames:
+def record_can_rx(time_ms):
+    """Write what the bus carried at this step into the Rx CAN columns."""
+    if can_rx_capture is not None:
+        fast_update_excel_rx_can(time_ms, can_rx_capture.latest_values())
 
-                    for hb in config.heart_beat_signals:
-                        if hb["frame_name"] == frame_name:
-                            # update only matching signal names
-                            for sig, val in sig_map.items():
-                                if sig in hb["signals"]:
-                                    hb["signals"][sig] = val
-                    continue
 
+def stop_can_rx_capture():
+    """Stop the capture and print which TX frames were not seen on time."""
+    global can_rx_capture
+    capture, can_rx_capture = can_rx_capture, None
+    if capture is None:
+        return
+    import can_rx
+    report = capture.frame_report(tx_frames.current.entries, now=time.time())
+    capture.stop()
+    can_rx.print_frame_report(report)
+
+
+def prepare_synchronized_run():
+    """
+    Load DBC + vector sheet once and return the step plan
+    { "signal_dict", "signal_frame_map", "dbc_frameid_map", "timedelay" },
+    or None when the run can't start.
+    Shared by the worker thread and async_core.
+    """
+    global db
+
+    # ====================================================
+    # 1) Load DBC only once
+    # ====================================================
+    if db is None:
+        if not config.dbc_file_path or not os.path.exists(config.dbc_file_path):
+            print("❌ Invalid DBC path:", config.dbc_file_path)
+            return None
+
+        db = load_dbc(config.dbc_file_path)
+        print(f"✅ Loaded DBC: {config.dbc_file_path}")
+
+    # ====================================================
+    # 2) Load Excel only once
+    # ====================================================
+    initialize_results_sheet_structure()
+    signal_dict = cached_signal_dict()
+
+    # Validate timedelay list
+    if not hasattr(config, "timedelay") or not config.timedelay:
+        print("⚠️ No timedelay values in config")
+        return None
 
-                # ------------------------------
-                # NORMAL FRAMES → user_send_signals entry
-                # ------------------------------
-                new_user_send_signals.append({
-                    "frame_name": frame_name,
-                    "can_id": frame_id,
-                    "signals": sig_map
-                })
+    print("⏱ Timedelay sequence:", config.timedelay)
+    plan = {
+        "signal_dict": signal_dict,
+        # fast lookup → {signal_name: frame_name}, {frame_name: frame_id}
+        "signal_frame_map": build_signal_frame_map(db),
+        "dbc_frameid_map": {msg.name: msg.frame_id for msg in db.messages},
+        "timedelay": list(config.timedelay),
+        "precompiled": None,
+        "tx_version": None,
+        "delta": None,
+    }
+    if use_delta():
+        apply_delta(plan)
+    # a delta run with nothing to re-test sends nothing → no bus check either
+    if can_rx_enabled() and plan["timedelay"]:
+        start_can_rx_capture()
+    plan["precompiled"] = precompile_plan(plan)
+    plan["comparator"] = build_comparator(plan)
+    return plan
+
+
+def build_comparator(plan):
+    """Expected VHAL value of every signal and step (rx_verdict.py); None if it can't be built."""
+    import rx_verdict
+    signal_dict = plan["signal_dict"]
+    if plan.get("delta") is not None:
+        signal_dict = {sig: values for sig, values in signal_dict.items() if sig in plan["delta"].rerun}
+    try:
+        return rx_verdict.Comparator.build(
+            signal_dict, plan["timedelay"], cached_canid_to_signalname(),
+            config.Vehicle_propID_type, [db],
+        )
+    except Exception as e:
+        print(f"⚠️ Building the TX/VHAL comparison failed, no verdicts this run: {e}")
+        return None
 
 
+def judge_step(plan, td, rx_values):
+    """
+    Compare the RX snapshot of one step with what was sent: colours the
+    Results cells, adds a Verdicts row and queues {"rx_verdict": {...}} for the UI.
+    Call with excel_lock held.
+    """
+    comparator = plan.get("comparator")
+    if comparator is None:
+        return {}
+    verdicts = comparator.compare(td, rx_values)
+    if plan.get("delta") is not None:
+        plan["delta"].record(td, rx_values, verdicts)
+    fast_update_excel_verdicts(int(td), verdicts)
+    ui_queue.put({"rx_verdict": verdicts})
+    return verdicts
+
+
+# ================================================================
+# DELTA RE-VALIDATION (delta_run.py)
+# ================================================================
+delta_mode = None          # None → config.Delta_mode; the CLI sets True for --delta
+delta_state_path = None    # None → <results workbook>.delta.json
+
+
+def use_delta():
+    if delta_mode is not None:
+        return bool(delta_mode)
+    return bool(getattr(config, "Delta_mode", False))
+
+
+def apply_delta(plan):
+    """
+    Narrow the plan to the frames of the signals that changed or did not
+    pass last time; with nothing to re-test the run gets no steps.
+    """
+    import delta_run
+    canid_to_signalname = cached_canid_to_signalname()
+    fingerprints = delta_run.fingerprints(plan["signal_dict"], plan["timedelay"], db,
+                                          canid_to_signalname, config.Vehicle_propID_type)
+    delta = delta_run.DeltaRun(
+        delta_state_path or delta_run.state_path(config.file_path), fingerprints, plan["timedelay"],
+        validated={sig for names in canid_to_signalname.values() for sig in names},
+    )
+    # frames keep all their vector signals so they go out exactly as in a full run
+    frames = {plan["signal_frame_map"].get(sig) for sig in delta.rerun}
+    plan["signal_dict"] = {sig: values for sig, values in plan["signal_dict"].items()
+                           if plan["signal_frame_map"].get(sig) in frames}
+    if not delta.rerun:
+        plan["timedelay"] = []
+    plan["delta"] = delta
+    print(f"🔁 Delta run: {delta.summary()}")
+
+
+def finish_delta(plan):
+    """Carry the unchanged signals' results into the workbook and store the new state."""
+    delta = plan.get("delta") if plan else None
+    if delta is None:
+        return
+    init_fast_excel()
+    wb = EXCEL_FAST_CACHE["wb"]
+    if VERDICT_SHEET not in wb.sheetnames:
+        reset_verdict_sheet(wb)
+    delta.carry_forward(wb, EXCEL_FAST_CACHE["sheet"], EXCEL_FAST_CACHE["time_row"],
+                        EXCEL_FAST_CACHE["rx_col"], VERDICT_SHEET)
+    try:
+        delta.save()
+    except OSError as e:
+        print(f"⚠️ Could not save the delta state {delta.path}: {e}")
+
+
+def print_verdict_summary(plan):
+    if plan and plan.get("comparator") is not None:
+        print(f"⚖️ TX vs VHAL: {plan['comparator'].summary()}")
+
+
+def precompile_plan(plan):
+    """Bulk-encode the frames of every step once (bulk_encode.py); None without numpy."""
+    import bulk_encode
+    if not bulk_encode.available():
+        return None
+    try:
+        return bulk_encode.precompile_steps(
+            plan["signal_dict"], plan["timedelay"], plan["signal_frame_map"], plan["dbc_frameid_map"],
+            copy.deepcopy(config.heart_beat_signals), send_dbs(),
+        )
+    except Exception as e:
+        print(f"⚠️ Precompiling the vector failed, encoding per step: {e}")
+        return None
+
+
+def publish_step(plan, td):
+    """Build the frames of one time step, publish them and queue the TX values for the UI."""
+    frame_groups = group_signals_by_frame(
+        plan["signal_dict"], td, plan["signal_frame_map"], plan["dbc_frameid_map"]
+    )
+    # (on a copy: the published generation is never modified in place)
+    heartbeat_signals = copy.deepcopy(config.heart_beat_signals)
+    new_user_send_signals = apply_step_to_heartbeat(frame_groups, heartbeat_signals)
+
+    # precompiled frames hold as long as nobody else (GUI Send, heartbeat restart)
+    # published a generation since our last step
+    entries = None
+    if plan.get("precompiled") is not None:
+        if plan["tx_version"] is not None and tx_frames.current.version != plan["tx_version"]:
+            log.info("ℹ️ TX frames changed outside the run — encoding the remaining steps per step")
+            plan["precompiled"] = None
+        else:
+            entries = plan["precompiled"].entries(td)
+    generation = publish_send_signals(heartbeat_signals, new_user_send_signals, entries=entries)
+    plan["tx_version"] = generation.version
+    rx_poller.step_changed()
+    log.debug(f"🟩 Updated signals for {td} ms")
+    return frame_groups
+
+
+def tx_ui_message(frame_groups):
+    return {
+        "tx_update": {
+            sig: val
+            for f in frame_groups.values()
+            for sig, val in f["signals"].items()
+        }
+    }
+
+
+def synchronized_signal_worker():
+    global synchronized_worker_status
+
+    try:
+        plan = prepare_synchronized_run()
+        if plan is None:
+            synchronized_worker_status = "failed"
+            return
+
+
+
+        # ====================================================
+        # MAIN LOOP — One cycle per delay
+        # ====================================================
+        first_loop = True
+        for td in plan["timedelay"]:
+            if stop_synchronized_event.is_set():
+                print("🛑 Sync worker stop requested — exiting loop")
+                synchronized_worker_status = "stopped"
+                break
+            log.info(f"\n🕒 Starting cycle for {td} ms")
+            time.sleep(td / 1000.0)
+            cycle_start = time.perf_counter()
 
             # ====================================================
-            # 5) Update config runtime once per delay
+            # 3) Build + publish the frames of this step
             # ====================================================
-            gui.update_config_file_runtime("heart_beat_signals", config.heart_beat_signals)
-            #gui.update_config_file_runtime("user_send_signals", new_user_send_signals)
-            importlib.reload(config)
-            user_send_signals_runtime = new_user_send_signals
-
-            print(f"🟩 Updated signals for {td} ms")
+            frame_groups = publish_step(plan, td)
 
 
 
@@ -861,15 +1456,8 @@ def synchronized_signal_worker():
             # ====================================================
 
             def update_tx_ui():
-                tx_dict = {
-                    "tx_update": {
-                        sig: val
-                        for f in frame_groups.values()
-                        for sig, val in f["signals"].items()
-                    }
-                }
-                Update_Value_Tx_column_in_UI(tx_dict)
-                print(f"📤 UI Tx updated for {td} ms")
+                Update_Value_Tx_column_in_UI(tx_ui_message(frame_groups))
+                log.debug(f"📤 UI Tx updated for {td} ms")
 
             def validate_and_update_rx():
                 nonlocal first_loop
@@ -926,8 +1514,10 @@ def synchronized_signal_worker():
                     # lock excel if you do concurrent writes elsewhere
                     with excel_lock:
                         fast_update_excel_rx(int(td), latest)
+                        record_can_rx(int(td))
+                        judge_step(plan, td, latest)
                     ui_queue.put(latest)
-                    print(f"📡 Async RX updated for {td} ms (got_snapshot={got_snapshot})")
+                    log.debug(f"📡 Async RX updated for {td} ms (got_snapshot={got_snapshot})")
                 except Exception as e:
                     print(f"❌ Async RX update failed for {td} ms:", e)
 
@@ -943,27 +1533,62 @@ def synchronized_signal_worker():
             tx_thread.join()
             rx_thread.join()
 
-            print(f"✔ Completed Tx/Rx cycle {td} ms")
+            sync_loop_seconds.observe(time.perf_counter() - cycle_start)
+            log.info(f"✔ Completed Tx/Rx cycle {td} ms")
             first_loop = False
 
-        print("\n🏁 ALL cycles done successfully!")
+        else:
+            print("\n🏁 ALL cycles done successfully!")
+            synchronized_worker_status = "completed"
+        print_verdict_summary(plan)
+        stop_can_rx_capture()
+        with excel_lock:
+            finish_delta(plan)
         save_fast_excel()
 
     except Exception as e:
         print(f"❌ Worker crashed:", e)
+        synchronized_worker_status = "failed"
 
     finally:
         print("🛑 Worker exiting…")
+        stop_can_rx_capture()
         stop_synchronized_worker()
 
 
 
 
+# ======================================================
+# ASYNC CORE SWITCH
+# ======================================================
+async_core_enabled = None   # None → config.Async_core; the CLI sets True for --async-core
+
+
+def use_async_core():
+    if async_core_enabled is not None:
+        return bool(async_core_enabled)
+    return bool(getattr(config, "Async_core", False))
+
+
+def async_core():
+    import async_core as core_module   # imports backend, so only load it on demand
+    return core_module.core
+
+
 def start_synchronized_worker():
     global _synchronized_worker_started, stop_synchronized_event, auto_send_running
+    global synchronized_worker_thread, synchronized_worker_status
     if not _synchronized_worker_started:
         stop_synchronized_event.clear()
-        threading.Thread(target=synchronized_signal_worker, daemon=True).start()
+        synchronized_worker_status = "running"
+        if use_async_core():
+            synchronized_worker_thread = None
+            async_core().start("steps")
+        else:
+            synchronized_worker_thread = threading.Thread(
+                target=profiling.wrap("sync_worker", synchronized_signal_worker), daemon=True
+            )
+            synchronized_worker_thread.start()
         _synchronized_worker_started = True
         auto_send_running = True
         print("✅ backend: synchronized worker started")
@@ -974,32 +1599,59 @@ def stop_synchronized_worker():
     """
     Stop only the synchronized signal worker thread safely.
     """
-    global _synchronized_worker_started, stop_synchronized_event, auto_send_running
     if _synchronized_worker_started:
         print("🛑 Stopping synchronized worker...")
         stop_synchronized_event.set()   # signal the worker to stop
-        _synchronized_worker_started = False
-        auto_send_running = False
-        gui.send.config(state=gui.tk.NORMAL)
+        if async_core_running():
+            async_core().cancel("steps")   # the task's finally marks it finished
+        mark_synchronized_worker_finished()
     else:
         print("ℹ️ No synchronized worker active.")
 
 
+def mark_synchronized_worker_finished():
+    global _synchronized_worker_started, auto_send_running
+    _synchronized_worker_started = False
+    auto_send_running = False
+    # GUI re-enables its Send button when it sees this (headless runs ignore it)
+    ui_queue.put({"worker_status": "stopped"})
+
+
+def async_core_running():
+    """True once the asyncio core has been loaded and its loop is alive."""
+    core_module = sys.modules.get("async_core")
+    return core_module is not None and core_module.core.thread is not None \
+        and core_module.core.thread.is_alive()
+
+
+def wait_synchronized_worker(timeout=None):
+    """Block until the synchronized worker (thread or async task) has finished."""
+    if async_core_running() and "steps" in async_core().tasks:
+        return async_core().wait("steps", timeout)
+    thread = synchronized_worker_thread
+    if thread is not None and thread is not threading.current_thread():
+        thread.join(timeout)
+        return not thread.is_alive()
+    return True
+
+
 
 
 # -----------------------------
 # ADB Poll Worker
 # -----------------------------
-def build_canid_to_signalname_from_excel():
+def build_canid_to_signalname_from_excel(file_path=None):
     """
     Reads CAN ID → signal names mapping from the vector Excel sheet (first page).
+    file_path defaults to config.file_path.
     Expected format:
         Row 1: Property ID | 0x21608350 | 0x21608351 | ...
         Row 2: Time (ms)   | MCU_DC_Curr | MCU_Temp  | ...
     """
+    wb = None
     try:
         with excel_lock:
-            wb = openpyxl.load_workbook(config.file_path, data_only=True)
+            wb = openpyxl.load_workbook(file_path or config.file_path, data_only=True)
         #wb = openpyxl.load_workbook(config.file_path)
         sheet = wb.worksheets[0]  # First sheet
 
@@ -1029,7 +1681,8 @@ def build_canid_to_signalname_from_excel():
         print(f"⚠️ Error reading Excel for CAN ID mapping: {e}")
         return {}
     finally:
-        wb.close()
+        if wb is not None:
+            wb.close()
 # ---------------------------------------------------------
 # Cache CAN-ID → list of signals (runs only once)
 # ---------------------------------------------------------
@@ -1047,98 +1700,120 @@ def cached_property_list():
 
 
 # ---------------------------------------------------------
-# COMPILED REGEX cache (one per field type)
+# FAST, OPTIMIZED validate_vhal_layer
 # ---------------------------------------------------------
-REGEX_CACHE = {}
-
+def vhal_dump_parser(property_list, prop_types=None):
+    """Streaming dump parser for property_list (+ the drive-mode property)."""
+    if prop_types is None:
+        prop_types = config.Vehicle_propID_type
+    wanted = {}
+    for prop_id in property_list:
+        key = vhal_stream.prop_key(prop_id)
+        wanted[key] = vhal_stream.field_for(prop_types.get(key, "FLOAT"))
+    # Drive mode rides along in the same dump (int32 property)
+    wanted.setdefault(drive_mode_monitor.prop_key, "int32Values")
+    return vhal_stream.DumpParser(wanted)
 
-def fast_get_regex(prop_key, field_name):
-    """
-    Return compiled regex for faster repeated matching.
-    Stored in REGEX_CACHE to avoid re-compilation.
-    """
-    key = (prop_key, field_name)
-    if key not in REGEX_CACHE:
-        pattern = rf"Property:\s*0x{prop_key}[\s\S]*?{field_name}:\s*\[([^\]]*)\]"
-        REGEX_CACHE[key] = re.compile(pattern, re.IGNORECASE)
-    return REGEX_CACHE[key]
 
+def read_vhal_dump(parser, serial=None):
+    """Stream `dumpsys car_service get-property-value` of the head unit into parser."""
+    if vhal_dump_provider is not None:
+        parser.feed_text(vhal_dump_provider(serial))
+        return parser
+    return vhal_stream.stream_adb_dump(parser, serial)
 
-# ---------------------------------------------------------
-# FAST, OPTIMIZED validate_vhal_layer
-# ---------------------------------------------------------
-def validate_vhal_layer():
-    property_list = cached_property_list()
-    canid_to_signalname = cached_canid_to_signalname()
 
-    carservice = {}
+def validate_vhal_layer(property_list=None, canid_to_signalname=None, serial=None, publish=True,
+                        prop_types=None):
+    """
+    Read all VHAL properties in one adb dump and map them to signal names.
+    Defaults use the loaded vector sheet; sessions pass their own maps,
+    property types and the adb serial of their head unit.
+    publish=False skips the GUI queue.
+    """
+    if property_list is None:
+        property_list = cached_property_list()
+    if canid_to_signalname is None:
+        canid_to_signalname = cached_canid_to_signalname()
 
     #print("📡 Fetching all VHAL properties in ONE adb call…")
 
     # -----------------------------------------------------
-    # 1️⃣  Run single ADB dump
+    # 1️⃣  Stream the ADB dump (parsed while it is read)
     # -----------------------------------------------------
+    parser = vhal_dump_parser(property_list, prop_types)
     try:
-        cmd = "adb shell dumpsys car_service get-property-value"
-        result = subprocess.run(
-            cmd, shell=True, capture_output=True, text=True, timeout=10
-        )
-        full_output = result.stdout
+        with adb_poll_seconds.time():
+            read_vhal_dump(parser, serial)
 
     except subprocess.TimeoutExpired:
-        print("❌ ADB timeout")
-        return fill_device_not_found(property_list, canid_to_signalname)
+        log.every("adb_timeout", 5, "❌ ADB timeout", lvl=log.ERROR)
+        return fill_device_not_found(property_list, canid_to_signalname, publish)
 
     except Exception as e:
-        print(f"❌ ADB failure: {e}")
-        return fill_device_not_found(property_list, canid_to_signalname)
+        log.every("adb_failure", 5, f"❌ ADB failure: {e}", lvl=log.ERROR)
+        return fill_device_not_found(property_list, canid_to_signalname, publish)
 
-    if not full_output.strip():
-        print("⚠️ Empty ADB response")
-        return fill_device_not_found(property_list, canid_to_signalname)
+    return process_vhal_parser(parser, property_list, canid_to_signalname, publish)
 
-    # -----------------------------------------------------
-    # 2️⃣  Parse all properties in memory FAST
-    # -----------------------------------------------------
-    for prop_id in property_list:
 
-        # Pre-optimized string conversion
-        raw = str(prop_id).lower().replace("0x", "")
-        prop_key = raw.replace("’", "").replace("‘", "")  # safe
+def process_vhal_parser(parser, property_list, canid_to_signalname, publish=True):
+    """Steps 2 + 3 of validate_vhal_layer() for an already streamed dump (also used by async_core)."""
+    if not parser.has_data:
+        log.every("adb_empty", 5, "⚠️ Empty ADB response")
+        return fill_device_not_found(property_list, canid_to_signalname, publish)
 
-        prop_type = config.Vehicle_propID_type.get(prop_key, "FLOAT")
-        field_name = {
-            "INT32": "int32Values",
-            "INT64": "int64Values",
-            "BYTES": "bytes",
-            "STRING": "string",
-        }.get(prop_type, "floatValues")
+    carservice, vhal_props = map_vhal_values(parser, property_list, canid_to_signalname)
 
-        # Precompiled regex lookup
-        regex = fast_get_regex(prop_key, field_name)
-        match = regex.search(full_output)
+    # -----------------------------------------------------
+    # 3️⃣  Push values to UI queue + shared property index
+    # -----------------------------------------------------
+    if publish:
+        ui_queue.put(carservice)
+        publish_vhal_properties(vhal_props)
+    #print("📡 Parsed VHAL:", carservice)
 
-        value = match.group(1).strip() if match else "Not found"
+    return carservice
 
-        # Map CAN-ID → signals
-        signal_names = canid_to_signalname.get(raw, [])
 
-        for sig in signal_names:
+def map_vhal_values(parser, property_list, canid_to_signalname):
+    """
+    2️⃣  Map the parsed properties to signals.
+    Returns (carservice, vhal_props):
+      carservice = { signal_name: value text or "Not found" }
+      vhal_props = { prop_key: raw value }  → shared property index
+    """
+    values = parser.values
+    carservice = {}
+    for prop_id in property_list:
+        raw = str(prop_id).lower().replace("0x", "")
+        value = values.get(vhal_stream.prop_key(prop_id), "Not found")
+        # Map CAN-ID → signals
+        for sig in canid_to_signalname.get(raw, []):
             carservice[sig] = value
+    dumpsys_parse_seconds.observe(parser.parse_seconds)
+    return carservice, dict(values)
 
-    # -----------------------------------------------------
-    # 3️⃣  Push values to UI queue
-    # -----------------------------------------------------
-    ui_queue.put(carservice)
-    #print("📡 Parsed VHAL:", carservice)
 
-    return carservice
+def parse_vhal_dump(full_output, property_list, canid_to_signalname, prop_types=None):
+    """Parse a complete dump text (same result as validate_vhal_layer() on it)."""
+    parser = vhal_dump_parser(property_list, prop_types)
+    parser.feed_text(full_output)
+    return map_vhal_values(parser, property_list, canid_to_signalname)
+
+
+def publish_vhal_properties(vhal_props):
+    """Replace the shared VHAL property index and feed the drive-mode cache."""
+    global shared_vhal_props
+    with shared_rx_lock:
+        shared_vhal_props = vhal_props
+    drive_mode_monitor.update_from_props(vhal_props)
 
 
 # ---------------------------------------------------------
 # Helper for device-not-found fast return
 # ---------------------------------------------------------
-def fill_device_not_found(property_list, canid_to_signalname):
+def fill_device_not_found(property_list, canid_to_signalname, publish=True):
     result = {}
 
     for prop_id in property_list:
@@ -1147,7 +1822,8 @@ def fill_device_not_found(property_list, canid_to_signalname):
         for sig in signals:
             result[sig] = "Device not found"
 
-    ui_queue.put(result)
+    if publish:
+        ui_queue.put(result)
     return result
 
 # -----------------------------
@@ -1159,10 +1835,10 @@ def get_frame_from_signal(signal_name):
         if not config.dbc_file_path or not os.path.exists(config.dbc_file_path):
             print("❌ DBC file not loaded in config")
             return None
-        db = cantools.database.load_file(config.dbc_file_path)
-    for frame in get_list_of_frames():
-        if signal_name in get_list_of_signals(frame):
-            return frame
+        db = load_dbc(config.dbc_file_path)
+    for msg in db.messages:
+        if any(sig.name == signal_name for sig in msg.signals):
+            return msg.name
     return None
 
 
@@ -1236,107 +1912,170 @@ def get_adb_devices():
         print("ADB not found — make sure it's installed and in PATH.")
         return []
 
-def monitor_adb_device():
+def on_adb_devices_changed(devices):
+    """adb_tracker listener: runs the moment a device connects or disconnects."""
     global adb_device_connected
-    while True:
-        devices = get_adb_devices()
-        adb_device_connected = len(devices) > 0
-        time.sleep(1)    # check every 1 sec ONLY
+    adb_device_connected = len(devices) > 0
+    if adb_device_connected:
+        ui_queue.put({"adb_status": "connected"})
+        print(f"📱 ADB device connected: {', '.join(devices)}")
+    else:
+        drive_mode_monitor.mark_unknown()
+        ui_queue.put({"adb_status": "disconnected"})
+        print("❌ ADB device disconnected")
+
+
+adb_device_tracker = adb_tracker.AdbDeviceTracker()
+adb_device_tracker.add_listener(on_adb_devices_changed)
+
+def on_drive_mode_changed(old_mode, new_mode):
+    """drive_mode_monitor listener: log + tell the GUI once per change."""
+    name = drive_mode.MODES.get(new_mode, "Unknown")
+    print(f"Device in {name} mode")
+    ui_queue.put({"drive_mode": name})
+
+
+drive_mode_monitor = drive_mode.DriveModeMonitor(config.Drive_mode_prop_ID)
+drive_mode_monitor.add_listener(on_drive_mode_changed)
+_drive_mode_refresh_lock = threading.Lock()
+DRIVE_MODE_MAX_AGE = 2.0   # seconds before a fault triggers a background re-read
+
+
+def refresh_drive_mode_async():
+    """
+    One background VHAL read for the drive mode (no-op if one is in flight).
+    Used when the RX poller isn't running yet; never blocks the caller.
+    """
+    if not _drive_mode_refresh_lock.acquire(blocking=False):
+        return
+
+    def _refresh():
+        try:
+            # only the drive-mode property: adb stops as soon as it is found,
+            # and nothing reaches the RX columns / shared property index
+            parser = vhal_stream.DumpParser({drive_mode_monitor.prop_key: "int32Values"})
+            read_vhal_dump(parser)
+            drive_mode_monitor.update_from_props(parser.values)
+        except Exception as e:
+            print(f"⚠️ Drive mode refresh failed: {e}")
+        finally:
+            _drive_mode_refresh_lock.release()
+
+    threading.Thread(target=_refresh, daemon=True).start()
 
-threading.Thread(target=monitor_adb_device, daemon=True).start()
 
 def check_device_mode():
-    try:
-        if not adb_device_connected:
-            return {}
-        # Read raw output from ADB
-        cmd = "adb shell dumpsys car_service get-property-value"
-        output = subprocess.check_output(cmd, shell=True, text=True)
-        # Normalize property ID to hex without "0x"
-        prop_id = config.Drive_mode_prop_ID.lower().replace("0x", "").strip()
-        # Find the block that contains the property
-        pattern = rf"Property:\s*0x{prop_id}[\s\S]*?int32Values:\s*\[([^\]]*)\]"
-        match = re.search(pattern, output, re.IGNORECASE)
-        # Extract mode value
-        mode = int(match.group(1).strip()) if match else -1
-        # Mode mapping
-        modes = {
-            0: "VL1_SNA",
-            1: "Sleep",
-            2: "Awake",
-            3: "Standby",
-            4: "Drive",
-            5: "Charge"
-        }
-        print(f"Device in {modes.get(mode, 'Unknown')} mode")
-        return 1 if mode == 4 else 0
-    except subprocess.CalledProcessError:
-        print("Error: Failed to run adb command")
-        return 0
-    except Exception as e:
-        print(f"Error: {e}")
+    """
+    Return 1 if the head unit is in Drive mode, else 0.
+    Answers from drive_mode_monitor's cache; if the cached mode is stale a
+    background refresh is started, so the heartbeat loop never waits on adb.
+    """
+    if not adb_device_connected:
+        drive_mode_monitor.mark_unknown()
         return 0
+    drive_mode_monitor.set_prop_id(config.Drive_mode_prop_ID)
+    updated_at = drive_mode_monitor.updated_at
+    if updated_at is None or time.time() - updated_at > DRIVE_MODE_MAX_AGE:
+        refresh_drive_mode_async()
+    return 1 if drive_mode_monitor.is_drive else 0
+
+
+def send_dbs():
+    """DBCs used to encode sender frames: heartbeat DBC first, then the loaded vector DBC."""
+    dbs = [load_dbc(config.Heart_beat_dbc)]
+    if config.dbc_file_path and os.path.exists(config.dbc_file_path):
+        dbs.append(load_dbc(config.dbc_file_path))
+    return dbs
+
+
+def rebuild_frame_table(heartbeat_signals=None, user_frames=None):
+    """
+    Encode heartbeat + user frames once and publish them as the next
+    tx_frames generation. Defaults: config.heart_beat_signals / user_send_signals_runtime.
+    """
+    if heartbeat_signals is None:
+        heartbeat_signals = config.heart_beat_signals
+    if user_frames is None:
+        user_frames = user_send_signals_runtime
+    entries, errors = frame_table.build_entries(list(heartbeat_signals) + list(user_frames), send_dbs())
+    return publish_frame_entries(entries, errors)
+
+
+def publish_frame_entries(entries, errors=()):
+    for frame_name, error in errors:
+        frame_send_errors_total.inc()
+        log.every(("encode", frame_name), 5, f"Encode error for frame {frame_name}: {error}")
+    return tx_frames.publish(entries)
+
+
+def publish_send_signals(heartbeat_signals, user_frames, entries=None):
+    """
+    Writers (synchronized worker, GUI Send) hand over a *new* heartbeat list and
+    user frame list; they must not mutate lists that were published before.
+    entries: the already encoded (entries, errors) of these frames (bulk_encode.PrecompiledSteps).
+    """
+    global user_send_signals_runtime
+    runtime_config.update_config_file_runtime("heart_beat_signals", heartbeat_signals)
+    user_send_signals_runtime = user_frames
+    if entries is None:
+        return rebuild_frame_table(heartbeat_signals, user_frames)
+    return publish_frame_entries(*entries)
+
 
+tx_listeners = []   # callables given every sent can.Message (can_trace.TraceRecorder)
 
-def send_heartbeat_frame(db, local_bus,frame_id_int,frame_name,signal_dict):
+
+def send_frame_entry(local_bus, entry, lock=None):
+    """Send one pre-encoded frame_table.FrameEntry; False when the bus refused it."""
     try:
-        message = db.get_message_by_frame_id(frame_id_int)
-        message_data = db.encode_message(frame_name, signal_dict)
-        frame = can.Message(arbitration_id=frame_id_int, data=message_data, is_extended_id=message.is_extended_frame)
-        with send_lock:
+        frame = can.Message(arbitration_id=entry.frame_id, data=entry.data, is_extended_id=entry.is_extended)
+        with lock or send_lock:
             local_bus.send(frame)
-    except cantools.database.errors.EncodeError as e:
-        print(f"Encode error for frame {frame_name}: {e}")
+        frames_sent_total.inc()
+        for listener in tx_listeners:
+            listener(frame)
+        return True
     except can.CanError as e:
-        print(f"CAN send error for frame {frame_name}: {e}")
+        frame_send_errors_total.inc()
+        log.every(("send", entry.frame_name), 5, f"CAN send error for frame {entry.frame_name}: {e}")
+        return False
 
 
 def Send_Heart_beat_signal_continously_in_backgorund():
         try:
-            db = cantools.db.load_file(config.Heart_beat_dbc)
+            rebuild_frame_table()
             local_bus = get_bus()
             heartbeat_period = 0.08
             next_time = time.perf_counter()
             if local_bus is None:
                 print("❌ Heartbeat: CAN bus not available on start")
                 return
-            config_path = config.__file__
-            last_modified = os.path.getmtime(config_path)
+            dispatcher = tx_dispatch.TxDispatcher(lambda entry: send_frame_entry(local_bus, entry),
+                                                  heartbeat_period)
+            previous_start = None
 
             while not stop_heartbeat.is_set():
                 start = time.perf_counter()
-                # ✅ Reload config only if the file has been updated
-                current_mtime = os.path.getmtime(config_path)
-                if current_mtime != last_modified:
-                    importlib.reload(config)
-                    last_modified = current_mtime
-                    #print("♻️ Config file reloaded due to update")
+                if previous_start is not None:
+                    heartbeat_jitter_seconds.observe(abs(start - previous_start - heartbeat_period))
+                previous_start = start
+                # runtime_config updates the config module in place → no reload needed
 
                 if check_whether_can_interface_is_up() and adb_device_connected:
 
-                    # ✅ Merge heartbeat + user signals dynamically
-                    all_signals = list(config.heart_beat_signals)
-                    if "user_send_signals_runtime" in globals():
-                        all_signals.extend(user_send_signals_runtime)
-
-                    for sig in all_signals:
-                        try:
-                            frame_id = sig["can_id"]
-                            frame_id_int = int(frame_id, 16) if isinstance(frame_id, str) else int(frame_id)
-                            send_heartbeat_frame(
-                                db, local_bus, frame_id_int, sig["frame_name"], sig["signals"]
-                            )
-                            time.sleep(0.001)
-                        except Exception as e:
-                            print(f"⚠️ Failed to send frame {sig.get('frame_name', '?')}: {e}")
+                    # ✅ One consistent generation of heartbeat + user frames (no lock),
+                    # highest CAN priority first, paced by the dispatcher
+                    for pause in dispatcher.cycle(tx_frames.current):
+                        time.sleep(pause)
 
                 else:
                     if not check_whether_can_interface_is_up():
-                        print("❌ PEAK interface is down")
+                        log.every("hb_peak_down", 5, "❌ PEAK interface is down")
                     if not adb_device_connected:
-                        print("❌ No ADB device detected")
+                        log.every("hb_no_adb", 5, "❌ No ADB device detected")
                     if not check_device_mode():
-                        print("❌ Device not in drive mode")
+                        log.every("hb_not_drive", 5, "❌ Device not in drive mode")
+                heartbeat_loop_seconds.observe(time.perf_counter() - start)
                 next_time += heartbeat_period
                 sleep_time = next_time - time.perf_counter()
                 if sleep_time > 0:
@@ -1358,14 +2097,20 @@ def cleanup_on_exit():
     """Stop all background threads and close CAN interface safely."""
     print("🧹 Cleaning up... stopping heartbeat and closing CAN interface")
     try:
-        gui.update_config_file_runtime("user_send_signals", [])
-        gui.update_config_file_runtime("Vehicle_propID_type", {})
-        gui.update_config_file_runtime("heart_beat_signals", list(original_heartbeat_backup))
-        importlib.reload(config)
+        runtime_config.update_many({
+            "user_send_signals": [],
+            "Vehicle_propID_type": {},
+            "heart_beat_signals": list(original_heartbeat_backup),
+        })
+        runtime_config.flush()
     except Exception as e:
         print(f"⚠️ Failed to clear user_send_signals: {e}")
     try:
         stop_heartbeat.set()   # stop background loop if it checks this
+        if async_core_running():
+            async_core().cancel("heartbeat", 1.0)
+        if signal_thread is not None and signal_thread is not threading.current_thread():
+            signal_thread.join(1.0)   # no sends on a bus that is being shut down
         if 'bus' in globals() and bus is not None:
             try:
                 bus.shutdown()
@@ -1376,7 +2121,7 @@ def cleanup_on_exit():
         print("⚠️ Cleanup failed:", e)
 
     # Optionally bring the interface down in Linux
-    if config.Testing_device == "Linux":
+    if testing_device() == "Linux":
         password = config.Password
         os.system(f'echo {password} | sudo -S ip link set {config.Peak_interface_name} down')
         print(f"📴 Interface {config.Peak_interface_name} set down")
@@ -1426,48 +2171,35 @@ def cleanup_on_exit():
 
     # ======================================================
 
-# Register it for any exit condition
-atexit.register(cleanup_on_exit)
-
 def signal_handler(sig, frame):
     print("\n🛑 Keyboard interrupt detected — stopping heartbeat...")
     cleanup_on_exit()
     sys.exit(0)   # safer than os._exit()
 
-# Always works
-signal.signal(signal.SIGINT, signal_handler)
-
-# Only register SIGTERM if available (Linux/Unix)
-if hasattr(signal, "SIGTERM"):
-    signal.signal(signal.SIGTERM, signal_handler)
-
-
-signal_thread = threading.Thread(target=Send_Heart_beat_signal_continously_in_backgorund, daemon=True)
-signal_thread.start()
-
 
 def monitor_peak_device():
     """
-    Continuously checks if PEAK device is connected or removed every 1 sec.
+    Reacts to link changes from link_watcher (re-checks at least every 1 sec).
     If interface is down, it automatically tries to bring it UP again.
     Sends status to GUI via ui_queue.
     """
     last_status = None
 
     while True:
+        link_watcher.changed.clear()
         try:
             status = check_whether_can_interface_is_up()  # 1 or 0
 
             if status == 0:
                 # Interface DOWN → Try to auto-recover
                 try:
-                    print("🔧 PEAK interface down — trying to bring it UP...")
-                    if config.Testing_device == "Linux":
+                    log.every("peak_bring_up", 5, "🔧 PEAK interface down — trying to bring it UP...", lvl=log.INFO)
+                    if testing_device() == "Linux":
                         make_can_interface_up()
                     time.sleep(0.5)  # Give system time
 
                     # Re-check after repair attempt
-                    status = check_whether_can_interface_is_up()
+                    status = link_watcher.refresh()
                 except Exception as e:
                     print("⚠️ Error while trying to bring interface up:", e)
 
@@ -1483,39 +2215,32 @@ def monitor_peak_device():
                 last_status = status
 
         except Exception as e:
-            print(f"⚠️ PEAK monitor error: {e}")
+            log.every("peak_monitor_error", 5, f"⚠️ PEAK monitor error: {e}")
 
-        time.sleep(1)  # check every second
+        link_watcher.changed.wait(1)  # wake on link change, or every second
 
 
-threading.Thread(target=monitor_peak_device, daemon=True).start()
 
 
+# RX poll pace: measured dump cost + signal activity + TX steps (rx_poll.py)
+rx_poller = rx_poll.PollController().register_metrics()
 
 
 def adb_background_worker():
     global shared_rx_latest, _adb_worker_started
 
     while not adb_worker_stop.is_set():
+        start = time.perf_counter()
         try:
             adb_rx = validate_vhal_layer()
             with shared_rx_lock:
                 shared_rx_latest = dict(adb_rx)
+            rx_poller.observe(time.perf_counter() - start, adb_rx)
         except Exception as e:
-            print("⚠️ ADB worker error:", e)
-
-        #for _ in range(30):
-        #    if adb_worker_stop.is_set():
-        #        break
-        #    time.sleep(0.01)
-        signal_count = len(cached_signal_dict())
-
-        if signal_count > 300:
-            time.sleep(0.3)  # slower
-        elif signal_count > 150:
-            time.sleep(0.15)
-        else:
-            time.sleep(0.01)
+            log.every("adb_worker_error", 5, f"⚠️ ADB worker error: {e}")
+        rx_poll_loop_seconds.observe(time.perf_counter() - start)
+
+        rx_poller.wait()
 
     # Worker finished — mark state
     with adb_worker_lock:
@@ -1539,12 +2264,17 @@ def start_adb_worker():
     """
     global adb_worker_thread, _adb_worker_started
     with adb_worker_lock:
+        if use_async_core():
+            started = async_core().start("rx_poll")
+            if started:
+                print("✅ backend: ADB worker started (async)")
+            return started
         if _adb_worker_started:
             return False   # already running
 
         adb_worker_stop.clear()
         adb_worker_thread = threading.Thread(
-            target=adb_background_worker,
+            target=profiling.wrap("adb_worker", adb_background_worker),
             daemon=True
         )
         adb_worker_thread.start()
@@ -1553,30 +2283,119 @@ def start_adb_worker():
         return True
 
 
-def stop_adb_worker():
+def stop_adb_worker(timeout=None):
     """
     Stop ADB worker safely.
+    With a timeout, also wait for the worker to exit.
     """
     global adb_worker_thread, _adb_worker_started
     with adb_worker_lock:
+        if async_core_running() and async_core().is_running("rx_poll"):
+            async_core().cancel("rx_poll", timeout)
+            print("🛑 backend: ADB worker stopped (async)")
+            return True
         if not _adb_worker_started:
             return False
 
         adb_worker_stop.set()
+        rx_poller.wake()
+        thread = adb_worker_thread
         adb_worker_thread = None
         _adb_worker_started = False
         print("🛑 backend: ADB worker stop requested")
-        return True
+    if timeout is not None and thread is not None and thread is not threading.current_thread():
+        thread.join(timeout)
+    return True
 
 
 def is_adb_worker_running():
+    if async_core_running() and async_core().is_running("rx_poll"):
+        return True
     return _adb_worker_started
 
 
+# ======================================================
+# BACKEND LIFECYCLE
+# ======================================================
+class Backend:
+    """
+    Explicit start-up for everything that touches hardware.
+    Importing backend starts nothing; the GUI (or any other front end) calls
+      lifecycle.start()            → exit handlers + ADB tracker / PEAK monitors
+      lifecycle.start_heartbeat()  → heartbeat sender, once a DBC is loaded
+    Both calls are idempotent.
+    """
 
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = False
+        self.peak_monitor_thread = None
+
+    def start(self):
+        with self._lock:
+            if self.started:
+                return False
+
+            # Register cleanup for any exit condition
+            atexit.register(cleanup_on_exit)
+
+            # signal handlers can only be installed from the main thread
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGINT, signal_handler)
+                # Only register SIGTERM if available (Linux/Unix)
+                if hasattr(signal, "SIGTERM"):
+                    signal.signal(signal.SIGTERM, signal_handler)
+
+            link_watcher.start()
+            metrics.start_exporter(getattr(config, "Metrics_file", ""))
+            # simulation: the fake car_service is "the device", no adb server involved
+            if not simulation_enabled:
+                adb_device_tracker.start()
+            if use_async_core():
+                async_core().start("peak_monitor")
+            else:
+                self.peak_monitor_thread = threading.Thread(target=monitor_peak_device, daemon=True)
+                self.peak_monitor_thread.start()
+
+            self.started = True
+            print("✅ backend: device monitors started")
+            return True
+
+    def start_heartbeat(self):
+        """Start (or restart after it gave up) the heartbeat sender thread."""
+        global signal_thread
+        self.start()
+        with self._lock:
+            if self.is_heartbeat_running():
+                return False
+            stop_heartbeat.clear()
+            if use_async_core():
+                async_core().start("heartbeat")
+                print("✅ backend: heartbeat sender started (async)")
+                return True
+            signal_thread = threading.Thread(
+                target=profiling.wrap("heartbeat", Send_Heart_beat_signal_continously_in_backgorund),
+                daemon=True
+            )
+            signal_thread.start()
+            print("✅ backend: heartbeat sender started")
+            return True
+
+    def is_heartbeat_running(self):
+        if async_core_running() and async_core().is_running("heartbeat"):
+            return True
+        return signal_thread is not None and signal_thread.is_alive()
+
+    def stop_workers(self, timeout=2.0):
+        """Stop heartbeat, RX poll and synchronized worker threads and wait for them."""
+        stop_synchronized_event.set()
+        stop_adb_worker()
+        stop_heartbeat.set()
+        if async_core_running():
+            async_core().stop(timeout)
+        for thread in (synchronized_worker_thread, signal_thread):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout)
 
 
-
-
-
-
+lifecycle = Backend()
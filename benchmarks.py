@@ -0,0 +1,334 @@
+"""
+Benchmarks for the TX and RX hot paths.
+
+    python benchmarks.py                          # 50 / 500 / 5000 signals
+    python benchmarks.py --sizes 50 500 --repeat 3
+    python benchmarks.py --save baseline          # → benchmark_results/baseline.json
+    python benchmarks.py --compare baseline       # exit 1 if a case got slower
+
+Everything runs on synthetic inputs generated in a temp directory:
+a DBC with 8 x 8-bit signals per frame, a matching types.h, the vector
+sheet built by create_excel_sheet() and a canned dumpsys output.
+No CAN hardware, head unit or adb is needed.
+
+The runtime config is pointed at the synthetic files through a scratch
+state file, so runtime_state.json is left untouched.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import config
+import backend
+import bulk_encode
+import can_rx
+import dbc_subset
+import runtime_config
+import rx_verdict
+import vector_sheet
+from backend import cantools
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results")
+DEFAULT_SIZES = [50, 500, 5000]
+SIGNALS_PER_FRAME = 8
+PROP_ID_BASE = 0x21600000
+FRAME_ID_BASE = 0x100
+
+
+# -----------------------------
+# Synthetic inputs
+# -----------------------------
+def frame_name(i):
+    return f"Bench_Frame_{i:04d}"
+
+
+def signal_name(n):
+    return f"Bench_Sig_{n:05d}"
+
+
+def make_dbc(path, n_signals):
+    """DBC with n_signals 8-bit signals packed SIGNALS_PER_FRAME per 8-byte frame."""
+    Message = cantools.database.can.Message
+    Signal = cantools.database.can.Signal
+    messages = []
+    n = 0
+    i = 0
+    while n < n_signals:
+        signals = []
+        for bit in range(0, 64, 8):
+            if n >= n_signals:
+                break
+            signals.append(Signal(signal_name(n), start=bit, length=8))
+            n += 1
+        messages.append(Message(FRAME_ID_BASE + i, frame_name(i), 8, signals))
+        i += 1
+    db = cantools.database.can.Database(messages=messages)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(db.as_dbc_string())
+    return db
+
+
+def make_type_h(path, db):
+    """One `Frame__Signal_RX_V = id` line per signal, ids in DBC order."""
+    prop_ids = []
+    with open(path, "w", encoding="utf-8") as f:
+        for msg in db.messages:
+            for sig in msg.signals:
+                prop_id = PROP_ID_BASE + len(prop_ids)
+                prop_ids.append(format(prop_id, "x"))
+                f.write(f"    {msg.name}__{sig.name}_RX_V = {prop_id},  "
+                        f"/* VehiclePropertyType:FLOAT */\n")
+    return prop_ids
+
+
+def make_dump(prop_ids):
+    """Canned `dumpsys car_service get-property-value` text, one float property each."""
+    lines = []
+    for idx, prop_key in enumerate(prop_ids):
+        lines.append(f"Property: 0x{prop_key}, areaId: 0, status: 0, timestamp: {idx}")
+        lines.append(f"  int32Values: [], int64Values: [], floatValues: [{idx % 256}.0], "
+                     f"bytes: [], string: []")
+    return "\n".join(lines) + "\n"
+
+
+def make_step_values(db):
+    """{ frame_name: {signal: value} } for one time step (what the worker encodes)."""
+    return {msg.name: {sig.name: (idx % 256) for idx, sig in enumerate(msg.signals)}
+            for msg in db.messages}
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+def bench(results, name, size, func, repeat, setup=None, items=None):
+    """Run func() `repeat` times; store min/median seconds (and items/s if given)."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    key = f"{name}[{size}]"
+    entry = {"min": min(timings), "median": statistics.median(timings), "repeat": repeat}
+    if items:
+        entry["items_per_s"] = items / entry["median"] if entry["median"] else None
+    results[key] = entry
+
+    rate = f"  ({entry['items_per_s']:,.0f}/s)" if items and entry["items_per_s"] else ""
+    print(f"⏱️ {key:<40} min {entry['min'] * 1000:9.2f} ms   median {entry['median'] * 1000:9.2f} ms{rate}")
+    return entry
+
+
+def run_size(results, workdir, n_signals, repeat):
+    dbc_path = os.path.join(workdir, f"bench_{n_signals}.dbc")
+    type_h_path = os.path.join(workdir, f"bench_{n_signals}_types.h")
+    xlsx_path = os.path.join(workdir, f"bench_{n_signals}.xlsx")
+
+    db = make_dbc(dbc_path, n_signals)
+    prop_ids = make_type_h(type_h_path, db)
+    dump = make_dump(prop_ids)
+    n_frames = len(db.messages)
+
+    runtime_config.update_many({
+        "dbc_file_path": dbc_path,
+        "type_h_file": type_h_path,
+        "file_path": xlsx_path,
+    })
+
+    print(f"\n📦 {n_signals} signals / {n_frames} frames")
+
+    # ---- create_excel_sheet ----
+    bench(results, "create_excel_sheet", n_signals,
+          lambda: vector_sheet.create_excel_sheet(type_h_path, dbc_path, xlsx_path),
+          repeat)
+
+    # ---- DBC loading, the load_vector_sheet() pattern ----
+    def frames_and_signals():
+        for frame in backend.get_list_of_frames():
+            backend.get_list_of_signals(frame)
+
+    bench(results, "dbc_frames_signals_cold", n_signals, frames_and_signals, repeat,
+          setup=backend.dbc_cache.clear)
+    bench(results, "dbc_frames_signals_warm", n_signals, frames_and_signals, repeat)
+
+    # ---- subset DBC of every 10th message, from the cached byte-offset index ----
+    subset_names = [msg.name for msg in db.messages[::10]]
+    subset_path = os.path.join(workdir, f"bench_{n_signals}_subset.dbc")
+    bench(results, "dbc_subset", n_signals,
+          lambda: dbc_subset.save_subset(dbc_path, subset_names, subset_path), repeat)
+
+    # ---- get_frame_from_signal: last signals are the worst case ----
+    lookups = [signal_name(n) for n in range(max(0, n_signals - 100), n_signals)]
+    bench(results, "get_frame_from_signal", n_signals,
+          lambda: [backend.get_frame_from_signal(s) for s in lookups], repeat,
+          items=len(lookups))
+
+    # ---- read_signal_values_from_excel ----
+    bench(results, "read_signal_values_from_excel", n_signals,
+          lambda: backend.read_signal_values_from_excel(xlsx_path), repeat)
+
+    # ---- validate_vhal_layer against the canned dump ----
+    property_list = ["0x" + key for key in prop_ids]
+    canid_to_signalname = {}
+    for key, name in zip(prop_ids, (sig.name for msg in db.messages for sig in msg.signals)):
+        canid_to_signalname.setdefault(key, []).append(name)
+
+    previous_provider = backend.vhal_dump_provider
+    backend.vhal_dump_provider = lambda serial=None: dump
+    try:
+        bench(results, "validate_vhal_layer", n_signals,
+              lambda: backend.validate_vhal_layer(property_list, canid_to_signalname, publish=False),
+              repeat, items=len(property_list))
+    finally:
+        backend.vhal_dump_provider = previous_provider
+
+    # ---- TX vs VHAL verdicts of one step (every signal of the canned dump) ----
+    rx_values = backend.parse_vhal_dump(dump, property_list, canid_to_signalname,
+                                        {key: "FLOAT" for key in prop_ids})[0]
+    signal_values = {sig: {1000: idx % 256} for idx, sig in enumerate(rx_values)}
+    comparator = rx_verdict.Comparator.build(signal_values, [1000], canid_to_signalname,
+                                             {key: "FLOAT" for key in prop_ids}, [db])
+    bench(results, "rx_compare_step", n_signals,
+          lambda: comparator.compare(1000, rx_values), repeat, items=len(rx_values))
+
+    # ---- frame encoding throughput (one full time step) ----
+    step = make_step_values(db)
+    messages = [(db.get_message_by_name(name), values) for name, values in step.items()]
+    bench(results, "frame_encode_step", n_signals,
+          lambda: [msg.encode(values) for msg, values in messages], repeat,
+          items=n_frames)
+
+    # ---- bulk precompile of a 10k-step vector (cantools would be frame_encode_step x 10k) ----
+    if bulk_encode.available():
+        steps = list(range(100, 100 * 10001, 100))
+        signal_dict = {sig: {td: (td // 100 + idx) % 256 for td in steps}
+                       for values in step.values() for idx, sig in enumerate(values)}
+        signal_frame_map = backend.build_signal_frame_map(db)
+        frameid_map = {msg.name: msg.frame_id for msg in db.messages}
+        bench(results, "bulk_precompile_10k_steps", n_signals,
+              lambda: bulk_encode.precompile_steps(signal_dict, steps, signal_frame_map, frameid_map, [], [db]),
+              repeat, items=len(steps) * n_frames)
+
+    # ---- bus RX decode: 4000 frames (1 s of a loaded 500 kbit/s bus) ----
+    encoded = [(msg.frame_id, msg.encode(values)) for msg, values in messages]
+    rx_frames = [
+        backend.can.Message(arbitration_id=frame_id, data=bytes([i % 256]) + data[1:],
+                            timestamp=i * 0.00025, is_extended_id=False)
+        for i, (frame_id, data) in zip(range(4000), itertools.cycle(encoded))
+    ]
+    bench(results, "can_rx_decode", n_signals,
+          lambda: can_rx.RxDecoder([db]).decode_batch(rx_frames), repeat,
+          items=len(rx_frames))
+
+    # ---- update_config_file_runtime + the state-file write it leads to ----
+    prop_types = {key: "FLOAT" for key in prop_ids}
+
+    def update_and_flush():
+        runtime_config.update_config_file_runtime("Vehicle_propID_type", prop_types)
+        runtime_config.flush()
+
+    bench(results, "update_config_file_runtime", n_signals, update_and_flush, repeat)
+
+    # ---- importlib.reload(config): defaults + runtime overrides ----
+    bench(results, "config_reload", n_signals, lambda: importlib.reload(config), repeat)
+
+
+# -----------------------------
+# Result files
+# -----------------------------
+def results_path(name):
+    if name.endswith(".json") or os.sep in name:
+        return name
+    return os.path.join(RESULTS_DIR, f"{name}.json")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return ""
+
+
+def save_results(name, results):
+    path = results_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    print(f"\n💾 Results saved → {path}")
+
+
+def compare_results(name, results, threshold):
+    """Print median ratios against a saved run. Returns the keys that regressed."""
+    with open(results_path(name), "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\n📊 Compared with {results_path(name)} (regression if > {threshold:.2f}x)")
+    for key, entry in results.items():
+        base = baseline.get(key)
+        if not base or not base.get("median"):
+            print(f"   {key:<40} (no baseline)")
+            continue
+        ratio = entry["median"] / base["median"]
+        mark = "❌" if ratio > threshold else "✅"
+        print(f"{mark} {key:<40} {base['median'] * 1000:9.2f} ms → {entry['median'] * 1000:9.2f} ms   x{ratio:.2f}")
+        if ratio > threshold:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Can_AssuRE TX/RX hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="signal counts to generate (default: 50 500 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (default 3)")
+    parser.add_argument("--save", metavar="NAME", help="store results as benchmark_results/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against a saved result file")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="median ratio counted as a regression (default 1.25)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="can_assure_bench_")
+    real_state = runtime_config.STATE_PATH
+    runtime_config.use_state_file(os.path.join(workdir, "runtime_state.json"))
+    try:
+        for size in args.sizes:
+            run_size(results, workdir, size, args.repeat)
+    finally:
+        runtime_config.use_state_file(real_state)
+        importlib.reload(config)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save:
+        save_results(args.save, results)
+    if args.compare:
+        if compare_results(args.compare, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Vectorized encoding of whole test vectors (steps × signals → steps × payload bytes).
+
+    encoder = bulk_encode.FrameEncoder(db.get_message_by_name("Batt_Sts_Info"))
+    payloads, valid = encoder.encode({"Display_SoC": soc_column, "Batt_Curr": curr_column})
+    encoder.verify(payloads, valid, columns)     # bit-exact check against cantools
+
+Each signal's layout (start bit, length, byte order, sign, scale, offset)
+is read from the DBC once. encode() then scales, rounds and range-checks a
+whole column with NumPy and ORs it into one little-endian and one
+big-endian 64-bit word per step; the payload is the union of both words'
+bytes, exactly how cantools packs a frame. Rows cantools would reject
+(value outside the DBC minimum / maximum or the signal's bit width) come
+back with valid = False so the caller can let cantools report them.
+
+precompile_steps() encodes every step of a vector sheet run up front (see
+backend.prepare_synchronized_run); the worker then publishes ready-made
+frame table generations instead of encoding on every step.
+
+NumPy is optional: without it available() is False and nothing is precompiled.
+Multiplexed, container and CAN FD (> 8 byte) frames, and integer signals
+wider than 53 bits, are left to cantools.
+"""
+import time
+
+import frame_table
+import log
+
+try:
+    import numpy as np
+except ImportError:   # optional dependency
+    np = None
+
+VERIFY_ROWS = 16     # rows per frame checked against cantools when precompiling
+
+
+def available():
+    return np is not None
+
+
+def supports(message):
+    # integer signals wider than 53 bits are not exact in float64 columns
+    return (not message.is_container and not message.is_multiplexed()
+            and message.length <= 8 and bool(message.signals)
+            and all(sig.is_float or sig.length <= 53 for sig in message.signals))
+
+
+class SignalLayout:
+    """Packing parameters of one DBC signal."""
+
+    def __init__(self, signal):
+        self.name = signal.name
+        self.length = signal.length
+        self.is_float = bool(signal.is_float)
+        self.is_signed = bool(signal.is_signed)
+        self.big_endian = signal.byte_order == "big_endian"
+        self.scale = signal.conversion.scale
+        self.offset = signal.conversion.offset
+        self.minimum = signal.minimum
+        self.maximum = signal.maximum
+        # raw values listed in the value table skip the min / max check (as in cantools)
+        self.choice_raws = sorted(int(raw) for raw in (signal.conversion.choices or {}))
+
+        if self.big_endian:
+            # DBC start bit = MSB in sawtooth numbering → bit position in a big-endian 64-bit word
+            msb = (7 - signal.start // 8) * 8 + signal.start % 8
+            self.shift = msb - self.length + 1
+        else:
+            self.shift = signal.start
+        self.mask = (1 << self.length) - 1
+        if self.is_signed:
+            self.raw_min, self.raw_max = -(1 << (self.length - 1)), (1 << (self.length - 1)) - 1
+        else:
+            self.raw_min, self.raw_max = 0, self.mask
+
+
+class FrameEncoder:
+    """Bulk encoder for one DBC message."""
+
+    def __init__(self, message):
+        if np is None:
+            raise RuntimeError("bulk encoding needs numpy")
+        if not supports(message):
+            raise ValueError(f"{message.name}: multiplexed / container / CAN FD frames are not supported")
+        self.message = message
+        self.length = message.length
+        self.layouts = [SignalLayout(sig) for sig in message.signals]
+        self.signal_names = [layout.name for layout in self.layouts]
+
+    def encode(self, columns):
+        """
+        columns: { signal: 1-D array of physical values }, one per message signal, equal lengths
+        Returns (payloads uint8 [steps × length], valid bool [steps]).
+        """
+        missing = [name for name in self.signal_names if name not in columns]
+        if missing:
+            raise KeyError(f"{self.message.name}: no values for {', '.join(missing)}")
+        steps = len(columns[self.signal_names[0]])
+        word_le = np.zeros(steps, dtype=np.uint64)
+        word_be = np.zeros(steps, dtype=np.uint64)
+        valid = np.ones(steps, dtype=bool)
+
+        for layout in self.layouts:
+            values = np.asarray(columns[layout.name], dtype=np.float64)
+            raw = (values - layout.offset) / layout.scale
+            valid &= np.isfinite(raw)
+            if not layout.is_float:
+                raw = np.rint(raw)   # round half to even, like Python's round()
+
+            in_choices = np.isin(raw, layout.choice_raws) if layout.choice_raws else False
+            if layout.minimum is not None:
+                valid &= in_choices | (values >= layout.minimum - abs(layout.scale) * 1e-6)
+            if layout.maximum is not None:
+                valid &= in_choices | (values <= layout.maximum + abs(layout.scale) * 1e-6)
+
+            if layout.is_float:
+                if layout.length == 32:
+                    bits = raw.astype(np.float32).view(np.uint32).astype(np.uint64)
+                else:
+                    bits = raw.view(np.uint64)
+            else:
+                valid &= (raw >= layout.raw_min) & (raw <= layout.raw_max)
+                raw = np.where(valid, raw, 0)
+                # two's complement for negative raw values, then keep the signal's bits
+                bits = raw.astype(np.int64).view(np.uint64) & np.uint64(layout.mask)
+
+            shifted = bits << np.uint64(layout.shift)
+            if layout.big_endian:
+                word_be |= shifted
+            else:
+                word_le |= shifted
+
+        payloads = (word_le.astype("<u8").view(np.uint8).reshape(steps, 8)
+                    | word_be.astype(">u8").view(np.uint8).reshape(steps, 8))
+        return payloads[:, :self.length], valid
+
+    def verify(self, payloads, valid, columns, rows=None):
+        """
+        Re-encode `rows` (default: all valid rows) with cantools.
+        Returns the rows whose payload differs (empty list → bit-exact).
+        """
+        if rows is None:
+            rows = np.flatnonzero(valid)
+        mismatches = []
+        for row in rows:
+            if not valid[row]:
+                continue
+            data = {name: columns[name][row].item() if hasattr(columns[name][row], "item")
+                    else columns[name][row] for name in self.signal_names}
+            if bytes(payloads[row]) != self.message.encode(data):
+                mismatches.append(int(row))
+        return mismatches
+
+
+def sample_rows(steps, count=VERIFY_ROWS):
+    """First, last and evenly spread rows: what precompile_steps() checks against cantools."""
+    if steps <= count:
+        return list(range(steps))
+    stride = (steps - 1) / (count - 1)
+    return sorted({round(i * stride) for i in range(count)})
+
+
+def lookup_message(frame_id, dbs):
+    for db in dbs:
+        try:
+            return db.get_message_by_frame_id(frame_id)
+        except KeyError:
+            continue
+    return None
+
+
+# -----------------------------
+# Precompiling a vector sheet run
+# -----------------------------
+class PrecompiledSteps:
+    """
+    Frames of every step of a run, in the order publish_step() builds them
+    (heartbeat frames, then the other vector frames).
+    entries(td) returns what frame_table.build_entries() would for that step.
+    """
+
+    def __init__(self, timedelay, frames, dbs):
+        self.step_index = {}
+        for index, td in enumerate(timedelay):
+            self.step_index.setdefault(td, index)
+        self.frames = frames     # [(frame_name, frame_id, message, {signal: column or constant}, payloads, valid)]
+        self.dbs = dbs
+
+    def entries(self, td):
+        index = self.step_index[td]
+        entries = []
+        errors = []
+        for frame_name, frame_id, message, signals, payloads, valid in self.frames:
+            if payloads is not None and valid[index]:
+                entries.append(frame_table.FrameEntry(
+                    frame_name, frame_id, message.is_extended_frame, bytes(payloads[index])
+                ))
+                continue
+            # not bulk-encoded (or cantools rejects it): let cantools encode / report it
+            row = {"frame_name": frame_name, "can_id": frame_id,
+                   "signals": {sig: step_value(value, index) for sig, value in signals.items()}}
+            row_entries, row_errors = frame_table.build_entries([row], self.dbs)
+            entries.extend(row_entries)
+            errors.extend(row_errors)
+        return entries, errors
+
+
+def step_value(value, index):
+    if np is not None and isinstance(value, np.ndarray):
+        return value[index].item()
+    if isinstance(value, list):
+        return value[index]
+    return value
+
+
+def precompile_steps(signal_dict, timedelay, signal_frame_map, dbc_frameid_map, heartbeat_signals, dbs):
+    """
+    Encode every step of a run at once.
+    Same frames and values as running group_signals_by_frame() +
+    apply_step_to_heartbeat() for each td on `heartbeat_signals`.
+    Returns a PrecompiledSteps, or None when NumPy is not installed.
+    """
+    if np is None or not timedelay:
+        return None
+    start = time.perf_counter()
+
+    # ---- vector columns + which frame each signal updates ----
+    columns = {}
+    frame_order = []              # frames in group_signals_by_frame() order
+    frame_signals = {}            # { frame_name: [signal, ...] }
+    for sig, td_values in signal_dict.items():
+        frame = signal_frame_map.get(sig)
+        if not frame or not td_values:
+            continue
+        try:
+            columns[sig] = np.fromiter(map(td_values.get, timedelay), dtype=np.float64, count=len(timedelay))
+        except (TypeError, ValueError):
+            # a step without its own value (→ last value) or a non-numeric cell
+            fallback = td_values[max(td_values.keys())]
+            column = [td_values.get(td, fallback) for td in timedelay]
+            try:
+                columns[sig] = np.array(column, dtype=np.float64)
+            except (TypeError, ValueError):
+                columns[sig] = column      # not numeric: cantools handles this frame
+        if frame not in frame_signals:
+            frame_signals[frame] = []
+            frame_order.append(frame)
+        frame_signals[frame].append(sig)
+
+    # ---- frame list, as apply_step_to_heartbeat() leaves it ----
+    heartbeat_names = {hb["frame_name"] for hb in heartbeat_signals}
+    frame_specs = []              # (frame_name, can_id, {signal: column or constant})
+    for hb in heartbeat_signals:
+        signals = dict(hb["signals"])
+        if dbc_frameid_map.get(hb["frame_name"]):
+            for sig in frame_signals.get(hb["frame_name"], ()):
+                if sig in signals:
+                    signals[sig] = columns[sig]
+        frame_specs.append((hb["frame_name"], hb["can_id"], signals))
+    for frame in frame_order:
+        frame_id = dbc_frameid_map.get(frame)
+        if frame in heartbeat_names or not frame_id:
+            continue
+        frame_specs.append((frame, frame_id, {sig: columns[sig] for sig in frame_signals[frame]}))
+
+    # ---- bulk encode each frame ----
+    steps = len(timedelay)
+    frames = []
+    bulk_count = 0
+    for frame_name, can_id, signals in frame_specs:
+        payloads = valid = message = None
+        try:
+            frame_id = frame_table.frame_id_to_int(can_id)
+        except (TypeError, ValueError):
+            frames.append((frame_name, can_id, None, signals, None, None))
+            continue
+        message = lookup_message(frame_id, dbs)
+        if message is not None and supports(message) and set(signals) == {s.name for s in message.signals}:
+            frame_columns = {}
+            for sig, value in signals.items():
+                if isinstance(value, np.ndarray):
+                    frame_columns[sig] = value
+                elif isinstance(value, (int, float)):
+                    frame_columns[sig] = np.full(steps, value, dtype=np.float64)
+            if len(frame_columns) == len(signals):
+                encoder = FrameEncoder(message)
+                payloads, valid = encoder.encode(frame_columns)
+                mismatches = encoder.verify(payloads, valid, frame_columns, sample_rows(steps))
+                if mismatches:
+                    log.warning(f"⚠️ Bulk encoding of {frame_name} differs from cantools "
+                                f"(rows {mismatches[:5]}) — encoding it per step")
+                    payloads = valid = None
+                else:
+                    bulk_count += 1
+        frames.append((frame_name, frame_id, message, signals, payloads, valid))
+
+    log.info(f"⚡ Precompiled {steps} steps: {bulk_count}/{len(frames)} frames bulk-encoded "
+             f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return PrecompiledSteps(timedelay, frames, dbs)
@@ -0,0 +1,461 @@
+"""
+Headless entry point (no Tkinter).
+
+    python -m can_assure run --dbc Files/my.dbc --vector vector_list.xlsx --out results.xlsx
+    python -m can_assure run-multi --dbc Files/my.dbc \
+        --session can0 a.xlsx a_out.xlsx --session can1 b.xlsx b_out.xlsx HU2_SERIAL
+    python -m can_assure replay --dbc Files/my.dbc --trace drive.blf --vector vector_list.xlsx --out replay.csv
+    python -m can_assure dbc-diff Files/Mandatory/K3_DBC_V2.92.dbc Files/Mandatory/K3_DBC_V3.0.dbc \
+        --vector vector_list.xlsx --out vector_list_v3.xlsx [--changed-only]
+
+Runs the same heartbeat sender, synchronized worker and VHAL validation
+that the GUI "Auto send" button uses, then exits with
+    0 → all steps ran and every validated signal returned the value that was sent
+    1 → run failed / stopped, some signals were not validated or did not match
+    2 → setup error (missing files, no DBC, ...)
+"""
+import argparse
+import os
+import contextlib
+import shutil
+import sys
+import time
+import importlib
+
+import config
+import backend
+import can_trace
+import log
+import metrics
+import profiling
+import runtime_config
+import session
+import simulation
+
+EXIT_PASS = 0
+EXIT_FAIL = 1
+EXIT_SETUP_ERROR = 2
+
+# RX values that mean VHAL did not answer for that signal
+RX_MISSING_VALUES = {None, "", "Not found", "Device not found"}
+
+
+# -----------------------
+# Setup
+# -----------------------
+def prepare_run(dbc_path, vector_path, out_path, channel=None):
+    """
+    Copy the vector sheet to out_path and point config at the DBC / copy,
+    exactly like Browse + Show Signals do in the GUI.
+    """
+    if not os.path.exists(dbc_path):
+        print(f"❌ DBC not found: {dbc_path}")
+        return False
+    if not os.path.exists(vector_path):
+        print(f"❌ Vector sheet not found: {vector_path}")
+        return False
+
+    # Results are written into the copy; the input vector stays untouched
+    if os.path.abspath(vector_path) != os.path.abspath(out_path):
+        shutil.copy2(vector_path, out_path)
+
+    runtime_config.update_config_file_runtime("dbc_file_path", os.path.abspath(dbc_path))
+    runtime_config.update_config_file_runtime("file_path", os.path.abspath(out_path))
+    importlib.reload(config)
+
+    vehicle_type_dict = backend.update_vehicle_property_type(dbc_path)
+    runtime_config.update_config_file_runtime("Vehicle_propID_type", vehicle_type_dict)
+    importlib.reload(config)
+    backend.copy_original_heartbeat_signal()
+
+    backend.check_auto_send_time_in_excel_update_config_file()
+    backend.refresh_config_and_dbc()
+
+    if channel:
+        runtime_config.update_config_file_runtime("Peak_interface_name", channel)
+        importlib.reload(config)
+    else:
+        backend.check_peak_device_interface_name()
+        importlib.reload(config)
+    backend.make_can_interface_up()
+    return True
+
+
+# -----------------------
+# Run
+# -----------------------
+def drain_ui_queue():
+    """Nobody renders the queue in headless mode; keep it from growing."""
+    while not backend.ui_queue.empty():
+        try:
+            backend.ui_queue.get_nowait()
+        except Exception:
+            break
+
+
+def run_vector(timeout=None):
+    """Start heartbeat + RX worker, run all steps, return the worker status."""
+    backend.lifecycle.start()
+    backend.lifecycle.start_heartbeat()
+    backend.start_adb_worker()
+    backend.start_synchronized_worker()
+
+    deadline = time.time() + timeout if timeout else None
+    try:
+        while not backend.wait_synchronized_worker(0.2):
+            drain_ui_queue()
+            if deadline and time.time() > deadline:
+                print(f"⏰ Run exceeded {timeout}s — stopping")
+                backend.stop_synchronized_worker()
+                backend.wait_synchronized_worker(5)
+                return "stopped"
+    finally:
+        backend.stop_adb_worker()
+        drain_ui_queue()
+    return backend.synchronized_worker_status
+
+
+def evaluate_results(out_path):
+    """
+    Read the Results sheet written by the worker.
+    Returns (validated_count, missing) where missing is a list of
+    (time_ms, signal, value) for RX cells VHAL did not answer.
+    """
+    wb = backend.openpyxl.load_workbook(out_path, data_only=True, read_only=True)
+    try:
+        sheet = wb["Results"]
+        rows = list(sheet.iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+    if len(rows) < 3:
+        return 0, []
+    prop_row, signal_row, sub_row = rows[0], rows[1], rows[2]
+
+    # Rx column → signal name (signal header sits over its Tx column)
+    rx_columns = {}
+    current_signal = current_prop = None
+    for col in range(1, len(sub_row)):
+        if col < len(signal_row) and signal_row[col]:
+            current_signal = str(signal_row[col]).strip()
+            current_prop = prop_row[col] if col < len(prop_row) else None
+        sub = sub_row[col]
+        if sub and "rx car service" in str(sub).lower() and current_signal:
+            # signals without a VHAL property can't be validated
+            if current_prop and str(current_prop).upper() != "N/A":
+                rx_columns[col] = current_signal
+
+    validated = 0
+    missing = []
+    for row in rows[3:]:
+        if not row or row[0] is None:
+            continue
+        for col, sig in rx_columns.items():
+            value = row[col] if col < len(row) else None
+            validated += 1
+            if value in RX_MISSING_VALUES:
+                missing.append((row[0], sig, value))
+    return validated, missing
+
+
+def evaluate_verdicts(out_path):
+    """
+    Rows of the Verdicts sheet written by the worker:
+    [(time_ms, passed, failed, no_rx, failed_signals)], or None for a workbook without one.
+    """
+    wb = backend.openpyxl.load_workbook(out_path, data_only=True, read_only=True)
+    try:
+        if backend.VERDICT_SHEET not in wb.sheetnames:
+            return None
+        rows = list(wb[backend.VERDICT_SHEET].iter_rows(min_row=2, values_only=True))
+    finally:
+        wb.close()
+    return [tuple(row[:5]) for row in rows if row and row[0] is not None]
+
+
+def cmd_run(args):
+    if args.async_core:
+        backend.async_core_enabled = True
+    if args.delta is not None:
+        import delta_run
+        backend.delta_mode = True
+        backend.delta_state_path = args.delta or delta_run.state_path(args.out)
+    try:
+        if args.simulate:
+            simulation.enable([args.dbc, config.Heart_beat_dbc],
+                              channels=[args.channel] if args.channel else None)
+        if not prepare_run(args.dbc, args.vector, args.out, args.channel):
+            return EXIT_SETUP_ERROR
+    except Exception as e:
+        print(f"❌ Setup failed: {e}")
+        return EXIT_SETUP_ERROR
+
+    with recording(args.record):
+        status = run_vector(timeout=args.timeout)
+    print(f"🏁 Worker finished: {status}")
+    if status != "completed":
+        return EXIT_FAIL
+
+    return EXIT_PASS if report_results(args.out) else EXIT_FAIL
+
+
+@contextlib.contextmanager
+def recording(path):
+    """Record every frame sent while the block runs to a trace file (no-op without a path)."""
+    if not path:
+        yield None
+        return
+    recorder = can_trace.TraceRecorder(path)
+    recorder.start()
+    try:
+        yield recorder
+    finally:
+        recorder.stop()
+
+
+def cmd_replay(args):
+    for path, what in ((args.trace, "Trace"), (args.dbc, "DBC"), (args.vector, "Vector sheet")):
+        if path and not os.path.exists(path):
+            print(f"❌ {what} not found: {path}")
+            return EXIT_SETUP_ERROR
+    try:
+        if args.simulate:
+            simulation.enable([args.dbc, config.Heart_beat_dbc],
+                              channels=[args.channel] if args.channel else None)
+        runtime_config.update_config_file_runtime("dbc_file_path", os.path.abspath(args.dbc))
+        if args.channel:
+            runtime_config.update_config_file_runtime("Peak_interface_name", args.channel)
+        else:
+            backend.check_peak_device_interface_name()
+        importlib.reload(config)
+        backend.make_can_interface_up()
+        backend.copy_original_heartbeat_signal()
+    except Exception as e:
+        print(f"❌ Setup failed: {e}")
+        return EXIT_SETUP_ERROR
+
+    backend.lifecycle.start()
+    if args.heartbeat:
+        backend.lifecycle.start_heartbeat()
+    bus = backend.get_bus()
+    if bus is None:
+        return EXIT_SETUP_ERROR
+
+    replayer = can_trace.TraceReplayer(args.trace, bus, speed=args.speed, channel=args.trace_channel)
+    validator = None
+    if args.vector:
+        canid_to_signalname = backend.build_canid_to_signalname_from_excel(args.vector)
+        validator = can_trace.ReplayValidator(
+            replayer, backend.send_dbs(), list(canid_to_signalname.keys()), canid_to_signalname,
+            args.out or os.path.splitext(args.trace)[0] + "_replay.csv",
+            prop_types=backend.update_vehicle_property_type(args.dbc), interval=args.interval,
+        )
+
+    deadline = time.time() + args.timeout if args.timeout else None
+    with recording(args.record):
+        replayer.start()
+        if validator is not None:
+            validator.start()
+        while not replayer.wait(0.2):
+            drain_ui_queue()
+            if deadline and time.time() > deadline:
+                print(f"⏰ Replay exceeded {args.timeout}s — stopping")
+                replayer.stop()
+        if validator is not None:
+            validator.wait()
+    backend.lifecycle.stop_workers()
+
+    if replayer.status != "completed":
+        return EXIT_FAIL
+    return EXIT_PASS if validator is None or validator.mismatches == 0 else EXIT_FAIL
+
+
+def report_results(out_path):
+    """Print the RX summary of one results workbook; True when everything answered."""
+    validated, missing = evaluate_results(out_path)
+    for time_ms, sig, value in missing[:50]:
+        print(f"❌ {time_ms} ms  {sig}: {value or 'no RX value'}")
+    if len(missing) > 50:
+        print(f"   ... {len(missing) - 50} more")
+    print(f"📊 {validated - len(missing)}/{validated} RX checks answered → {out_path}")
+
+    verdicts = evaluate_verdicts(out_path)
+    if verdicts is None:
+        return not missing
+    failed = [(time_ms, signals) for time_ms, _, n_failed, _, signals in verdicts if n_failed]
+    for time_ms, signals in failed[:50]:
+        print(f"❌ {time_ms} ms  VHAL ≠ TX: {signals}")
+    passed = sum(row[1] or 0 for row in verdicts)
+    checked = sum((row[1] or 0) + (row[2] or 0) + (row[3] or 0) for row in verdicts)
+    print(f"⚖️ {passed}/{checked} RX values matched TX")
+    return not missing and not failed
+
+
+def cmd_run_multi(args):
+    specs = []
+    for entry in args.session:
+        if len(entry) not in (3, 4):
+            print(f"❌ --session expects CHANNEL VECTOR OUT [ADB_SERIAL], got: {' '.join(entry)}")
+            return EXIT_SETUP_ERROR
+        channel, vector, out = entry[:3]
+        if not os.path.exists(vector):
+            print(f"❌ Vector sheet not found: {vector}")
+            return EXIT_SETUP_ERROR
+        specs.append({
+            "channel": channel,
+            "dbc_path": args.dbc,
+            "vector_path": vector,
+            "out_path": out,
+            "adb_serial": entry[3] if len(entry) == 4 else None,
+        })
+    if not os.path.exists(args.dbc):
+        print(f"❌ DBC not found: {args.dbc}")
+        return EXIT_SETUP_ERROR
+
+    pool = args.pool
+    if args.simulate:
+        # virtual buses only exist inside one process
+        pool = "thread"
+        simulation.enable([args.dbc, config.Heart_beat_dbc], channels=[spec["channel"] for spec in specs])
+        for spec in specs:
+            spec["adb_serial"] = spec["adb_serial"] or spec["channel"]
+
+    all_passed = True
+    for result in session.run_sessions(specs, pool=pool):
+        print(f"🏁 [{result['channel']}] Session finished: {result['status']}")
+        if result["status"] != "completed":
+            all_passed = False
+            continue
+        all_passed = report_results(result["out_path"]) and all_passed
+    return EXIT_PASS if all_passed else EXIT_FAIL
+
+
+def cmd_dbc_diff(args):
+    import dbc_diff
+    for path in (args.old, args.new, args.vector):
+        if path and not os.path.exists(path):
+            print(f"❌ Not found: {path}")
+            return EXIT_SETUP_ERROR
+    diff = dbc_diff.diff_files(args.old, args.new)
+    dbc_diff.print_diff(diff)
+    if not args.vector:
+        return EXIT_PASS
+    if not args.out:
+        print("❌ --vector needs --out")
+        return EXIT_SETUP_ERROR
+    type_h = args.type_h or config.type_h_file
+    if not os.path.exists(type_h):
+        print(f"❌ types.h not found: {type_h}")
+        return EXIT_SETUP_ERROR
+    kept = dbc_diff.migrate_vector(args.vector, args.new, type_h, args.out, diff=diff,
+                                   changed_only=args.changed_only)
+    return EXIT_PASS if kept is not None else EXIT_FAIL
+
+
+# -----------------------
+# CLI
+# -----------------------
+def build_parser():
+    parser = argparse.ArgumentParser(prog="can_assure", description="Can_AssuRE headless runner")
+    parser.add_argument("--log-level", choices=sorted(log.LEVELS),
+                        help="console verbosity (default: config.Log_level)")
+    parser.add_argument("--metrics-file",
+                        help="write Prometheus-format metrics here during and after the run")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run one vector sheet against the DUT")
+    run.add_argument("--dbc", required=True, help="DBC used to encode the vector signals")
+    run.add_argument("--vector", required=True, help="vector_list.xlsx to run")
+    run.add_argument("--out", required=True, help="where to write the results workbook")
+    run.add_argument("--channel", help="CAN interface (default: auto-detect like the GUI)")
+    run.add_argument("--timeout", type=float, help="abort the run after this many seconds")
+    run.add_argument("--simulate", action="store_true",
+                     help="virtual CAN bus + fake car_service instead of PEAK/adb")
+    run.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                     help="cProfile + sampled stacks per thread (default DIR: <out>_profile)")
+    run.add_argument("--async-core", action="store_true",
+                     help="run heartbeat / RX poll / steps as asyncio tasks (config.Async_core)")
+    run.add_argument("--record", metavar="TRACE",
+                     help="record every sent frame to a trace file (.blf / .asc / .log / .csv)")
+    run.add_argument("--delta", nargs="?", const="", metavar="STATE",
+                     help="only re-test signals that changed or failed since the last --delta run "
+                          "(default STATE: <out>.delta.json)")
+    run.set_defaults(func=cmd_run)
+
+    multi = sub.add_parser("run-multi", help="run several vector sheets in parallel, one per CAN channel")
+    multi.add_argument("--dbc", required=True, help="DBC used to encode the vector signals")
+    multi.add_argument("--session", action="append", nargs="+", required=True,
+                       metavar="ARG", help="CHANNEL VECTOR OUT [ADB_SERIAL]; repeat per channel")
+    multi.add_argument("--pool", choices=("thread", "process"), default="thread",
+                       help="run sessions as threads in this process or as separate processes")
+    multi.add_argument("--simulate", action="store_true",
+                       help="virtual CAN buses + fake car_service (forces --pool thread)")
+    multi.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                       help="profile heartbeat threads + sampled stacks (thread pool only; "
+                            "default DIR: <first out>_profile)")
+    multi.set_defaults(func=cmd_run_multi)
+
+    replay = sub.add_parser("replay", help="replay a recorded CAN trace and validate VHAL alongside")
+    replay.add_argument("--dbc", required=True, help="DBC used to decode the replayed signals")
+    replay.add_argument("--trace", required=True, help="trace to replay (.blf / .asc / .log / .csv / .trc)")
+    replay.add_argument("--vector", help="vector_list.xlsx with the VHAL properties to validate")
+    replay.add_argument("--out", help="validation CSV (default: <trace>_replay.csv)")
+    replay.add_argument("--channel", help="CAN interface (default: auto-detect like the GUI)")
+    replay.add_argument("--trace-channel", help="only replay frames recorded on this trace channel")
+    replay.add_argument("--speed", type=float, default=1.0, help="replay speed factor (2 = twice as fast)")
+    replay.add_argument("--interval", type=float, default=1.0, help="seconds between VHAL checks")
+    replay.add_argument("--heartbeat", action="store_true", help="also run the heartbeat sender")
+    replay.add_argument("--record", metavar="TRACE", help="record every sent frame to a trace file")
+    replay.add_argument("--timeout", type=float, help="abort the replay after this many seconds")
+    replay.add_argument("--simulate", action="store_true",
+                        help="virtual CAN bus + fake car_service instead of PEAK/adb")
+    replay.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                        help="cProfile + sampled stacks per thread (default DIR: <trace>_profile)")
+    replay.set_defaults(func=cmd_replay)
+
+    dbc = sub.add_parser("dbc-diff", help="compare two DBC versions and migrate a vector sheet")
+    dbc.add_argument("old", help="DBC the vector sheet was made for")
+    dbc.add_argument("new", help="new DBC version")
+    dbc.add_argument("--vector", help="vector_list.xlsx to migrate to the new DBC (values are kept)")
+    dbc.add_argument("--out", help="migrated vector sheet")
+    dbc.add_argument("--type-h", help="types.h for the property ids (default: config.type_h_file)")
+    dbc.add_argument("--changed-only", action="store_true",
+                     help="only keep added / changed signals in the migrated sheet (re-test run)")
+    dbc.set_defaults(func=cmd_dbc_diff, profile=None)
+    return parser
+
+
+def default_profile_dir(args):
+    """<out>_profile next to the results workbook (first session for run-multi)."""
+    if args.command == "replay":
+        out_path = args.trace
+    else:
+        out_path = args.out if args.command == "run" else args.session[0][2]
+    return os.path.splitext(os.path.abspath(out_path))[0] + "_profile"
+
+
+BUS_COMMANDS = ("run", "run-multi", "replay")   # commands with TX / RX metrics worth a summary
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.log_level:
+        log.set_level(args.log_level)
+    if args.metrics_file:
+        metrics.start_exporter(args.metrics_file)
+    if args.profile is not None:
+        profiling.enable(args.profile or default_profile_dir(args))
+    try:
+        return args.func(args)
+    finally:
+        if profiling.enabled:
+            backend.lifecycle.stop_workers()
+            profiling.finish()
+        if args.command in BUS_COMMANDS:
+            print(f"📈 {backend.metrics_summary()}")
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+CAN RX capture: what actually went out on the bus (config.Kernal = "On").
+
+    capture = can_rx.CanRxCapture([heartbeat_db, db], "can0")
+    capture.start()
+    ...
+    capture.latest_values()          # { signal: decoded value } as last seen on the bus
+    capture.frame_report(expected)   # TX intent vs observed frames
+    capture.stop()
+
+A can.Notifier thread only appends each received frame to a bounded ring
+buffer (deque.append, no decoding, no lock). A decoder thread drains the
+ring in batches every DECODE_INTERVAL and decodes with the cached DBC
+model; a frame whose payload did not change since its last decode only
+refreshes its timestamp, so the periodic heartbeat costs almost nothing.
+The ring holds RING_CAPACITY frames (2 s of a fully loaded 500 kbit/s bus)
+so a GIL stall in another thread does not drop frames; overwritten frames
+are counted in can_rx_dropped_total.
+
+Capture opens its own bus on the channel so it also sees the frames this
+process sends (socketcan loopback, virtual bus). PCAN on Windows allows
+one handle per channel, so there it reads from the sender's bus (shared_bus,
+default backend.get_bus()) and only sees frames from other nodes.
+"""
+import collections
+import threading
+import time
+
+import backend
+import log
+import metrics
+from backend import can
+
+RING_CAPACITY = 8192        # frames; ~2 s at 4000 frames/s
+DECODE_INTERVAL = 0.01      # seconds between ring drains
+BATCH_SIZE = 2048           # max frames decoded per drain pass
+
+frames_total = metrics.counter("can_rx_frames_total", "CAN frames received by the RX capture")
+dropped_total = metrics.counter("can_rx_dropped_total", "CAN frames overwritten in the RX ring before decoding")
+unknown_total = metrics.counter("can_rx_unknown_total", "CAN frames with an id not in the DBC")
+decode_errors_total = metrics.counter("can_rx_decode_errors_total", "CAN frames that failed to decode")
+decode_seconds = metrics.histogram("can_rx_decode_seconds", "Time to decode one drained batch")
+
+# count / first_ts / last_ts / max_gap (seconds) of one frame id
+FrameStats = collections.namedtuple("FrameStats", "count first_ts last_ts max_gap")
+
+
+class RingBuffer:
+    """Bounded FIFO of received frames; the oldest frame is dropped when full."""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.items = collections.deque(maxlen=capacity)
+        self.capacity = capacity
+
+    def append(self, msg):
+        # called from the Notifier thread only
+        if len(self.items) == self.capacity:
+            dropped_total.inc()
+        self.items.append(msg)
+
+    def drain(self, max_items=BATCH_SIZE):
+        batch = []
+        popleft = self.items.popleft
+        try:
+            for _ in range(max_items):
+                batch.append(popleft())
+        except IndexError:
+            pass
+        return batch
+
+    def __len__(self):
+        return len(self.items)
+
+
+class RxDecoder:
+    """Decodes frames with the cached DBC model; keeps latest value + timestamp per signal."""
+
+    def __init__(self, dbs):
+        self.dbs = list(dbs)
+        self.messages = {}          # { (frame_id, is_extended): cantools Message or None }
+        self.last_payload = {}      # { frame_id: bytes } last decoded payload
+        self.latest = {}            # { signal: (value, timestamp) }
+        self.frame_signals = {}     # { frame_id: [signal, ...] } of the last decode
+        self.stats = {}             # { frame_id: FrameStats }
+
+    def lookup(self, frame_id, is_extended):
+        key = (frame_id, is_extended)
+        try:
+            return self.messages[key]
+        except KeyError:
+            pass
+        message = None
+        for db in self.dbs:
+            try:
+                message = db.get_message_by_frame_id(frame_id)
+                break
+            except KeyError:
+                continue
+        self.messages[key] = message
+        return message
+
+    def decode_batch(self, batch):
+        latest = self.latest
+        stats = self.stats
+        for msg in batch:
+            frame_id = msg.arbitration_id
+            ts = msg.timestamp
+            previous = stats.get(frame_id)
+            if previous is None:
+                stats[frame_id] = FrameStats(1, ts, ts, 0.0)
+            else:
+                stats[frame_id] = FrameStats(previous.count + 1, previous.first_ts, ts,
+                                             max(previous.max_gap, ts - previous.last_ts))
+
+            data = bytes(msg.data)
+            if self.last_payload.get(frame_id) == data:
+                # same payload as the last decode → same values, newer timestamp
+                for sig in self.frame_signals.get(frame_id, ()):
+                    latest[sig] = (latest[sig][0], ts)
+                continue
+
+            message = self.lookup(frame_id, msg.is_extended_id)
+            if message is None:
+                unknown_total.inc()
+                continue
+            try:
+                values = message.decode(data, decode_choices=False)
+            except Exception as e:
+                decode_errors_total.inc()
+                log.every(("can_rx_decode", frame_id), 5, f"⚠️ RX decode error for 0x{frame_id:x}: {e}")
+                continue
+            self.last_payload[frame_id] = data
+            self.frame_signals[frame_id] = list(values)
+            for sig, value in values.items():
+                latest[sig] = (value, ts)
+
+
+class CanRxCapture:
+    """Notifier → ring buffer → batched decoder for one CAN channel."""
+
+    def __init__(self, dbs, channel, shared_bus=None, capacity=RING_CAPACITY):
+        self.channel = channel
+        self.shared_bus = shared_bus
+        self.bus = None
+        self.owns_bus = False
+        self.ring = RingBuffer(capacity)
+        self.decoder = RxDecoder(dbs)
+        self.lock = threading.Lock()     # guards decoder state between decoder and readers
+        self.notifier = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.started_at = None
+
+    # ------------- lifecycle -------------
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return True
+        if backend.testing_device() == "Windows":
+            self.bus = self.shared_bus or backend.get_bus()
+        else:
+            self.bus = backend.open_bus(self.channel)
+            self.owns_bus = self.bus is not None
+        if self.bus is None:
+            print(f"❌ CAN RX capture: bus {self.channel} not available")
+            return False
+
+        self.started_at = time.time()
+        self.stop_event.clear()
+        self.notifier = can.Notifier(self.bus, [self.ring.append], timeout=0.1)
+        self.thread = threading.Thread(target=self._run, name=f"can-rx-{self.channel}", daemon=True)
+        self.thread.start()
+        print(f"✅ CAN RX capture started on {self.channel}")
+        return True
+
+    def stop(self, timeout=1.0):
+        if self.notifier is not None:
+            self.notifier.stop(timeout)
+            self.notifier = None
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.drain()   # whatever arrived before the notifier stopped
+        if self.owns_bus and self.bus is not None:
+            try:
+                self.bus.shutdown()
+            except Exception as e:
+                print(f"⚠️ CAN RX capture: error shutting down bus: {e}")
+        self.bus = None
+        self.owns_bus = False
+
+    def _run(self):
+        while not self.stop_event.wait(DECODE_INTERVAL):
+            while self.drain() == BATCH_SIZE:
+                pass   # backlog: keep draining before sleeping again
+
+    def drain(self):
+        """Decode what is in the ring now. Returns the number of frames decoded."""
+        batch = self.ring.drain()
+        if not batch:
+            return 0
+        start = time.perf_counter()
+        with self.lock:
+            self.decoder.decode_batch(batch)
+        frames_total.inc(len(batch))
+        decode_seconds.observe(time.perf_counter() - start)
+        return len(batch)
+
+    # ------------- readers -------------
+    def latest_values(self, since=None):
+        """{ signal: value } last seen on the bus (only values seen after `since`, if given)."""
+        with self.lock:
+            return {sig: value for sig, (value, ts) in self.decoder.latest.items()
+                    if since is None or ts >= since}
+
+    def frame_stats(self):
+        with self.lock:
+            return dict(self.decoder.stats)
+
+    def frame_report(self, expected, period=0.08, now=None):
+        """
+        Compare TX intent with the bus.
+        expected: frame_table.FrameEntry list (what the heartbeat should be sending)
+        Returns [{"frame_name", "frame_id", "count", "last_age", "max_gap", "on_time"}].
+        A frame is on time when it was seen within 2 periods and never had a gap
+        longer than 2 periods.
+        """
+        now = time.time() if now is None else now
+        stats = self.frame_stats()
+        report = []
+        for entry in expected:
+            st = stats.get(entry.frame_id)
+            if st is None:
+                report.append({"frame_name": entry.frame_name, "frame_id": entry.frame_id, "count": 0,
+                               "last_age": None, "max_gap": None, "on_time": False})
+                continue
+            last_age = now - st.last_ts
+            report.append({
+                "frame_name": entry.frame_name,
+                "frame_id": entry.frame_id,
+                "count": st.count,
+                "last_age": last_age,
+                "max_gap": st.max_gap,
+                "on_time": last_age <= 2 * period and st.max_gap <= 2 * period,
+            })
+        return report
+
+
+def print_frame_report(report, prefix=""):
+    late = [r for r in report if not r["on_time"]]
+    for r in late:
+        if r["count"] == 0:
+            log.warning(f"{prefix}❌ Bus: {r['frame_name']} (0x{r['frame_id']:x}) never seen")
+        else:
+            log.warning(f"{prefix}⚠️ Bus: {r['frame_name']} (0x{r['frame_id']:x}) late — "
+                        f"max gap {r['max_gap'] * 1000:.0f} ms, last seen {r['last_age'] * 1000:.0f} ms ago")
+    print(f"{prefix}🚌 Bus check: {len(report) - len(late)}/{len(report)} TX frames on time")
@@ -0,0 +1,244 @@
+"""
+CAN trace replay and TX recording (BLF, ASC, candump .log, .csv, .trc, ...
+anything python-can's LogReader / Logger handle).
+
+    replayer = can_trace.TraceReplayer("drive.blf", backend.get_bus())
+    replayer.start()
+    replayer.wait()
+
+    recorder = can_trace.TraceRecorder("tx.blf")   # every frame sent via backend.send_frame_entry
+    recorder.start()
+    ...
+    recorder.stop()
+
+Traces are streamed: LogReader yields one message at a time, so a
+multi-GB trace replays with flat memory.
+
+Timing: every frame is due at start + (timestamp - first timestamp) / speed,
+an absolute schedule from the trace timestamps, so sleep overshoot never
+accumulates into drift. When the sender falls more than MAX_LAG behind
+(e.g. the bus was blocked), the schedule is shifted forward once instead
+of bursting the backlog onto the bus. Frames go out through
+backend.send_frame_entry(), the same send path, lock and counters as the
+heartbeat.
+"""
+import csv
+import queue
+import threading
+import time
+
+import backend
+import can_rx
+import frame_table
+import log
+import metrics
+from backend import can
+
+MAX_LAG = 0.5            # seconds behind schedule before resyncing
+MIN_SLEEP = 0.0005       # frames due sooner than this are sent right away
+
+replay_lag_seconds = metrics.histogram("replay_lag_seconds", "How late replayed frames left vs the trace timing")
+replay_resyncs_total = metrics.counter("replay_resyncs_total", "Replay schedule shifts after falling behind")
+recorded_frames_total = metrics.counter("recorded_frames_total", "TX frames written to the trace recorder")
+
+
+def iter_trace(path, channel=None):
+    """Stream data frames from a trace file (optionally only one source channel)."""
+    with can.LogReader(path) as reader:
+        for msg in reader:
+            if msg.is_error_frame or msg.is_remote_frame:
+                continue
+            if channel is not None and str(msg.channel) != str(channel):
+                continue
+            yield msg
+
+
+# -----------------------------
+# Replay
+# -----------------------------
+class TraceReplayer:
+    """Sends the frames of a trace on `bus` with the trace's inter-frame timing."""
+
+    def __init__(self, path, bus, speed=1.0, channel=None, lock=None, name="replay"):
+        self.path = path
+        self.bus = bus
+        self.speed = speed
+        self.channel = channel
+        self.lock = lock
+        self.name = name
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.status = "idle"    # idle / running / completed / stopped / failed
+        self.frames_sent = 0
+        self.resyncs = 0
+        self.max_lag = 0.0
+        self.trace_time = 0.0   # trace seconds replayed so far
+        self.last_sent = {}     # { frame_id: can.Message } last replayed frame per id
+
+    def start(self):
+        self.stop_event.clear()
+        self.status = "running"
+        self.thread = threading.Thread(target=self._run, name=f"trace-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        self.wait(timeout)
+
+    def wait(self, timeout=None):
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+        return self.thread is None or not self.thread.is_alive()
+
+    def _run(self):
+        first_ts = None
+        start = time.perf_counter()
+        last_sent = self.last_sent
+        try:
+            for msg in iter_trace(self.path, self.channel):
+                if self.stop_event.is_set():
+                    self.status = "stopped"
+                    break
+                if first_ts is None:
+                    first_ts = msg.timestamp
+                    start = time.perf_counter()
+                offset = (msg.timestamp - first_ts) / self.speed
+                delay = start + offset - time.perf_counter()
+                if delay > MIN_SLEEP:
+                    if self.stop_event.wait(delay):
+                        self.status = "stopped"
+                        break
+                elif delay < -MAX_LAG:
+                    # too far behind: continue from here instead of bursting the backlog
+                    start -= delay
+                    self.resyncs += 1
+                    replay_resyncs_total.inc()
+
+                entry = frame_table.FrameEntry(self.name, msg.arbitration_id, msg.is_extended_id, bytes(msg.data))
+                backend.send_frame_entry(self.bus, entry, lock=self.lock)
+                lag = max(0.0, time.perf_counter() - (start + offset))
+                replay_lag_seconds.observe(lag)
+                self.max_lag = max(self.max_lag, lag)
+                last_sent[msg.arbitration_id] = msg
+                self.frames_sent += 1
+                self.trace_time = msg.timestamp - first_ts
+            else:
+                self.status = "completed"
+        except Exception as e:
+            log.error(f"❌ Replay of {self.path} failed: {e}")
+            self.status = "failed"
+        print(f"🎞️ Replay {self.status}: {self.frames_sent} frames, {self.trace_time:.1f} s of trace, "
+              f"max lag {self.max_lag * 1000:.1f} ms, {self.resyncs} resync(s)")
+
+
+class ReplayValidator:
+    """
+    Every `interval` seconds while a replay runs: read VHAL, decode the last
+    replayed frame of every id, and append one CSV row per signal
+    (trace_time_s, signal, bus_value, vhal_value, match).
+    """
+
+    FIELDS = ("trace_time_s", "signal", "bus_value", "vhal_value", "match")
+
+    def __init__(self, replayer, dbs, property_list, canid_to_signalname, out_path,
+                 prop_types=None, serial=None, interval=1.0):
+        self.replayer = replayer
+        self.dbs = list(dbs)
+        self.property_list = property_list
+        self.canid_to_signalname = canid_to_signalname
+        self.out_path = out_path
+        self.prop_types = prop_types
+        self.serial = serial
+        self.interval = interval
+        self.signals = {sig for names in canid_to_signalname.values() for sig in names}
+        self.thread = None
+        self.checks = 0
+        self.mismatches = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="replay-validator", daemon=True)
+        self.thread.start()
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        with open(self.out_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.FIELDS)
+            while not self.replayer.wait(self.interval):
+                self.check(writer)
+            self.check(writer)   # final state of the trace
+        print(f"📊 Replay validation: {self.checks - self.mismatches}/{self.checks} checks matched → {self.out_path}")
+
+    def check(self, writer):
+        rx = backend.validate_vhal_layer(self.property_list, self.canid_to_signalname, serial=self.serial,
+                                         publish=False, prop_types=self.prop_types)
+        decoder = can_rx.RxDecoder(self.dbs)
+        decoder.decode_batch(list(self.replayer.last_sent.copy().values()))
+        trace_time = round(self.replayer.trace_time, 3)
+        for sig in sorted(self.signals):
+            if sig not in decoder.latest:
+                continue   # not in the trace (yet)
+            bus_value = decoder.latest[sig][0]
+            vhal_value = rx.get(sig)
+            match = values_match(bus_value, vhal_value)
+            self.checks += 1
+            if not match:
+                self.mismatches += 1
+            writer.writerow((trace_time, sig, bus_value, vhal_value, "OK" if match else "MISMATCH"))
+
+
+def values_match(bus_value, vhal_value, tolerance=1e-3):
+    try:
+        return abs(float(bus_value) - float(vhal_value)) <= tolerance * max(1.0, abs(float(bus_value)))
+    except (TypeError, ValueError):
+        return str(bus_value) == str(vhal_value)
+
+
+# -----------------------------
+# Record
+# -----------------------------
+class TraceRecorder:
+    """
+    Writes every frame sent through backend.send_frame_entry() to a trace
+    file. The send path only queues the message; a writer thread does the I/O.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.SimpleQueue()
+        self.writer = None
+        self.thread = None
+
+    def start(self):
+        self.writer = can.Logger(self.path)
+        self.thread = threading.Thread(target=self._run, name="trace-recorder", daemon=True)
+        self.thread.start()
+        backend.tx_listeners.append(self.on_sent)
+        log.info(f"⏺️ Recording TX frames → {self.path}")
+
+    def on_sent(self, msg):
+        msg.timestamp = time.time()
+        self.queue.put(msg)
+
+    def stop(self, timeout=2.0):
+        if self.on_sent in backend.tx_listeners:
+            backend.tx_listeners.remove(self.on_sent)
+        self.queue.put(None)
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+            log.info(f"⏹️ TX recording saved → {self.path}")
+
+    def _run(self):
+        while True:
+            msg = self.queue.get()
+            if msg is None:
+                break
+            self.writer.on_message_received(msg)
+            recorded_frames_total.inc()
@@ -15,14 +15,20 @@ Peak_interface_name = "can0"
 file_path = "vector_list.xlsx"
 Vehicle_propID_type = {
 }
+Rx_tolerance = {"FLOAT": 0.001, "INT32": 0, "INT64": 0}   # |VHAL - expected| allowed per property type
+Rx_poll_interval = (0.01, 0.5)   # min / max pause between VHAL dumps (s), adapted by rx_poll.py
+Rx_poll_budget = 0.5             # max share of wall time spent in adb dumps
+Rx_poll_boost = 2.0              # s of fastest polling after each TX step
 
 GUI_title = "Can_AssuRE"
 Display_size = "1400x1500"
 
 #backend variables configurable
-Testing_device = "Linux"   #"Linux"/"Windows"
+Testing_device = "Linux"   #"Linux"/"Windows"/"Simulation" (virtual bus + fake car_service)
 Password = "Welcome@2024"
 Bit_rate = "500000"
+Tx_retries = 3              # resends of a frame after a CAN send error (TX buffer full) before it is dropped
+Tx_bus_load_warning = 0.7   # warn when the periodic frames are expected to use more of the bus
 Drive_mode_prop_ID = "2140805f"
 
 # validation on/off
@@ -30,6 +36,12 @@ Car_Service = "On" # "On"/"Off"
 Kernal = "On" # "On"/"Off"
 Cloud = "On"  # "On/Off"
 
+# diagnostics
+Log_level = "INFO"   # "DEBUG"/"INFO"/"WARNING"/"ERROR"
+Async_core = False   # True → heartbeat / RX poll / steps run as asyncio tasks (async_core.py)
+Delta_mode = False   # True → only re-test signals that changed / failed since the last run (delta_run.py)
+Metrics_file = ""    # e.g. "can_assure.prom" → Prometheus text file, rewritten every 5 s
+
 
 #precheck values
 pre_check_signal_value = 1  # Example value to send
@@ -661,3 +673,8 @@ heart_beat_signals = [
 
 
 
+
+# Values changed at runtime (selected files, heartbeat values, ...) are kept in
+# runtime_state.json and applied on top of the defaults above (see runtime_config.py)
+import runtime_config
+runtime_config.apply_overrides(globals())
@@ -0,0 +1,259 @@
+"""
+DBC diff across versions + migration of an existing vector sheet.
+
+    diff = dbc_diff.diff_files("Files/Mandatory/K3_DBC_V2.92.dbc", "Files/Mandatory/K3_DBC_V3.0.dbc")
+    print_diff(diff)
+    dbc_diff.migrate_vector("vector_list.xlsx", "Files/Mandatory/K3_DBC_V3.0.dbc",
+                            config.type_h_file, "vector_list_v3.xlsx", diff=diff)
+
+Both DBCs come from backend.load_dbc() (parsed once per file version) and
+the diff of a pair is cached on both files' path + mtime + size, so the GUI
+and the CLI can ask again for free.
+
+Frames are matched by name, signals by (frame, signal) name; a signal
+that moved to another frame is reported as changed ("frame"). The vector
+sheet is keyed by signal name, so migration keeps the Time (ms) rows and
+every value of a signal that still exists, gives signals added to its
+frames the usual defaults (create_excel_sheet) and adds a DBC_Diff sheet
+listing what changed. changed_only=True writes only the added / changed signals, so a
+re-test runs just those instead of the whole vector.
+"""
+import collections
+import os
+import threading
+
+import backend
+import vector_sheet
+from backend import openpyxl
+
+DIFF_SHEET = "DBC_Diff"
+
+FRAME_FIELDS = ("frame_id", "is_extended_frame", "length", "cycle_time")
+SIGNAL_FIELDS = ("start", "length", "byte_order", "is_signed", "is_float",
+                 "scale", "offset", "minimum", "maximum", "unit", "choices")
+
+# one difference: kind = added / removed / changed, field = None unless changed
+Change = collections.namedtuple("Change", "kind frame signal field old new")
+
+diff_cache = {}    # { (old file key, new file key): DbcDiff }
+diff_cache_lock = threading.Lock()
+
+
+def frame_fields(message):
+    return {field: getattr(message, field) for field in FRAME_FIELDS}
+
+
+def signal_fields(signal):
+    return {
+        "start": signal.start,
+        "length": signal.length,
+        "byte_order": signal.byte_order,
+        "is_signed": signal.is_signed,
+        "is_float": signal.is_float,
+        "scale": signal.conversion.scale,
+        "offset": signal.conversion.offset,
+        "minimum": signal.minimum,
+        "maximum": signal.maximum,
+        "unit": signal.unit,
+        "choices": {int(raw): str(text) for raw, text in (signal.conversion.choices or {}).items()},
+    }
+
+
+class DbcDiff:
+    """Frame and signal level differences between two DBC databases."""
+
+    def __init__(self, old_db, new_db):
+        self.changes = []
+        old_frames = {msg.name: msg for msg in old_db.messages}
+        new_frames = {msg.name: msg for msg in new_db.messages}
+        old_signal_frame = backend.build_signal_frame_map(old_db)
+        new_signal_frame = backend.build_signal_frame_map(new_db)
+
+        for name, msg in old_frames.items():
+            if name not in new_frames:
+                self.changes.append(Change("removed", name, None, None, hex(msg.frame_id), None))
+                for sig in msg.signals:
+                    # a signal now in another frame is reported once, as moved ("frame")
+                    if sig.name not in new_signal_frame:
+                        self.changes.append(Change("removed", name, sig.name, None, None, None))
+
+        for name, msg in new_frames.items():
+            old_msg = old_frames.get(name)
+            if old_msg is None:
+                self.changes.append(Change("added", name, None, None, None, hex(msg.frame_id)))
+            else:
+                old_fields, new_fields = frame_fields(old_msg), frame_fields(msg)
+                for field in FRAME_FIELDS:
+                    if old_fields[field] != new_fields[field]:
+                        self.changes.append(Change("changed", name, None, field,
+                                                   old_fields[field], new_fields[field]))
+
+            old_signals = {sig.name: sig for sig in old_msg.signals} if old_msg else {}
+            for sig in msg.signals:
+                old_sig = old_signals.get(sig.name)
+                if old_sig is None:
+                    moved_from = old_signal_frame.get(sig.name)
+                    if moved_from and moved_from != name:
+                        self.changes.append(Change("changed", name, sig.name, "frame", moved_from, name))
+                    else:
+                        self.changes.append(Change("added", name, sig.name, None, None, None))
+                    continue
+                old_fields, new_fields = signal_fields(old_sig), signal_fields(sig)
+                for field in SIGNAL_FIELDS:
+                    if old_fields[field] != new_fields[field]:
+                        self.changes.append(Change("changed", name, sig.name, field,
+                                                   old_fields[field], new_fields[field]))
+            if old_msg:
+                new_names = {sig.name for sig in msg.signals}
+                for sig in old_msg.signals:
+                    if sig.name not in new_names and sig.name not in new_signal_frame:
+                        self.changes.append(Change("removed", name, sig.name, None, None, None))
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def of_kind(self, kind, signals=True):
+        return [c for c in self.changes if c.kind == kind and (c.signal is not None) == signals]
+
+    def retest_signals(self):
+        """
+        Signals a re-test has to cover: added or changed signals, and every
+        signal of a frame whose id / length / extended flag changed.
+        Returns (signal names, frame names).
+        """
+        frames = {c.frame for c in self.changes
+                  if c.kind == "changed" and c.signal is None and c.field != "cycle_time"}
+        frames |= {c.frame for c in self.changes if c.kind == "added" and c.signal is None}
+        names = {c.signal for c in self.changes if c.signal is not None and c.kind != "removed"}
+        return names, frames
+
+    def summary(self):
+        counts = collections.Counter((c.kind, c.signal is not None) for c in self.changes)
+        changed_signals = len({(c.frame, c.signal) for c in self.of_kind("changed")})
+        changed_frames = len({c.frame for c in self.of_kind("changed", signals=False)})
+        return (f"frames +{counts[('added', False)]} -{counts[('removed', False)]} ~{changed_frames} | "
+                f"signals +{counts[('added', True)]} -{counts[('removed', True)]} ~{changed_signals}")
+
+
+def file_key(path):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return path, stat.st_mtime, stat.st_size
+
+
+def diff_files(old_path, new_path):
+    """DbcDiff of two DBC files, cached until either file changes."""
+    key = (file_key(old_path), file_key(new_path))
+    with diff_cache_lock:
+        cached = diff_cache.get(key)
+    if cached is not None:
+        return cached
+    diff = DbcDiff(backend.load_dbc(old_path), backend.load_dbc(new_path))
+    with diff_cache_lock:
+        diff_cache[key] = diff
+    return diff
+
+
+def print_diff(diff, limit=200):
+    for c in diff.changes[:limit]:
+        where = f"{c.frame}.{c.signal}" if c.signal else c.frame
+        if c.kind == "changed":
+            print(f"✏️ {where}: {c.field} {c.old!r} → {c.new!r}")
+        elif c.kind == "added":
+            print(f"➕ {where}" + (f" ({c.new})" if c.new else ""))
+        else:
+            print(f"➖ {where}" + (f" ({c.old})" if c.old else ""))
+    if len(diff.changes) > limit:
+        print(f"   ... {len(diff.changes) - limit} more")
+    print(f"🧾 DBC diff: {diff.summary()}")
+
+
+# -----------------------------
+# Vector sheet migration
+# -----------------------------
+def read_vector(path):
+    """(time rows, { signal: [value per row] }) of a vector sheet's CAN_Signals page."""
+    wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
+    try:
+        rows = wb["CAN_Signals"].iter_rows(min_row=2, values_only=True)
+        header = next(rows, ())
+        times = []
+        columns = {}
+        names = [(col, str(name).strip()) for col, name in enumerate(header) if col and name]
+        for row in rows:
+            if not row or row[0] is None:
+                break
+            times.append(row[0])
+            for col, name in names:
+                columns.setdefault(name, []).append(row[col] if col < len(row) else None)
+    finally:
+        wb.close()
+    return times, columns
+
+
+def out_of_range(new_db, values):
+    """[(signal, value)] kept values the new DBC minimum / maximum no longer allows."""
+    problems = []
+    for msg in new_db.messages:
+        for sig in msg.signals:
+            for value in values.get(sig.name, ()):
+                if not isinstance(value, (int, float)):
+                    continue
+                if ((sig.minimum is not None and value < sig.minimum)
+                        or (sig.maximum is not None and value > sig.maximum)):
+                    problems.append((sig.name, value))
+                    break
+    return problems
+
+
+def migrate_vector(vector_path, new_dbc_path, type_h_path, out_path, diff=None, old_dbc_path=None,
+                   changed_only=False):
+    """
+    Regenerate the vector sheet for new_dbc_path and carry over the Time (ms)
+    rows and the values of every signal that still exists (signals the old
+    sheet did not have are only added when the new DBC put them in its frames).
+    diff (or old_dbc_path) adds the DBC_Diff sheet and enables changed_only.
+    Returns the number of signals whose values were kept, or None on failure.
+    """
+    if diff is None and old_dbc_path:
+        diff = diff_files(old_dbc_path, new_dbc_path)
+    if changed_only and diff is None:
+        raise ValueError("changed_only needs the diff (or the old DBC)")
+
+    times, values = read_vector(vector_path)
+    new_db = backend.load_dbc(new_dbc_path)
+
+    # same scope as the old sheet: its signals that still exist, plus signals
+    # the new DBC added to the frames it covers
+    signal_frame = backend.build_signal_frame_map(new_db)
+    only_signals = {name for name in values if name in signal_frame}
+    if diff is not None:
+        vector_frames = {signal_frame[name] for name in only_signals}
+        only_signals |= {c.signal for c in diff.of_kind("added") if c.frame in vector_frames}
+    if changed_only:
+        names, frames = diff.retest_signals()
+        only_signals = {name for name in only_signals if name in names or signal_frame[name] in frames}
+        if not only_signals:
+            print("✅ No signal of the vector sheet changed — nothing to re-test")
+            return 0
+
+    if not vector_sheet.create_excel_sheet(type_h_path, new_dbc_path, out_path, time_values=times,
+                                           values=values, only_signals=only_signals):
+        return None
+
+    kept = [name for name in values if name in only_signals]
+    for name, value in out_of_range(new_db, {name: values[name] for name in kept}):
+        print(f"⚠️ {name}: kept value {value} is outside the new DBC range")
+
+    if diff is not None:
+        wb = openpyxl.load_workbook(out_path)
+        sheet = wb.create_sheet(DIFF_SHEET)
+        sheet.append(("Change", "Frame", "Signal", "Field", "Old", "New"))
+        for c in diff.changes:
+            sheet.append((c.kind, c.frame, c.signal, c.field,
+                          None if c.old is None else str(c.old), None if c.new is None else str(c.new)))
+        wb.save(out_path)
+
+    print(f"🔀 Vector migrated → {out_path}: {len(kept)} signals kept, {len(times)} time rows"
+          + (" (changed signals only)" if changed_only else ""))
+    return len(kept)
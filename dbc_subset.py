@@ -0,0 +1,123 @@
+"""
+Subset DBCs cut from a parent DBC: selected messages plus all their metadata.
+
+    index = dbc_subset.DbcIndex.load("Files/Mandatory/K3_DBC_V3.0.dbc")   # parsed once, cached
+    index.write_subset(["Batt_Sts_Info", "MCU_Sts"], "Files/selected_frames.dbc")
+
+The parent file is read once and split into top-level statements (BO_
+blocks with their SG_ lines, CM_, BA_, VAL_, SIG_VALTYPE_, ...), each
+stored as a byte range and tagged with the message it belongs to, if any.
+A subset is then one pass over that index: header / global statements
+(VERSION, NS_, BU_, VAL_TABLE_, BA_DEF_, ...) are always copied, message
+statements only for the selected messages. The bytes are copied as they
+are (encoding, line endings, multi-line comments), so nothing is lost:
+signal comments, GenMsgCycleTime and other attributes, value tables and
+float signal types stay with their message.
+"""
+import os
+import re
+import threading
+
+# Top-level DBC keywords; any other line continues the statement above it
+KEYWORDS = {
+    "VERSION", "NS_", "BS_", "BU_", "BO_", "BO_TX_BU_", "CM_", "EV_", "ENVVAR_DATA_",
+    "BA_DEF_", "BA_DEF_DEF_", "BA_", "BA_DEF_REL_", "BA_DEF_DEF_REL_", "BA_REL_",
+    "VAL_TABLE_", "VAL_", "SIG_VALTYPE_", "SIG_GROUP_", "SG_MUL_VAL_", "SGTYPE_",
+    "SGTYPE_VAL_", "SIG_TYPE_REF_", "SIGTYPE_VALTYPE_", "CAT_DEF_", "CAT_", "FILTER",
+}
+
+# statement head → frame id of the message it belongs to (group 1)
+MESSAGE_STATEMENTS = [
+    re.compile(rb"BO_\s+(\d+)"),
+    re.compile(rb"BO_TX_BU_\s+(\d+)"),
+    re.compile(rb"CM_\s+(?:BO_|SG_)\s+(\d+)"),
+    re.compile(rb'BA_\s+"[^"]*"\s+(?:BO_|SG_)\s+(\d+)'),
+    re.compile(rb'BA_REL_\s+"[^"]*"\s+(?:BU_SG_REL_\s+\S+\s+SG_|BU_BO_REL_\s+\S+)\s+(\d+)'),
+    re.compile(rb"VAL_\s+(\d+)"),
+    re.compile(rb"SIG_VALTYPE_\s+(\d+)"),
+    re.compile(rb"SIG_GROUP_\s+(\d+)"),
+    re.compile(rb"SG_MUL_VAL_\s+(\d+)"),
+]
+BO_NAME = re.compile(rb"BO_\s+(\d+)\s+(\w+)\s*:")
+QUOTE = re.compile(rb'(?<!\\)"')
+
+index_cache = {}    # { abs_path: (mtime, size, DbcIndex) }
+index_cache_lock = threading.Lock()
+
+
+class DbcIndex:
+    """Byte ranges of every top-level statement of one DBC file."""
+
+    def __init__(self, data):
+        self.data = data
+        self.statements = []     # [(start, end, frame_id or None)] in file order
+        self.frame_ids = {}      # { message name: frame id as written in the DBC }
+        self._scan()
+
+    @classmethod
+    def load(cls, path):
+        """Index of a DBC file, cached on path + mtime + size (like backend.load_dbc)."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with index_cache_lock:
+            entry = index_cache.get(path)
+            if entry and entry[0] == stat.st_mtime and entry[1] == stat.st_size:
+                return entry[2]
+        with open(path, "rb") as f:
+            index = cls(f.read())
+        with index_cache_lock:
+            index_cache[path] = (stat.st_mtime, stat.st_size, index)
+        return index
+
+    def _scan(self):
+        starts = []
+        in_string = False
+        offset = 0
+        for line in self.data.splitlines(keepends=True):
+            if not in_string and line[:1] not in (b" ", b"\t"):
+                token = line.split(None, 1)[0].rstrip(b":").decode("latin-1") if line.strip() else ""
+                if token in KEYWORDS:
+                    starts.append(offset)
+            if len(QUOTE.findall(line)) % 2:
+                in_string = not in_string
+            offset += len(line)
+
+        bounds = ([0] if not starts or starts[0] else []) + starts + [len(self.data)]
+        for start, end in zip(bounds, bounds[1:]):
+            head = self.data[start:min(end, start + 256)]
+            frame_id = None
+            for pattern in MESSAGE_STATEMENTS:
+                match = pattern.match(head)
+                if match:
+                    frame_id = int(match.group(1))
+                    break
+            if head.startswith(b"BO_ ") or head.startswith(b"BO_\t"):
+                name = BO_NAME.match(head)
+                if name:
+                    self.frame_ids[name.group(2).decode("latin-1")] = int(name.group(1))
+            self.statements.append((start, end, frame_id))
+
+    @property
+    def message_names(self):
+        return list(self.frame_ids)
+
+    def subset(self, message_names):
+        """DBC bytes with only `message_names` (unknown names raise KeyError)."""
+        unknown = [name for name in message_names if name not in self.frame_ids]
+        if unknown:
+            raise KeyError(f"not in the parent DBC: {', '.join(unknown)}")
+        keep = {self.frame_ids[name] for name in message_names}
+        data = self.data
+        return b"".join(data[start:end] for start, end, frame_id in self.statements
+                        if frame_id is None or frame_id in keep)
+
+    def write_subset(self, message_names, out_path):
+        data = self.subset(message_names)
+        with open(out_path, "wb") as f:
+            f.write(data)
+        return out_path
+
+
+def save_subset(parent_path, message_names, out_path):
+    """Write a DBC with the selected messages of parent_path (and all their metadata)."""
+    return DbcIndex.load(parent_path).write_subset(message_names, out_path)
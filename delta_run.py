@@ -0,0 +1,152 @@
+"""
+Delta re-validation: only re-test the signals that changed since the last run.
+
+    fps = delta_run.fingerprints(signal_dict, timedelay, db, canid_to_signalname, prop_types)
+    delta = delta_run.DeltaRun(delta_run.state_path("results.xlsx"), fps, timedelay, validated=signals)
+    delta.rerun      # signals to drive and judge this run
+    delta.carried    # signals whose previous results are carried forward
+
+A signal's fingerprint covers its vector column (time rows + values), its
+DBC definition (frame, id, bit layout, scaling, range, value table) and its
+VHAL property id / type. A signal is re-run when its fingerprint changed,
+when it is new, or when any step of its last run was not a PASS; the
+others keep the RX values and verdicts stored in the state file
+(<results>.delta.json) from the run that validated them.
+
+backend.apply_delta() narrows the step plan to the frames of the re-run
+signals; when nothing changed, the run has no steps and only the previous
+results are written. Step timing is never changed, so a partial re-run
+still sees the vector's time delays.
+"""
+import hashlib
+import json
+import os
+
+import backend
+import dbc_diff
+import log
+import rx_verdict
+
+STATE_VERSION = 1
+
+
+def state_path(results_path):
+    return os.path.splitext(results_path)[0] + ".delta.json"
+
+
+def fingerprints(signal_dict, timedelay, db, canid_to_signalname, prop_types):
+    """{ signal: sha1 hex } over vector column + DBC definition + VHAL property."""
+    prop_of = {sig: key for key, names in canid_to_signalname.items() for sig in names}
+    dbc_signals = {}
+    for msg in db.messages:
+        for sig in msg.signals:
+            dbc_signals.setdefault(sig.name, (msg, sig))
+
+    steps = [str(td) for td in timedelay]
+    result = {}
+    for name, td_values in signal_dict.items():
+        definition = None
+        if name in dbc_signals:
+            msg, sig = dbc_signals[name]
+            fields = dbc_diff.signal_fields(sig)
+            fields["choices"] = sorted(fields["choices"].items())
+            definition = (msg.name, msg.frame_id, msg.is_extended_frame, sorted(fields.items()))
+        prop = prop_of.get(name)
+        key = (steps, sorted((str(td), repr(value)) for td, value in td_values.items()),
+               definition, prop, prop_types.get(prop, "FLOAT") if prop else None)
+        result[name] = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return result
+
+
+class DeltaRun:
+    """Which signals to re-test, what they produced, and the state file that remembers it."""
+
+    def __init__(self, path, fingerprints, timedelay, validated=()):
+        self.path = path
+        self.fingerprints = fingerprints
+        self.validated = set(validated)   # signals with a VHAL property (judged every step)
+        self.steps = [str(td) for td in timedelay]
+        self.previous = self.load(path)
+        self.rerun = {sig for sig, fp in fingerprints.items() if self.needs_rerun(sig, fp)}
+        self.carried = set(fingerprints) - self.rerun
+        self.results = {}    # { signal: {"rx": {td: value}, "verdicts": {td: verdict}} } of this run
+
+    @staticmethod
+    def load(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning(f"⚠️ Delta state {path} unreadable, re-testing everything: {e}")
+            return {}
+        if state.get("version") != STATE_VERSION:
+            return {}
+        return state.get("signals", {})
+
+    def needs_rerun(self, sig, fingerprint):
+        entry = self.previous.get(sig)
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return True
+        if not entry.get("validated"):
+            return False   # no VHAL property: nothing to judge, unchanged → nothing to do
+        verdicts = entry.get("verdicts", {})
+        return any(verdicts.get(td) != rx_verdict.PASS for td in self.steps)
+
+    # ------------- during the run -------------
+    def record(self, td, rx_values, verdicts):
+        td = str(td)
+        for sig in self.rerun:
+            entry = self.results.setdefault(sig, {"rx": {}, "verdicts": {}})
+            if sig in rx_values:
+                entry["rx"][td] = rx_values[sig]
+            if sig in verdicts:
+                entry["verdicts"][td] = verdicts[sig]
+
+    # ------------- after the run -------------
+    def carry_forward(self, wb, sheet, time_row, rx_col, verdict_sheet=None):
+        """Write the carried signals' previous RX values + verdicts into the Results workbook."""
+        carried_pass = {}
+        for sig in self.carried:
+            entry = self.previous[sig]
+            col = rx_col.get(sig)
+            for td, row in time_row.items():
+                key = str(td)
+                if col and key in entry.get("rx", {}):
+                    cell = sheet.cell(row=row, column=col)
+                    cell.value = entry["rx"][key]
+                    verdict = entry.get("verdicts", {}).get(key)
+                    if verdict:
+                        cell.fill = backend.verdict_fill(verdict)
+                if entry.get("verdicts", {}).get(key) == rx_verdict.PASS:
+                    carried_pass[td] = carried_pass.get(td, 0) + 1
+
+        if verdict_sheet is None or verdict_sheet not in wb.sheetnames or not carried_pass:
+            return
+        ws = wb[verdict_sheet]
+        rows = {row[0].value: row for row in ws.iter_rows(min_row=2) if row[0].value is not None}
+        for td, count in sorted(carried_pass.items()):
+            if td in rows:
+                rows[td][1].value = (rows[td][1].value or 0) + count
+            else:
+                ws.append((td, count, 0, 0, None))
+
+    def save(self):
+        signals = {sig: self.previous[sig] for sig in self.carried}
+        for sig in self.rerun:
+            entry = self.results.get(sig, {"rx": {}, "verdicts": {}})
+            signals[sig] = {
+                "fingerprint": self.fingerprints[sig],
+                "validated": sig in self.validated,
+                "rx": entry["rx"],
+                "verdicts": entry["verdicts"],
+            }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "signals": signals}, f, default=str)
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        return (f"{len(self.rerun)}/{len(self.fingerprints)} signals re-tested, "
+                f"{len(self.carried)} carried forward")
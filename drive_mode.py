@@ -0,0 +1,88 @@
+"""
+Drive-mode state cache.
+
+The mode is read from the shared VHAL property index that the RX poller
+(backend.validate_vhal_layer) publishes after every dumpsys, so nothing in
+the heartbeat loop ever waits for adb. Listeners are told about changes.
+"""
+import threading
+import time
+
+# Mode mapping (Drive_mode_prop_ID int32 value)
+MODES = {
+    0: "VL1_SNA",
+    1: "Sleep",
+    2: "Awake",
+    3: "Standby",
+    4: "Drive",
+    5: "Charge"
+}
+DRIVE = 4
+UNKNOWN = -1
+
+
+def normalize_prop_id(prop_id):
+    """'0x2140805F' / '2140805f' → '2140805f' (the key used in the property index)."""
+    return str(prop_id).lower().replace("0x", "").strip()
+
+
+def parse_int_value(raw):
+    """VHAL int32Values text such as '4' or '4, 0' → 4; anything else → UNKNOWN."""
+    try:
+        return int(str(raw).split(",")[0].strip().strip("[]"))
+    except (TypeError, ValueError):
+        return UNKNOWN
+
+
+class DriveModeMonitor:
+    """Holds the last drive mode seen in the VHAL property index."""
+
+    def __init__(self, prop_id):
+        self.prop_key = normalize_prop_id(prop_id)
+        self.mode = UNKNOWN
+        self.updated_at = None      # time.time() of the last property index that had the mode
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return MODES.get(self.mode, "Unknown")
+
+    @property
+    def is_drive(self):
+        return self.mode == DRIVE
+
+    def add_listener(self, callback):
+        """callback(old_mode, new_mode) runs on the RX poller thread on every change."""
+        self.listeners.append(callback)
+
+    def set_prop_id(self, prop_id):
+        self.prop_key = normalize_prop_id(prop_id)
+
+    def update_from_props(self, props):
+        """props: { 'prop_key': 'raw value text' } from one VHAL dump."""
+        if self.prop_key not in props:
+            return
+        new_mode = parse_int_value(props[self.prop_key])
+        with self._lock:
+            old_mode = self.mode
+            self.mode = new_mode
+            self.updated_at = time.time()
+        if new_mode != old_mode:
+            for callback in list(self.listeners):
+                try:
+                    callback(old_mode, new_mode)
+                except Exception as e:
+                    print(f"⚠️ drive mode listener error: {e}")
+
+    def mark_unknown(self):
+        """Device gone → the cached mode is no longer trustworthy."""
+        with self._lock:
+            old_mode = self.mode
+            self.mode = UNKNOWN
+        if old_mode != UNKNOWN:
+            for callback in list(self.listeners):
+                try:
+                    callback(old_mode, UNKNOWN)
+                except Exception as e:
+                    print(f"⚠️ drive mode listener error: {e}")
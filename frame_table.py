@@ -0,0 +1,77 @@
+"""
+Frame table shared by the periodic CAN senders.
+
+Writers (synchronized worker, GUI "Send signal", sessions) encode the
+complete next set of frames once and publish it as a new immutable
+generation with a single reference swap. The heartbeat sender reads
+`table.current` once per cycle and sends exactly that generation: no lock,
+no list copies, no re-encoding, and never a half-updated frame.
+"""
+import threading
+from collections import namedtuple
+
+# data is the encoded payload (bytes) ready for can.Message
+FrameEntry = namedtuple("FrameEntry", "frame_name frame_id is_extended data")
+FrameGeneration = namedtuple("FrameGeneration", "version entries")
+
+
+def frame_id_to_int(frame_id):
+    return int(frame_id, 16) if isinstance(frame_id, str) else int(frame_id)
+
+
+def build_entries(frames, dbs):
+    """
+    frames: [{"frame_name", "can_id", "signals"}] (heart_beat_signals / user_send_signals layout)
+    dbs:    cantools databases tried in order for each frame id
+    Returns (entries, errors) where errors is [(frame_name, message)] for
+    frames that are not in any DBC or do not encode.
+    """
+    entries = []
+    errors = []
+    for frame in frames:
+        frame_name = frame.get("frame_name", "?")
+        try:
+            frame_id = frame_id_to_int(frame["can_id"])
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append((frame_name, f"bad can_id: {e}"))
+            continue
+
+        message = None
+        for db in dbs:
+            try:
+                message = db.get_message_by_frame_id(frame_id)
+                break
+            except KeyError:
+                continue
+        if message is None:
+            errors.append((frame_name, f"0x{frame_id:x} not in DBC"))
+            continue
+
+        try:
+            data = bytes(message.encode(dict(frame["signals"])))
+        except Exception as e:
+            errors.append((frame_name, str(e)))
+            continue
+        entries.append(FrameEntry(frame_name, frame_id, message.is_extended_frame, data))
+    return entries, errors
+
+
+class FrameTable:
+    """Current generation of frames; readers take `current`, writers call publish()."""
+
+    def __init__(self):
+        self._current = FrameGeneration(0, ())
+        self._write_lock = threading.Lock()   # orders writers only, readers never wait
+
+    @property
+    def current(self):
+        return self._current
+
+    def publish(self, entries):
+        with self._write_lock:
+            generation = FrameGeneration(self._current.version + 1, tuple(entries))
+            self._current = generation
+        return generation
+
+    def clear(self):
+        return self.publish(())
@@ -3,17 +3,21 @@ import shutil
 import tkinter as tk
 import tkinter.messagebox as tkmsg
 from tkinter import ttk
-import cantools
 from tkinter import filedialog
-import re
+import copy
 import importlib
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
 import config
 import backend
+import profiling
+import dbc_subset
 from backend import ui_queue
+from runtime_config import update_config_file_runtime
+from vector_sheet import create_excel_sheet
 import threading
 
+# heavy libraries are imported on first use (see backend.LazyModule)
+cantools = backend.LazyModule("cantools")
+
 # -------------------
 # Global GUI root
 # -------------------
@@ -27,6 +31,8 @@ tree = None
 tree_frame = None
 second_frame_global = None
 connect_button_status_global = None
+adb_status_global = None
+metrics_status_global = None
 send = None
 
 # Search UI globals
@@ -35,86 +41,6 @@ search_entry = None
 current_results = []
 current_index = -1
 
-# -----------------------
-# Utility: update config file at runtime
-# -----------------------
-def update_config_file_runtime(variable_name, variable_value):
-    """
-    Safely updates a variable in config.py on disk.
-    Keeps a readable representation and avoids extra brackets.
-    """
-    config_path = "config.py"
-
-    with open(config_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    variable_found = False
-    start_index = end_index = None
-
-    for i, line in enumerate(lines):
-        if re.match(rf'^\s*{variable_name}\s*=', line):
-            variable_found = True
-            start_index = i
-            # detect block end
-            end_index = i + 1
-            open_brackets = 0
-            while end_index < len(lines):
-                line_stripped = lines[end_index].strip()
-                open_brackets += line_stripped.count("[") + line_stripped.count("{")
-                open_brackets -= line_stripped.count("]") + line_stripped.count("}")
-                if open_brackets <= 0 and (re.match(r'^\s*\w+\s*=', line_stripped) or line_stripped == ""):
-                    break
-                end_index += 1
-            if end_index >= len(lines):
-                end_index = len(lines)
-            break
-
-    new_lines = []
-    indent = "    "
-
-    if isinstance(variable_value, list) and all(isinstance(item, dict) for item in variable_value):
-        new_lines.append(f"{variable_name} = [\n")
-        for idx, item in enumerate(variable_value):
-            new_lines.append(indent + "{\n")
-            for k, v in item.items():
-                if k == "signals" and isinstance(v, dict):
-                    new_lines.append(f"{indent * 2}'signals': {{\n")
-                    for sk, sv in v.items():
-                        new_lines.append(f"{indent * 3}'{sk}': {sv},\n")
-                    new_lines.append(f"{indent * 2}}},\n")
-                else:
-                    new_lines.append(f"{indent * 2}'{k}': {repr(v)},\n")
-            new_lines.append(indent + "}" + ("," if idx < len(variable_value) - 1 else "") + "\n")
-        new_lines.append("]\n")
-
-    elif isinstance(variable_value, dict):
-        new_lines.append(f"{variable_name} = {{\n")
-        for k, v in variable_value.items():
-            new_lines.append(f"{indent}'{k}': {repr(v)},\n")
-        new_lines.append("}\n")
-
-    elif isinstance(variable_value, (int, float, bool)):
-        new_lines.append(f"{variable_name} = {variable_value}\n")
-    elif isinstance(variable_value, str):
-        safe_path = variable_value.replace("\\", "/")
-        new_lines.append(f'{variable_name} = r"{safe_path}"\n')
-        #new_lines.append(f'{variable_name} = "{variable_value}"\n')
-    else:
-        new_lines.append(f"{variable_name} = {repr(variable_value)}\n")
-
-    if variable_found:
-        if start_index > 0 and lines[start_index - 1].strip().startswith("#"):
-            start_index -= 1
-        lines[start_index:end_index] = new_lines
-    else:
-        if not lines or not lines[-1].endswith("\n"):
-            lines.append("\n")
-        lines.extend(["\n"] + new_lines)
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        f.writelines(lines)
-
-
 # -----------------------
 # Browse / load DBC + vector sheet
 # -----------------------
@@ -204,10 +130,6 @@ def browse_files(messagebox, show_btn, send_btn, auto_send_btn, validate_btn, se
             backend.cached_property_list.cache_clear()
         except Exception:
             pass
-        try:
-            backend.REGEX_CACHE.clear()
-        except Exception:
-            pass
         try:
             backend.EXCEL_FAST_CACHE.clear()
             backend.EXCEL_FAST_CACHE.update({
@@ -233,6 +155,9 @@ def browse_files(messagebox, show_btn, send_btn, auto_send_btn, validate_btn, se
     except Exception as e:
         print(f"⚠️ backend refresh failed: {e}")
 
+    # DBC is loaded → the heartbeat sender is needed from now on
+    backend.lifecycle.start_heartbeat()
+
     update_ui_from_queue()
 
 
@@ -270,6 +195,7 @@ def clear_text(messagebox, show_btn, send_btn, auto_send_btn, browse_button, val
         update_config_file_runtime("Vehicle_propID_type", {})
         update_config_file_runtime("heart_beat_signals", list(backend.original_heartbeat_backup))
         importlib.reload(config)
+        backend.publish_send_signals(copy.deepcopy(config.heart_beat_signals), [])
     except Exception as e:
         print(f"⚠️ Failed to clear user_send_signals: {e}")
     # ======================================================
@@ -343,12 +269,6 @@ def clear_text(messagebox, show_btn, send_btn, auto_send_btn, browse_button, val
         except Exception:
             pass
 
-        # clear regex cache and other caches
-        try:
-            backend.REGEX_CACHE.clear()
-        except Exception:
-            pass
-
         print("🔁 All backend caches cleared")
     except Exception as e:
         print("⚠️ Failed clearing backend cache:", e)
@@ -563,40 +483,8 @@ def generate_dbc(messagebox=None, show=None, send=None, auto_send=None, browse_b
         save_path = os.path.join(files_dir, save_name)
 
         try:
-            # ✅ Load full DBC text
-            with open(dbc_path, "r", encoding="utf-8", errors="ignore") as full_file:
-                lines = full_file.readlines()
-
-            selected_msgs = [m for m in db.messages if m.name in selected_frames]
-            selected_names = [m.name for m in selected_msgs]
-
-            new_dbc_lines = []
-            copying = False
-            frame_name = None
-
-            for line in lines:
-                if line.startswith("BO_ "):
-                    frame_name = line.split(":")[0].split()[-1]
-                    copying = frame_name in selected_names
-
-                if copying:
-                    new_dbc_lines.append(line)
-
-                # Detect next frame start and end previous
-                if copying and line.strip() == "":
-                    new_dbc_lines.append("\n")
-                    copying = False
-
-            # ✅ Write header + selected frames to new file
-            with open(save_path, "w", encoding="utf-8") as out_file:
-                # Copy header portion until first BO_
-                for line in lines:
-                    if line.startswith("BO_ "):
-                        break
-                    out_file.write(line)
-                # Write selected frame definitions
-                for line in new_dbc_lines:
-                    out_file.write(line)
+            # ✅ Selected frames + their comments / attributes / value tables
+            dbc_subset.save_subset(dbc_path, selected_frames, save_path)
 
             tkmsg.showinfo("Success", f"✅ DBC file saved successfully to:\n{save_path}")
 
@@ -622,116 +510,6 @@ def generate_dbc(messagebox=None, show=None, send=None, auto_send=None, browse_b
 
 
 
-# -----------------------
-# Create Excel sheet from DBC (kept from your file)
-# -----------------------
-def create_excel_sheet(TYPE_H_PATH, DBC_PATH, OUTPUT_XLSX):
-    # Build quick lookup for heartbeat values:
-    heartbeat_lookup = {}  # { frame_name: {signal: value} }
-
-    for hb in config.heart_beat_signals:
-        fname = hb["frame_name"]
-        heartbeat_lookup[fname] = hb["signals"]
-    try:
-        db = cantools.database.load_file(DBC_PATH)
-        frame_names = {msg.name for msg in db.messages}
-        frame_list = [{"Can_Messages": msg.name, "Can_ID": hex(msg.frame_id)} for msg in db.messages]
-
-        pattern = re.compile(r"([A-Za-z0-9_]+)__([A-Za-z0-9_]+)_[RT]X_V\s*=\s*(\d+)", re.IGNORECASE)
-
-        # --------------------------------------------------------------
-        # STEP 1: Build FULL signal list from DBC
-        # --------------------------------------------------------------
-        dbc_signals = []  # temporary list containing all signals from DBC
-        for msg in db.messages:
-            for sig in msg.signals:
-                dbc_signals.append({
-                    "message": msg.name,
-                    "signal": sig.name,
-                    "property_id": "N/A"  # default if type.h not found
-                })
-
-        # --------------------------------------------------------------
-        # STEP 2: Read TYPE_H file and build lookup
-        # --------------------------------------------------------------
-        typeh_lookup = {}
-        with open(TYPE_H_PATH, "r", encoding="utf-8") as f:
-            for line in f:
-                match = pattern.search(line)
-                if match:
-                    msg_name = match.group(1)
-                    signal_name = match.group(2)
-                    prop_id_dec = int(match.group(3))
-                    typeh_lookup[(msg_name, signal_name)] = hex(prop_id_dec)
-
-        # --------------------------------------------------------------
-        # STEP 3: Merge type.h values into full DBC signal list
-        # --------------------------------------------------------------
-        signals = []
-        for entry in dbc_signals:
-            key = (entry["message"], entry["signal"])
-            entry["property_id"] = typeh_lookup.get(key, "N/A")
-            signals.append(entry)
-
-        wb = Workbook()
-        ws1 = wb.active
-        ws1.title = "CAN_Signals"
-        ws1["A1"] = "Property ID"
-        ws1["A2"] = "Time (ms)"
-
-        for idx, sig in enumerate(signals, start=2):
-            col = get_column_letter(idx)
-            ws1[f"{col}1"] = sig["property_id"]
-            ws1[f"{col}2"] = sig["signal"]
-
-        time_values = [1000, 2000, 3000]
-        for r, t in enumerate(time_values, start=3):
-            ws1[f"A{r}"] = t
-            for c, sig in enumerate(signals, start=2):
-                col_letter = get_column_letter(c)
-
-                frame_name = sig["message"]
-                signal_name = sig["signal"]
-
-                # Default Tx value
-                tx_val = 0
-
-                # If heartbeat frame → use heartbeat default value
-                if frame_name in heartbeat_lookup:
-                    if signal_name in heartbeat_lookup[frame_name]:
-                        tx_val = heartbeat_lookup[frame_name][signal_name]
-
-                ws1[f"{col_letter}{r}"] = tx_val
-
-        ws2 = wb.create_sheet("FrameID")
-        ws2.append(["Can_Messages", "Can_ID"])
-        for frame in frame_list:
-            ws2.append([frame["Can_Messages"], frame["Can_ID"]])
-
-        ws3 = wb.create_sheet("Results")
-        ws3["A1"] = "Property ID"
-        ws3["A2"] = "Time (ms)"
-
-        col_idx = 2
-        for sig in signals:
-            start_col = col_idx
-            end_col = col_idx + 1
-            ws3.merge_cells(start_row=1, start_column=start_col, end_row=1, end_column=end_col)
-            ws3.cell(row=1, column=start_col, value=sig["property_id"])
-            ws3.merge_cells(start_row=2, start_column=start_col, end_row=2, end_column=end_col)
-            ws3.cell(row=2, column=start_col, value=sig["signal"])
-            ws3.cell(row=3, column=start_col, value="Tx")
-            ws3.cell(row=3, column=end_col, value="Rx Car Service")
-            col_idx += 2
-
-        wb.save(OUTPUT_XLSX)
-        print(f"✅ Excel file generated successfully: {OUTPUT_XLSX}")
-        return True
-    except Exception as e:
-        print(f"❌ Failed to create Excel: {e}")
-        return False
-
-
 # -----------------------
 # Treeview create_table (professional table)
 # -----------------------
@@ -807,6 +585,11 @@ def create_table(second_frame, browse_button):
     tree_local.column("Value_Tx", width=120, anchor="center", stretch=False)
     tree_local.column("Car_Service_Rx", width=160, anchor="center", stretch=False)
 
+    # Row colours for the TX vs VHAL verdicts (same as the Results sheet)
+    import rx_verdict
+    for verdict, colour in rx_verdict.COLOURS.items():
+        tree_local.tag_configure(verdict, background=f"#{colour}")
+
     # Scrollbars (VH)
     vscroll = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree_local.yview)
     hscroll = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL, command=tree_local.xview)
@@ -1086,6 +869,23 @@ def update_rx_values(rx_dict):
         print(f"⚠️ update_rx_values error: {e}")
 
 
+def update_rx_verdicts(verdicts):
+    """
+    verdicts: { signal_name: "PASS" / "FAIL" / "NO RX" }
+    Colour each signal's row with its verdict tag.
+    """
+    if not verdicts or tree is None:
+        return
+    try:
+        rows = {tree.set(iid, "Signals"): iid for iid in tree.get_children()}
+        for sig_name, verdict in verdicts.items():
+            iid = rows.get(sig_name)
+            if iid is not None:
+                tree.item(iid, tags=(verdict,))
+    except Exception as e:
+        print(f"⚠️ update_rx_verdicts error: {e}")
+
+
 # -----------------------
 # UI queue polling & processing
 # -----------------------
@@ -1104,6 +904,27 @@ def update_ui_from_queue():
                         connect_button_status_global.config(text="Error Connecting...", fg="red")
                 continue
 
+            # handle adb device connect / disconnect
+            if isinstance(item, dict) and "adb_status" in item:
+                if adb_status_global:
+                    if item["adb_status"] == "connected":
+                        adb_status_global.config(text="Connected", fg="#32CD32")
+                    else:
+                        adb_status_global.config(text="Not detected", fg="red")
+                continue
+
+            # drive mode change from the VHAL property index
+            if isinstance(item, dict) and "drive_mode" in item:
+                if adb_status_global and backend.adb_device_connected:
+                    adb_status_global.config(text=f"Connected ({item['drive_mode']})", fg="#32CD32")
+                continue
+
+            # synchronized worker finished / stopped → allow manual send again
+            if isinstance(item, dict) and "worker_status" in item:
+                if send:
+                    send.config(state=tk.NORMAL)
+                continue
+
             # handle tx updates nested as {"tx_update": {...}}
             if isinstance(item, dict) and "tx_update" in item:
                 try:
@@ -1112,6 +933,11 @@ def update_ui_from_queue():
                     print(f"⚠️ Failed to apply tx update: {e}")
                 continue
 
+            # TX vs VHAL verdicts of one step
+            if isinstance(item, dict) and "rx_verdict" in item:
+                update_rx_verdicts(item["rx_verdict"])
+                continue
+
             # otherwise assume rx mapping (signal_name -> value)
             if isinstance(item, dict):
                 try:
@@ -1176,11 +1002,13 @@ def read_signal_value_from_ui(second_frame):
             frame_groups.setdefault(frame_name, {})[sig_name] = tx_val
 
         new_user_send_signals = []
-        heartbeat_frames = {hb["frame_name"] for hb in config.heart_beat_signals}
+        # edit a copy; the heartbeat sender keeps using the published one until the swap
+        heartbeat_signals = copy.deepcopy(config.heart_beat_signals)
+        heartbeat_frames = {hb["frame_name"] for hb in heartbeat_signals}
         for frame_name, sig_map in frame_groups.items():
             frame_id = backend.load_vector_sheet_frameid(frame_name)
             if frame_name in heartbeat_frames and frame_id:
-                for hb in config.heart_beat_signals:
+                for hb in heartbeat_signals:
                     if hb["frame_name"] == frame_name:
                         for sig_name, val in sig_map.items():
                             if sig_name in hb["signals"]:
@@ -1192,10 +1020,7 @@ def read_signal_value_from_ui(second_frame):
                     "can_id": frame_id,
                     "signals": sig_map
                 })
-        update_config_file_runtime("heart_beat_signals", config.heart_beat_signals)
-        #update_config_file_runtime("user_send_signals", new_user_send_signals)
-        importlib.reload(config)
-        backend.user_send_signals_runtime = new_user_send_signals
+        backend.publish_send_signals(heartbeat_signals, new_user_send_signals)
         print("✅ user_send_signals updated from UI.")
 
         # Trigger backend validation (optional)
@@ -1213,6 +1038,16 @@ def validate(second_frame):
     ui_queue.put(adb_rx)
 
 
+def update_metrics_panel():
+    """Refresh the status bar from backend metrics once a second."""
+    try:
+        if metrics_status_global is not None:
+            metrics_status_global.config(text=backend.metrics_summary())
+    except Exception as e:
+        print("⚠️ metrics panel error:", e)
+    root.after(1000, update_metrics_panel)
+
+
 # -----------------------
 # Main home_page (fixed header + table area)
 # -----------------------
@@ -1230,6 +1065,10 @@ def home_page():
     header_frame = tk.Frame(root, bg="#2C3E50")
     header_frame.pack(fill=tk.X)
 
+    # Runtime metrics status bar (bottom), refreshed by update_metrics_panel()
+    status_bar = tk.Label(root, text="", anchor="w", bg="#2C3E50", fg="#BDC3C7", font=("Consolas", 9))
+    status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+    globals()["metrics_status_global"] = status_bar
 
     # Main frame where Treeview will live
     main_frame = tk.Frame(root, bg="#F2F4F7")
@@ -1251,6 +1090,14 @@ def home_page():
     connect_status.grid(row=0, column=1, pady=8, padx=8, sticky="w")
     globals()["connect_button_status_global"] = connect_status
 
+    info_label_adb = tk.Label(header_frame, text="ADB Device :", bg="#2C3E50", fg="#FFFFFF", font=("Segoe UI", 11, "bold"))
+    info_label_adb.grid(row=0, column=2, pady=8, padx=8, sticky="w")
+
+    # ADB device status label (pushed by backend.adb_device_tracker)
+    adb_status = tk.Label(header_frame, text="Checking...", bg="#2C3E50", fg="#FFFFFF", font=("Segoe UI", 11, "bold"))
+    adb_status.grid(row=0, column=3, pady=8, padx=8, sticky="w")
+    globals()["adb_status_global"] = adb_status
+
     info_label1 = tk.Label(header_frame, text="Load dbc files : ", bg="#2C3E50", fg="#FFFFFF", font=("Segoe UI", 11, "bold"))
     info_label1.grid(row=1, column=0, pady=8, padx=8, sticky="w")
 
@@ -1311,11 +1158,13 @@ def home_page():
     search_icon_btn.grid(row=0, column=5, padx=8)  # adjust row/column if you want it top-right
     globals()["search_icon_global"] = search_icon_btn
     # Backend initial checks
+    backend.lifecycle.start()
     backend.check_peak_device_interface_name()
     backend.make_can_interface_up()
 
     # Start UI queue polling
     root.after(100, update_ui_from_queue)
+    root.after(1000, update_metrics_panel)
 
     globals()["second_frame_global"] = second_frame
     # update globals for search
@@ -1326,7 +1175,7 @@ def home_page():
     root.bind("<Control-f>", lambda e: open_search_inline(tree, header_frame_global, search_icon_global))
     root.bind("<Control-F>", lambda e: open_search_inline(tree, header_frame_global, search_icon_global))
 
-    root.mainloop()
+    profiling.wrap("tk_mainloop", root.mainloop)()
 
 
 
@@ -0,0 +1,149 @@
+"""
+Event-driven CAN link state.
+
+Linux: the link flag is read from /sys/class/net/<if>/flags (IFF_UP) and
+/sys/class/net/<if>/operstate, and re-read whenever rtnetlink reports a
+link change (RTMGRP_LINK), so no `ip link show` process is spawned.
+Windows: PCAN detection is polled from the watcher thread, once a second,
+instead of from every heartbeat cycle.
+
+Readers (heartbeat loop, PEAK monitor) only look at the cached flag.
+"""
+import os
+import socket
+import threading
+
+import config
+
+IFF_UP = 0x1
+RTMGRP_LINK = 0x1
+POLL_FALLBACK_S = 1.0   # re-check at least this often, even without events
+
+
+def read_link_state(interface_name):
+    """
+    Return 1 if the interface exists and is administratively UP, else 0.
+    Linux only; reads sysfs, never spawns a process.
+    """
+    base = os.path.join("/sys/class/net", interface_name)
+    try:
+        with open(os.path.join(base, "flags"), "r") as f:
+            flags = int(f.read().strip(), 16)
+    except (OSError, ValueError):
+        return 0
+    if not flags & IFF_UP:
+        return 0
+    try:
+        with open(os.path.join(base, "operstate"), "r") as f:
+            operstate = f.read().strip()
+    except OSError:
+        operstate = "unknown"
+    # CAN links report "up"; virtual/vcan links report "unknown" while up
+    return 0 if operstate in ("down", "lowerlayerdown", "notpresent") else 1
+
+
+def detect_pcan():
+    """Windows: 1 if a PCAN channel is present (python-can config detection)."""
+    import can
+    try:
+        return 1 if can.detect_available_configs(interfaces=["pcan"]) else 0
+    except Exception as e:
+        print("PCAN detection error:", e)
+        return 0
+
+
+class CanLinkWatcher:
+    """
+    Keeps `state` (1/0) for one CAN interface up to date from a background thread.
+    interface_name=None follows config.Peak_interface_name.
+    device: optional callable returning the testing device (default config.Testing_device).
+    """
+
+    def __init__(self, interface_name=None, device=None):
+        self.interface_name = interface_name
+        self.device = device
+        self.watched_name = None
+        self.state = 0
+        self.listeners = []
+        self.changed = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ------------- public -------------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="can-link-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_listener(self, callback):
+        """callback(interface_name, state) runs on the watcher thread on every change."""
+        self.listeners.append(callback)
+
+    def refresh(self):
+        """Re-read the link state now; notifies listeners when it changed."""
+        name = self.interface_name or config.Peak_interface_name
+        device = self.device() if self.device else config.Testing_device
+        if device == "Simulation":
+            state = 1
+        elif device == "Linux":
+            state = read_link_state(name)
+        elif device == "Windows":
+            state = detect_pcan()
+        else:
+            state = 0
+
+        previous = self.state if self.watched_name == name else None
+        self.watched_name = name
+        self.state = state
+        if state != previous:
+            self.changed.set()
+            for callback in list(self.listeners):
+                try:
+                    callback(name, state)
+                except Exception as e:
+                    print(f"⚠️ link listener error: {e}")
+        return state
+
+    # ------------- thread -------------
+    def _open_netlink(self):
+        device = self.device() if self.device else config.Testing_device
+        if device != "Linux" or not hasattr(socket, "AF_NETLINK"):
+            return None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK))
+            sock.settimeout(POLL_FALLBACK_S)
+            return sock
+        except OSError as e:
+            print(f"⚠️ rtnetlink unavailable, polling sysfs instead: {e}")
+            return None
+
+    def _run(self):
+        sock = self._open_netlink()
+        try:
+            while not self._stop.is_set():
+                if sock is not None:
+                    try:
+                        # any RTM_NEWLINK / RTM_DELLINK message → re-read sysfs
+                        sock.recv(65536)
+                    except socket.timeout:
+                        pass
+                    except OSError:
+                        sock.close()
+                        sock = None
+                        continue
+                else:
+                    self._stop.wait(POLL_FALLBACK_S)
+                self.refresh()
+        finally:
+            if sock is not None:
+                sock.close()
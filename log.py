@@ -0,0 +1,80 @@
+"""
+Leveled, rate-limited console logging for the worker loops.
+
+    import log
+    log.debug(f"📥 RX updated ...")                      # hidden unless Log_level = "DEBUG"
+    log.every("hb_peak_down", 5, "❌ PEAK interface is down")   # at most once per 5 s
+
+Messages keep the emoji print() style of the rest of the tool; the level
+comes from config.Log_level (DEBUG / INFO / WARNING / ERROR).
+"""
+import threading
+import time
+
+import config
+import metrics
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+
+level = LEVELS.get(str(getattr(config, "Log_level", "INFO")).upper(), INFO)
+
+_last_emit = {}          # { key: (time, suppressed_count) }
+_rate_lock = threading.Lock()
+_suppressed = metrics.counter("log_suppressed_total", "Log lines dropped by rate limiting")
+
+
+def set_level(name):
+    global level
+    level = LEVELS.get(str(name).upper(), INFO)
+
+
+def enabled(lvl):
+    return lvl >= level
+
+
+def emit(lvl, message):
+    if lvl >= level:
+        print(message)
+
+
+def debug(message):
+    if DEBUG >= level:
+        print(message)
+
+
+def info(message):
+    if INFO >= level:
+        print(message)
+
+
+def warning(message):
+    if WARNING >= level:
+        print(message)
+
+
+def error(message):
+    if ERROR >= level:
+        print(message)
+
+
+def every(key, interval_s, message, lvl=WARNING):
+    """
+    Print `message` at most once per interval_s for this key.
+    The next printed line says how many were dropped in between.
+    """
+    if lvl < level:
+        return False
+    now = time.monotonic()
+    with _rate_lock:
+        last, dropped = _last_emit.get(key, (None, 0))
+        if last is not None and now - last < interval_s:
+            _last_emit[key] = (last, dropped + 1)
+            _suppressed.inc()
+            return False
+        _last_emit[key] = (now, 0)
+    print(f"{message} (+{dropped} similar suppressed)" if dropped else message)
+    return True
@@ -1,6 +1,8 @@
+import argparse
 import os
 import psutil
 import sys
+import time
 
 # Cross-platform lock file path (Windows + Linux)
 LOCK_FILE = os.path.join(os.path.expanduser("~"), ".can_assure_app.pid")
@@ -37,10 +39,33 @@ check_already_running()
 
 #
 import gui
+import backend
+import config
+import profiling
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Can_AssuRE")
+    parser.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                        help="profile the session (default DIR: profile_<time> next to the vector sheet)")
+    args, _ = parser.parse_known_args(argv)
+    return args
 
 
 def main():
-    gui.main(gui.root)
+    args = parse_args()
+    if args.profile is not None:
+        profile_dir = args.profile or os.path.join(
+            os.path.dirname(os.path.abspath(config.file_path)),
+            time.strftime("profile_%Y%m%d_%H%M%S")
+        )
+        profiling.enable(profile_dir)
+    try:
+        gui.main(gui.root)
+    finally:
+        if profiling.enabled:
+            backend.lifecycle.stop_workers()
+            profiling.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+"""
+Runtime metrics for the worker threads.
+
+    import metrics
+    frames_sent = metrics.counter("frames_sent_total", "CAN frames sent")
+    frames_sent.inc()
+    with metrics.histogram("loop_seconds", "Loop duration", loop="heartbeat").time():
+        ...
+    metrics.snapshot()                    # dict for the GUI / headless runner
+    metrics.write_prometheus(path)        # text exposition format
+
+Every writer thread keeps its own slot inside a counter/histogram (a dict
+keyed by thread id, written only by that thread), so the hot loops never
+take a lock; readers merge the slots when they take a snapshot.
+"""
+import bisect
+import os
+import threading
+import time
+
+PREFIX = "can_assure_"
+
+# seconds; covers 0.5 ms heartbeat sends up to 10 s adb dumps
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = {}               # { (name, labels): metric }
+_registry_lock = threading.Lock()
+_last_counter_values = {}    # { key: (time, value) } → rates between snapshots
+_exporter_thread = None
+_exporter_stop = threading.Event()
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Counter:
+    """Monotonic count (frames sent, errors, ...)."""
+    kind = "counter"
+
+    def __init__(self, name, help_text="", labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._slots = {}     # { thread_id: count }
+
+    def inc(self, amount=1):
+        ident = threading.get_ident()
+        self._slots[ident] = self._slots.get(ident, 0) + amount
+
+    @property
+    def value(self):
+        return sum(list(self._slots.values()))
+
+
+class Gauge:
+    """Last set value, or the value of a callback read at snapshot time."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text="", labels=(), func=None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.func = func
+        self._value = 0
+
+    def set(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        if self.func is not None:
+            try:
+                return self.func()
+            except Exception:
+                return None
+        return self._value
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    """Bucketed distribution of durations (seconds)."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text="", labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._slots = {}     # { thread_id: [bucket counts..., +Inf, sum, max, last] }
+
+    def observe(self, value):
+        ident = threading.get_ident()
+        slot = self._slots.get(ident)
+        if slot is None:
+            slot = [0] * (len(self.buckets) + 1) + [0.0, 0.0, 0.0]
+            self._slots[ident] = slot
+        n = len(self.buckets) + 1
+        slot[bisect.bisect_left(self.buckets, value)] += 1
+        slot[n] += value
+        if value > slot[n + 1]:
+            slot[n + 1] = value
+        slot[n + 2] = value
+
+    def time(self):
+        """with hist.time(): ...  → observes the block duration."""
+        return _Timer(self)
+
+    def merged(self):
+        """(bucket_counts, sum, max, last) over all writer threads."""
+        n = len(self.buckets) + 1
+        counts = [0] * n
+        total = peak = last = 0.0
+        for slot in list(self._slots.values()):
+            slot = list(slot)
+            for i in range(n):
+                counts[i] += slot[i]
+            total += slot[n]
+            peak = max(peak, slot[n + 1])
+            last = slot[n + 2]
+        return counts, total, peak, last
+
+    def quantile(self, q, counts=None):
+        """Upper bound of the bucket holding the q-quantile (None when empty)."""
+        counts = counts if counts is not None else self.merged()[0]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        running = 0
+        for i, c in enumerate(counts):
+            running += c
+            if running >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+def _get(cls, name, help_text, labels, **kwargs):
+    key = (name, tuple(sorted(labels.items())))
+    metric = _registry.get(key)
+    if metric is None:
+        with _registry_lock:
+            metric = _registry.get(key)
+            if metric is None:
+                metric = cls(name, help_text, key[1], **kwargs)
+                _registry[key] = metric
+    return metric
+
+
+def counter(name, help_text="", **labels):
+    return _get(Counter, name, help_text, labels)
+
+
+def histogram(name, help_text="", buckets=DEFAULT_BUCKETS, **labels):
+    return _get(Histogram, name, help_text, labels, buckets=buckets)
+
+
+def gauge(name, help_text="", func=None, **labels):
+    metric = _get(Gauge, name, help_text, labels)
+    if func is not None:
+        metric.func = func
+    return metric
+
+
+# -----------------------------
+# Stats API
+# -----------------------------
+def snapshot():
+    """
+    {
+      "counters":   { "frames_sent_total": {"value": 1200, "rate": 99.8} },
+      "gauges":     { "ui_queue_depth": 3 },
+      "histograms": { 'loop_seconds{loop="heartbeat"}':
+                        {"count", "mean", "p50", "p95", "p99", "max", "last"} }
+    }
+    Counter rates are per second since the previous snapshot() call.
+    """
+    now = time.perf_counter()
+    result = {"counters": {}, "gauges": {}, "histograms": {}}
+    for metric in list(_registry.values()):
+        key = metric.name + _labels_text(metric.labels)
+        if metric.kind == "counter":
+            value = metric.value
+            previous = _last_counter_values.get(key)
+            rate = None
+            if previous and now > previous[0]:
+                rate = (value - previous[1]) / (now - previous[0])
+            _last_counter_values[key] = (now, value)
+            result["counters"][key] = {"value": value, "rate": rate}
+        elif metric.kind == "gauge":
+            result["gauges"][key] = metric.value
+        else:
+            counts, total, peak, last = metric.merged()
+            count = sum(counts)
+            result["histograms"][key] = {
+                "count": count,
+                "mean": total / count if count else None,
+                "p50": metric.quantile(0.5, counts),
+                "p95": metric.quantile(0.95, counts),
+                "p99": metric.quantile(0.99, counts),
+                "max": peak if count else None,
+                "last": last if count else None,
+            }
+    return result
+
+
+def reset():
+    """Forget all recorded values (registered metrics stay)."""
+    for metric in list(_registry.values()):
+        if metric.kind != "gauge":
+            metric._slots = {}
+    _last_counter_values.clear()
+
+
+# -----------------------------
+# Prometheus text file
+# -----------------------------
+def prometheus_text():
+    lines = []
+    seen = set()
+    for metric in sorted(_registry.values(), key=lambda m: (m.name, m.labels)):
+        full_name = PREFIX + metric.name
+        if full_name not in seen:
+            seen.add(full_name)
+            if metric.help:
+                lines.append(f"# HELP {full_name} {metric.help}")
+            lines.append(f"# TYPE {full_name} {metric.kind}")
+
+        if metric.kind == "histogram":
+            counts, total, _, _ = metric.merged()
+            running = 0
+            for bound, c in zip(list(metric.buckets) + ["+Inf"], counts):
+                running += c
+                labels = metric.labels + (("le", str(bound)),)
+                lines.append(f"{full_name}_bucket{_labels_text(labels)} {running}")
+            lines.append(f"{full_name}_sum{_labels_text(metric.labels)} {total}")
+            lines.append(f"{full_name}_count{_labels_text(metric.labels)} {running}")
+        else:
+            value = metric.value
+            if value is None:
+                continue
+            lines.append(f"{full_name}{_labels_text(metric.labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Atomic write (node_exporter textfile collector friendly)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def start_exporter(path, interval=5.0):
+    """Rewrite the Prometheus file every `interval` seconds from a daemon thread."""
+    global _exporter_thread
+    if not path or (_exporter_thread is not None and _exporter_thread.is_alive()):
+        return False
+
+    def run():
+        while not _exporter_stop.wait(interval):
+            try:
+                write_prometheus(path)
+            except OSError as e:
+                print(f"⚠️ metrics export to {path} failed: {e}")
+
+    _exporter_stop.clear()
+    _exporter_thread = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+    _exporter_thread.start()
+    print(f"📈 Prometheus metrics → {path} (every {interval:g}s)")
+    return True
+
+
+def stop_exporter():
+    _exporter_stop.set()
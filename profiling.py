@@ -0,0 +1,156 @@
+"""
+Opt-in profiling of a run (`--profile` on main.py / python -m can_assure).
+
+    profiling.enable("results_profile")
+    threading.Thread(target=profiling.wrap("heartbeat", loop)).start()
+    ...
+    profiling.finish()
+
+While enabled:
+  - every wrapped thread target runs under its own cProfile.Profile and
+    writes <name>.prof (pstats format, e.g. `snakeviz heartbeat.prof`)
+    when it returns;
+  - a sampler thread records the stack of every thread every SAMPLE_INTERVAL
+    and finish() writes them as profile.collapsed, one
+    "thread;outer;...;inner count" line per stack (flamegraph.pl / speedscope).
+finish() also writes profile_summary.txt with the top functions per .prof file.
+When profiling is off, wrap() returns the target unchanged.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+SAMPLE_INTERVAL = 0.005   # seconds between stack samples
+SUMMARY_TOP = 30          # functions per thread in profile_summary.txt
+
+enabled = False
+output_dir = None
+
+_lock = threading.Lock()
+_stats_files = []          # .prof files written so far
+_name_counts = {}          # { name: runs } → heartbeat.prof, heartbeat-2.prof, ...
+_running = {}              # { thread ident: name } profiled targets still running
+_samples = {}              # { collapsed stack: count }
+_sampler_thread = None
+_sampler_stop = threading.Event()
+
+
+def enable(directory):
+    """Start profiling; stats files go to `directory` (created if missing)."""
+    global enabled, output_dir, _sampler_thread
+    os.makedirs(directory, exist_ok=True)
+    output_dir = directory
+    enabled = True
+    _sampler_stop.clear()
+    _sampler_thread = threading.Thread(target=_sample_loop, name="profiler-sampler", daemon=True)
+    _sampler_thread.start()
+    print(f"🔬 Profiling enabled → {directory}")
+
+
+def wrap(name, func):
+    """Return func, or a wrapper that runs it under cProfile when profiling is on."""
+    if not enabled:
+        return func
+
+    @functools.wraps(func)
+    def profiled(*args, **kwargs):
+        profile = cProfile.Profile()
+        ident = threading.get_ident()
+        with _lock:
+            _running[ident] = name
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            with _lock:
+                _running.pop(ident, None)
+            _dump(name, profile)
+
+    return profiled
+
+
+def _dump(name, profile):
+    with _lock:
+        runs = _name_counts.get(name, 0) + 1
+        _name_counts[name] = runs
+        file_name = f"{name}.prof" if runs == 1 else f"{name}-{runs}.prof"
+        path = os.path.join(output_dir, file_name)
+        _stats_files.append(path)
+    try:
+        profile.dump_stats(path)
+    except Exception as e:
+        print(f"⚠️ Could not write profile {path}: {e}")
+
+
+# -----------------------------
+# Sampling profiler
+# -----------------------------
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _sample_loop():
+    own_ident = threading.get_ident()
+    while not _sampler_stop.wait(SAMPLE_INTERVAL):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", "_"))
+            key = ";".join(reversed(stack))
+            _samples[key] = _samples.get(key, 0) + 1
+
+
+# -----------------------------
+# End of run
+# -----------------------------
+def finish(timeout=5.0):
+    """
+    Stop sampling and write profile.collapsed + profile_summary.txt.
+    Waits up to `timeout` for profiled threads to return (stop them first);
+    threads still running then are only covered by the sampled stacks.
+    """
+    global enabled
+    if not enabled:
+        return None
+
+    deadline = time.time() + timeout
+    while _running and time.time() < deadline:
+        time.sleep(0.05)
+    with _lock:
+        still_running = sorted(set(_running.values()))
+
+    _sampler_stop.set()
+    if _sampler_thread is not None:
+        _sampler_thread.join(1.0)
+    enabled = False
+
+    collapsed_path = os.path.join(output_dir, "profile.collapsed")
+    with open(collapsed_path, "w", encoding="utf-8") as f:
+        for stack, count in sorted(_samples.items()):
+            f.write(f"{stack} {count}\n")
+
+    summary_path = os.path.join(output_dir, "profile_summary.txt")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        for path in list(_stats_files):
+            text = io.StringIO()
+            try:
+                stats = pstats.Stats(path, stream=text)
+                stats.sort_stats("cumulative").print_stats(SUMMARY_TOP)
+            except Exception as e:
+                text.write(f"could not read stats: {e}\n")
+            f.write(f"===== {os.path.basename(path)} =====\n{text.getvalue()}\n")
+        if still_running:
+            f.write(f"Still running at the end of the run (sampled only): {', '.join(still_running)}\n")
+
+    print(f"🔬 Profile written: {len(_stats_files)} .prof file(s), {collapsed_path}, {summary_path}")
+    return output_dir
@@ -0,0 +1,134 @@
+"""
+Runtime configuration state.
+
+config.py only holds the static defaults. Everything the tool changes
+while running (selected DBC / vector sheet, heartbeat values, property
+types, ...) lives here:
+
+  - in memory: update_config_file_runtime() sets the value on the loaded
+    `config` module immediately, so readers never need importlib.reload();
+  - on disk: runtime_state.json next to config.py, written atomically
+    (temp file + os.replace) by a debounced background flush, so a burst
+    of updates costs one write;
+  - on (re)load: the last line of config.py calls apply_overrides(), so
+    `importlib.reload(config)` and fresh processes see the same values.
+
+Kept free of Tkinter (and of `import config`) so that config.py, the GUI,
+the backend threads and the headless runner can all share it.
+"""
+import atexit
+import copy
+import json
+import os
+import sys
+import threading
+
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime_state.json")
+FLUSH_DELAY = 0.2     # seconds; updates within this window share one write
+
+_state = {}           # { variable_name: value } overrides on top of config.py
+_loaded = False
+_lock = threading.RLock()
+_flush_timer = None
+
+
+# -----------------------
+# Load / apply
+# -----------------------
+def load_state():
+    """Read STATE_PATH once (later calls use the in-memory copy)."""
+    global _loaded
+    with _lock:
+        if _loaded:
+            return _state
+        _loaded = True
+        try:
+            with open(STATE_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                _state.update(data)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable runtime state {STATE_PATH}: {e}")
+        return _state
+
+
+def apply_overrides(namespace):
+    """Called at the end of config.py: overlay runtime values on the defaults."""
+    with _lock:
+        for name, value in load_state().items():
+            namespace[name] = copy.deepcopy(value)
+
+
+def get(variable_name, default=None):
+    with _lock:
+        return copy.deepcopy(load_state().get(variable_name, default))
+
+
+# -----------------------
+# Update
+# -----------------------
+def update_config_file_runtime(variable_name, variable_value):
+    """
+    Set a config variable at runtime.
+    The loaded config module sees it at once; the state file is written
+    shortly after (see FLUSH_DELAY), or immediately via flush().
+    """
+    update_many({variable_name: variable_value})
+
+
+def update_many(values):
+    """Set several config variables with a single state-file write."""
+    global _flush_timer
+    config_module = sys.modules.get("config")
+    with _lock:
+        load_state()
+        for name, value in values.items():
+            # the state keeps its own copy, callers keep mutating theirs
+            _state[name] = copy.deepcopy(value)
+            if config_module is not None:
+                setattr(config_module, name, value)
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_DELAY, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def flush():
+    """Write the state file now (atomic: temp file + rename)."""
+    global _flush_timer
+    with _lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        if not _loaded:
+            return
+        payload = json.dumps(_state, indent=2, sort_keys=True, default=str)
+        tmp_path = f"{STATE_PATH}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, STATE_PATH)
+        except OSError as e:
+            print(f"⚠️ Failed to write runtime state {STATE_PATH}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def use_state_file(path):
+    """Flush the current state and switch to another state file (benchmarks, tests)."""
+    global STATE_PATH, _loaded
+    with _lock:
+        flush()
+        STATE_PATH = path
+        _state.clear()
+        _loaded = False
+        load_state()
+
+
+atexit.register(flush)
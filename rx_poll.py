@@ -0,0 +1,118 @@
+"""
+Adaptive pause between VHAL dumps of the RX poller.
+
+    poller = rx_poll.PollController()
+    while running:
+        start = time.perf_counter()
+        rx = backend.validate_vhal_layer()
+        poller.observe(time.perf_counter() - start, rx)
+        poller.wait()                 # or: await poller.wait_async()
+    ...
+    poller.step_changed()             # TX step published → poll fast again, right now
+
+The pause is chosen from what the poller actually sees instead of the size
+of the vector sheet:
+  - around a TX step (config.Rx_poll_boost seconds after step_changed())
+    and while the values still move, it polls at the minimum pause;
+  - once the snapshot stops changing it backs off, doubling the pause
+    every unchanged poll up to the maximum;
+  - whatever the mode, the pause never drops below what keeps the adb
+    dumps under config.Rx_poll_budget of the wall time (measured poll
+    latency, smoothed), so a slow head unit is not hammered back to back.
+"""
+import asyncio
+import threading
+import time
+
+import config
+import metrics
+
+DEFAULT_INTERVAL = (0.01, 0.5)   # min / max pause (s)
+DEFAULT_BUDGET = 0.5             # max share of wall time spent in adb dumps
+DEFAULT_BOOST = 2.0              # s of fastest polling after a TX step
+STABLE_POLLS = 3                 # unchanged polls before backing off
+COST_SMOOTHING = 0.3             # weight of the newest poll in the latency average
+
+
+def check_budget(budget):
+    """Rx_poll_budget must be a share of wall time in (0, 1]."""
+    try:
+        budget = float(budget)
+    except (TypeError, ValueError):
+        raise ValueError(f"Rx_poll_budget must be a number in (0, 1], got {budget!r}")
+    if not 0 < budget <= 1:
+        raise ValueError(f"Rx_poll_budget must be in (0, 1] (share of wall time in adb dumps), got {budget}")
+    return budget
+
+
+class PollController:
+    """Measured poll cost + signal activity → pause before the next poll."""
+
+    def __init__(self, interval=None, budget=None, boost=None):
+        self.min_interval, self.max_interval = interval or getattr(config, "Rx_poll_interval",
+                                                                   DEFAULT_INTERVAL)
+        self.budget = check_budget(budget if budget is not None
+                                   else getattr(config, "Rx_poll_budget", DEFAULT_BUDGET))
+        self.boost = getattr(config, "Rx_poll_boost", DEFAULT_BOOST) if boost is None else boost
+        self.cost = 0.0            # smoothed poll latency (s)
+        self.unchanged = 0         # polls in a row with the same snapshot
+        self.boost_until = 0.0
+        self.current = self.min_interval
+        self.last_values = None
+        self.woken = threading.Event()
+
+    # ------------- inputs -------------
+    def observe(self, seconds, values):
+        """One finished poll: its latency and the snapshot it produced."""
+        self.cost = seconds if not self.cost else (
+            COST_SMOOTHING * seconds + (1 - COST_SMOOTHING) * self.cost)
+        if values == self.last_values:
+            self.unchanged += 1
+        else:
+            self.unchanged = 0
+            self.last_values = values
+
+    def step_changed(self):
+        """A TX step went out: poll at full rate for the boost window, starting now."""
+        self.boost_until = time.perf_counter() + self.boost
+        self.unchanged = 0
+        self.woken.set()
+
+    def wake(self):
+        self.woken.set()
+
+    # ------------- decision -------------
+    def budget_floor(self):
+        """Smallest pause keeping cost / (cost + pause) within the budget."""
+        return self.cost * (1 - self.budget) / self.budget
+
+    def interval(self):
+        if time.perf_counter() < self.boost_until or self.unchanged < STABLE_POLLS:
+            target = self.min_interval
+        else:
+            backoff = min(self.unchanged - STABLE_POLLS + 1, 16)
+            target = min(self.min_interval * 2 ** backoff, self.max_interval)
+        self.current = max(target, self.budget_floor())
+        return self.current
+
+    def wait(self):
+        """Sleep until the next poll (step_changed() / wake() cut it short)."""
+        self.woken.wait(self.interval())
+        self.woken.clear()
+
+    async def wait_async(self):
+        """wait() for the asyncio core: checks for a wake-up every min_interval."""
+        deadline = time.perf_counter() + self.interval()
+        while not self.woken.is_set():
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, self.min_interval))
+        self.woken.clear()
+
+    def register_metrics(self, **labels):
+        metrics.gauge("rx_poll_interval_seconds", "Pause before the next VHAL dump",
+                      func=lambda: self.current, **labels)
+        metrics.gauge("rx_poll_cost_seconds", "Smoothed VHAL dump latency",
+                      func=lambda: self.cost, **labels)
+        return self
@@ -0,0 +1,185 @@
+"""
+TX vs VHAL comparison: one PASS / FAIL / NO RX verdict per signal and step.
+
+    comparator = rx_verdict.Comparator.build(signal_dict, timedelay, canid_to_signalname,
+                                             prop_types, [db])
+    verdicts = comparator.compare(td, rx_values)    # { signal: "PASS" / "FAIL" / "NO RX" }
+
+build() turns the vector into an expected matrix (steps × signals) once:
+every TX value is quantized to what the DBC can carry (raw = round((value -
+offset) / scale), physical = raw * scale + offset, as cantools encodes it),
+and rounded to an integer for INT32 / INT64 properties. The tolerance of a
+signal comes from its property type in Vehicle_propID_type
+(config.Rx_tolerance, absolute) plus REL_TOLERANCE of the value for the
+float32 VHAL round trip.
+
+compare() parses the RX text of every signal into one row and checks the
+whole row against the expected row with NumPy, so a step costs one parse
+per signal and a handful of array operations. BYTES / STRING properties
+(and TX cells that are not numbers) are compared as text.
+
+NumPy is optional: without it the same checks run as a Python loop.
+"""
+import math
+import time
+
+import config
+import metrics
+
+try:
+    import numpy as np
+except ImportError:   # optional dependency
+    np = None
+
+PASS = "PASS"
+FAIL = "FAIL"
+NO_RX = "NO RX"
+VERDICTS = (PASS, FAIL, NO_RX)          # index = verdict code
+COLOURS = {PASS: "C6EFCE", FAIL: "FFC7CE", NO_RX: "FFEB9C"}   # Excel good / bad / neutral
+
+NUMERIC_TYPES = ("INT32", "INT64", "FLOAT")
+INTEGER_TYPES = ("INT32", "INT64")
+DEFAULT_TOLERANCE = {"FLOAT": 0.001, "INT32": 0, "INT64": 0}
+REL_TOLERANCE = 1e-6                    # float32 carries ~7 significant digits
+MISSING_RX = ("", "Not found", "Device not found")
+
+compare_seconds = metrics.histogram("rx_compare_seconds", "Time to judge all signals of one step")
+verdicts_total = {verdict: metrics.counter("rx_verdicts_total", "RX checks by verdict", verdict=verdict)
+                  for verdict in VERDICTS}
+
+
+def rx_to_float(text):
+    """
+    VHAL value text → float: "12.5", "[12.5]", "12.5, 0.0" (first value).
+    nan when VHAL gave no value, inf when the text is not a number (never matches).
+    """
+    if text is None or text in MISSING_RX:
+        return math.nan
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        pass
+    text = str(text).strip().strip("[]").split(",")[0].strip()
+    if not text:
+        return math.nan
+    try:
+        return float(text)
+    except ValueError:
+        return math.inf
+
+
+def tolerances():
+    """{ property type: absolute tolerance }, config.Rx_tolerance over the defaults."""
+    return {**DEFAULT_TOLERANCE, **(getattr(config, "Rx_tolerance", None) or {})}
+
+
+def quantize(value, dbc_signal):
+    """The physical value a DBC signal actually carries for `value`."""
+    if dbc_signal is None or dbc_signal.is_float:
+        return value
+    scale = dbc_signal.conversion.scale or 1
+    offset = dbc_signal.conversion.offset
+    return round((value - offset) / scale) * scale + offset
+
+
+def step_column(td_values, timedelay):
+    """Value of every step, the last value standing in for a missing step (group_signals_by_frame)."""
+    fallback = td_values[max(td_values.keys())]
+    return [td_values.get(td, fallback) for td in timedelay]
+
+
+class Comparator:
+    """Expected values of every step for the signals VHAL reports."""
+
+    def __init__(self, timedelay, signals, expected, tolerance, text_signals, text_expected):
+        self.step_index = {}
+        for index, td in enumerate(timedelay):
+            self.step_index.setdefault(td, index)
+        self.signals = signals              # numeric signals, column order of `expected`
+        self.expected = expected            # steps × signals (array, or list of rows without numpy)
+        self.tolerance = tolerance          # per numeric signal
+        self.text_signals = text_signals    # compared as text
+        self.text_expected = text_expected  # steps × text signals
+        self.totals = dict.fromkeys(VERDICTS, 0)
+
+    @classmethod
+    def build(cls, signal_dict, timedelay, canid_to_signalname, prop_types, dbs):
+        dbc_signals = {sig.name: sig for db in dbs for msg in db.messages for sig in msg.signals}
+        type_tolerance = tolerances()
+        timedelay = list(timedelay)
+
+        signals, columns, tolerance = [], [], []
+        text_signals, text_columns = [], []
+        for prop_key, names in canid_to_signalname.items():
+            prop_type = prop_types.get(prop_key, "FLOAT")   # same default as parse_vhal_dump
+            for sig in names:
+                if not signal_dict.get(sig):
+                    continue   # no TX value to compare with
+                column = step_column(signal_dict[sig], timedelay)
+                if prop_type in NUMERIC_TYPES:
+                    try:
+                        dbc_signal = dbc_signals.get(sig)
+                        column = [quantize(float(value), dbc_signal) for value in column]
+                    except (TypeError, ValueError):
+                        prop_type = None   # not a number in the vector: compare as text
+                if prop_type not in NUMERIC_TYPES:
+                    text_signals.append(sig)
+                    text_columns.append([str(value).strip() for value in column])
+                    continue
+                if prop_type in INTEGER_TYPES:
+                    column = [float(round(value)) for value in column]
+                signals.append(sig)
+                columns.append(column)
+                tolerance.append(float(type_tolerance.get(prop_type, 0)))
+
+        expected = [list(row) for row in zip(*columns)] if columns else [[] for _ in timedelay]
+        if np is not None:
+            expected = np.array(expected, dtype=np.float64).reshape(len(timedelay), len(signals))
+            tolerance = np.array(tolerance, dtype=np.float64)
+        text_expected = [list(row) for row in zip(*text_columns)] if text_columns else [[] for _ in timedelay]
+        return cls(timedelay, signals, expected, tolerance, text_signals, text_expected)
+
+    def compare(self, td, rx_values):
+        """{ signal: verdict } for one step; {} for a step that is not in the vector."""
+        index = self.step_index.get(td)
+        if index is None:
+            return {}
+        start = time.perf_counter()
+        get = rx_values.get
+        rx = [rx_to_float(get(sig)) for sig in self.signals]
+
+        if np is not None:
+            rx = np.array(rx, dtype=np.float64)
+            expected = self.expected[index]
+            with np.errstate(invalid="ignore"):
+                ok = np.abs(rx - expected) <= self.tolerance + REL_TOLERANCE * np.abs(expected)
+            codes = np.where(np.isnan(rx), 2, np.where(ok, 0, 1)).tolist()
+        else:
+            codes = [2 if math.isnan(value) else
+                     0 if abs(value - exp) <= tol + REL_TOLERANCE * abs(exp) else 1
+                     for value, exp, tol in zip(rx, self.expected[index], self.tolerance)]
+
+        verdicts = dict(zip(self.signals, map(VERDICTS.__getitem__, codes)))
+        for sig, exp in zip(self.text_signals, self.text_expected[index]):
+            value = get(sig)
+            if value is None or value in MISSING_RX:
+                verdicts[sig] = NO_RX
+            else:
+                verdicts[sig] = PASS if str(value).strip().strip("[]").strip() == exp else FAIL
+
+        for verdict, n in zip(VERDICTS, count(verdicts)):
+            self.totals[verdict] += n
+            verdicts_total[verdict].inc(n)
+        compare_seconds.observe(time.perf_counter() - start)
+        return verdicts
+
+    def summary(self):
+        total = sum(self.totals.values())
+        return (f"{self.totals[PASS]}/{total} PASS, {self.totals[FAIL]} FAIL, "
+                f"{self.totals[NO_RX]} {NO_RX}")
+
+
+def count(verdicts):
+    """(pass, fail, no_rx) of one step."""
+    values = list(verdicts.values())
+    return values.count(PASS), values.count(FAIL), values.count(NO_RX)
@@ -0,0 +1,300 @@
+"""
+Independent test sessions, one per CAN channel.
+
+A CanSession owns its own bus, DBC model, heartbeat scheduler and
+results workbook, so several vector sheets can run at the same time on a
+multi-channel PEAK adapter (can0..can3), each wired to its own head unit:
+
+    results = run_sessions([
+        {"channel": "can0", "dbc_path": "Files/x.dbc", "vector_path": "a.xlsx", "out_path": "a_out.xlsx"},
+        {"channel": "can1", "dbc_path": "Files/x.dbc", "vector_path": "b.xlsx", "out_path": "b_out.xlsx",
+         "adb_serial": "HU-2"},
+    ], pool="process")
+
+Nothing here touches the backend globals (bus, db, heart_beat_signals),
+so sessions can share one process with the GUI backend or run in a pool.
+"""
+import copy
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import config
+import backend
+import runtime_config
+import log
+import metrics
+import profiling
+import rx_verdict
+import frame_table
+import tx_dispatch
+from backend import openpyxl
+
+HEARTBEAT_PERIOD = 0.08     # same 80 ms cycle as the backend heartbeat thread
+RX_SETTLE_DELAY = 0.5       # wait after a step before reading VHAL (same as the worker)
+
+
+# -----------------------------
+# Per-session transmit loop
+# -----------------------------
+class HeartbeatScheduler:
+    """Sends the session's current frame table on its own bus every 80 ms."""
+
+    def __init__(self, dbs, bus, name="session"):
+        self.dbs = list(dbs)              # tried in order to encode each frame id
+        self.bus = bus
+        self.name = name
+        self.table = frame_table.FrameTable()
+        self.send_lock = threading.Lock()  # serialises sends on this bus only
+        self.dispatcher = tx_dispatch.TxDispatcher(
+            lambda entry: backend.send_frame_entry(self.bus, entry, lock=self.send_lock),
+            HEARTBEAT_PERIOD, name=name
+        )
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.loop_seconds = metrics.histogram("loop_seconds", "Worker loop iteration time",
+                                              loop=f"heartbeat-{name}")
+
+    def set_frames(self, frames):
+        """Encode [{"frame_name", "can_id", "signals"}] now; the loop sends it from the next cycle."""
+        entries, errors = frame_table.build_entries(frames, self.dbs)
+        for frame_name, error in errors:
+            backend.frame_send_errors_total.inc()
+            log.every((self.name, frame_name), 5, f"⚠️ [{self.name}] Encode error for frame {frame_name}: {error}")
+        self.table.publish(entries)
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=profiling.wrap(f"heartbeat-{self.name}", self._run),
+                                       name=f"heartbeat-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def _run(self):
+        next_time = time.perf_counter()
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            for pause in self.dispatcher.cycle(self.table.current):
+                time.sleep(pause)
+            self.loop_seconds.observe(time.perf_counter() - start)
+
+            next_time += HEARTBEAT_PERIOD
+            sleep_time = next_time - time.perf_counter()
+            if sleep_time > 0:
+                self.stop_event.wait(sleep_time)
+            else:
+                # if we're running late, resync
+                next_time = time.perf_counter()
+
+
+# -----------------------------
+# Per-session results workbook
+# -----------------------------
+class ResultsSink:
+    """Results sheet of one session's output workbook, held in memory until save()."""
+
+    def __init__(self, out_path, timedelay):
+        self.out_path = out_path
+        self.wb = openpyxl.load_workbook(out_path)
+        backend.prepare_results_sheet(self.wb, timedelay)
+        self.sheet = self.wb["Results"]
+        self.time_row, self.rx_col = backend.map_results_sheet(self.sheet)
+        self.rx_can_col = backend.map_rx_can_columns(self.sheet)
+
+    def write_rx(self, time_ms, rx_values):
+        row = self.time_row.get(time_ms)
+        if not row:
+            log.warning(f"⚠ Time {time_ms} not found in {self.out_path}")
+            return
+        with backend.excel_rx_write_seconds.time():
+            for sig, val in rx_values.items():
+                col = self.rx_col.get(sig)
+                if col:
+                    self.sheet.cell(row=row, column=col).value = val
+
+    def write_rx_can(self, time_ms, bus_values):
+        row = self.time_row.get(time_ms)
+        if not row:
+            return
+        for sig, col in self.rx_can_col.items():
+            value = bus_values.get(sig)
+            self.sheet.cell(row=row, column=col).value = "Not on bus" if value is None else value
+
+    def write_verdicts(self, time_ms, verdicts):
+        row = self.time_row.get(time_ms)
+        if row and verdicts:
+            backend.write_verdicts(self.wb, self.sheet, row, self.rx_col, time_ms, verdicts)
+
+    def save(self):
+        with backend.excel_save_seconds.time():
+            self.wb.save(self.out_path)
+
+
+# -----------------------------
+# Session
+# -----------------------------
+class CanSession:
+    """One vector sheet on one CAN channel against one head unit."""
+
+    def __init__(self, channel, dbc_path, vector_path, out_path, adb_serial=None, heartbeat_dbc=None):
+        self.channel = channel
+        self.dbc_path = dbc_path
+        self.vector_path = vector_path
+        self.out_path = out_path
+        self.adb_serial = adb_serial
+        self.heartbeat_dbc = heartbeat_dbc or config.Heart_beat_dbc
+
+        self.bus = None
+        self.db = None
+        self.scheduler = None
+        self.sink = None
+        self.comparator = None
+        self.capture = None
+        self.stop_event = threading.Event()
+        self.status = "idle"   # idle / running / completed / stopped / failed
+
+    # ------------- setup -------------
+    def open(self):
+        if os.path.abspath(self.vector_path) != os.path.abspath(self.out_path):
+            shutil.copy2(self.vector_path, self.out_path)
+
+        self.db = backend.load_dbc(self.dbc_path)
+        heartbeat_db = backend.load_dbc(self.heartbeat_dbc)
+
+        wb = openpyxl.load_workbook(self.out_path, data_only=True, read_only=True)
+        try:
+            self.timedelay = backend.read_time_steps(wb.worksheets[0])
+        finally:
+            wb.close()
+        self.signal_dict = backend.read_signal_values_from_excel(self.out_path)
+        self.canid_to_signalname = backend.build_canid_to_signalname_from_excel(self.out_path)
+        self.property_list = list(self.canid_to_signalname.keys())
+        self.prop_types = backend.update_vehicle_property_type(self.dbc_path)
+
+        # heartbeat defaults this session starts from (never the shared config list)
+        base = backend.original_heartbeat_backup or config.heart_beat_signals
+        self.heartbeat_signals = copy.deepcopy(list(base))
+
+        backend.make_can_interface_up(self.channel)
+        self.bus = backend.open_bus(self.channel)
+        if self.bus is None:
+            raise RuntimeError(f"CAN bus {self.channel} not available")
+
+        self.scheduler = HeartbeatScheduler([heartbeat_db, self.db], self.bus, name=self.channel)
+        self.scheduler.set_frames(self.heartbeat_signals)
+        self.sink = ResultsSink(self.out_path, self.timedelay)
+        self.comparator = rx_verdict.Comparator.build(
+            self.signal_dict, self.timedelay, self.canid_to_signalname, self.prop_types, [self.db]
+        )
+
+        if backend.can_rx_enabled():
+            import can_rx
+            self.capture = can_rx.CanRxCapture([heartbeat_db, self.db], self.channel, shared_bus=self.bus)
+            if not self.capture.start():
+                self.capture = None
+
+    def close(self):
+        if self.capture is not None:
+            import can_rx
+            report = self.capture.frame_report(self.scheduler.table.current.entries)
+            self.capture.stop()
+            self.capture = None
+            can_rx.print_frame_report(report, prefix=f"[{self.channel}] ")
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        if self.bus is not None:
+            try:
+                self.bus.shutdown()
+            except Exception as e:
+                print(f"⚠️ [{self.channel}] Error shutting down bus: {e}")
+            self.bus = None
+
+    def stop(self):
+        self.stop_event.set()
+
+    # ------------- run -------------
+    def run(self):
+        """Open, run every time step, save results, close. Returns the final status."""
+        try:
+            self.open()
+        except Exception as e:
+            print(f"❌ [{self.channel}] Session setup failed: {e}")
+            self.status = "failed"
+            self.close()
+            return self.status
+
+        self.status = "running"
+        try:
+            dbc_frameid_map = {msg.name: msg.frame_id for msg in self.db.messages}
+            signal_frame_map = backend.build_signal_frame_map(self.db)
+            self.scheduler.start()
+
+            for td in self.timedelay:
+                if self.stop_event.wait(td / 1000.0):
+                    self.status = "stopped"
+                    break
+
+                frame_groups = backend.group_signals_by_frame(
+                    self.signal_dict, td, signal_frame_map, dbc_frameid_map
+                )
+                user_frames = backend.apply_step_to_heartbeat(frame_groups, self.heartbeat_signals)
+                self.scheduler.set_frames(self.heartbeat_signals + user_frames)
+
+                if self.stop_event.wait(RX_SETTLE_DELAY):
+                    self.status = "stopped"
+                    break
+                rx = backend.validate_vhal_layer(
+                    self.property_list, self.canid_to_signalname, serial=self.adb_serial, publish=False,
+                    prop_types=self.prop_types
+                )
+                self.sink.write_rx(int(td), rx)
+                self.sink.write_verdicts(int(td), self.comparator.compare(td, rx))
+                if self.capture is not None:
+                    self.sink.write_rx_can(int(td), self.capture.latest_values())
+                log.info(f"✔ [{self.channel}] Completed Tx/Rx cycle {td} ms")
+            else:
+                self.status = "completed"
+            print(f"⚖️ [{self.channel}] TX vs VHAL: {self.comparator.summary()}")
+            self.sink.save()
+        except Exception as e:
+            print(f"❌ [{self.channel}] Session crashed: {e}")
+            self.status = "failed"
+        finally:
+            self.close()
+        return self.status
+
+
+# -----------------------------
+# Running several sessions
+# -----------------------------
+def run_session(spec):
+    """Run one session from a plain dict spec (picklable for process pools)."""
+    session = CanSession(**spec)
+    status = session.run()
+    return {"channel": session.channel, "out_path": session.out_path, "status": status}
+
+
+def run_sessions(specs, pool="thread"):
+    """
+    Run all session specs concurrently.
+    pool="thread"  → one thread per session in this process
+    pool="process" → one worker process per session (uses every core)
+    Returns one result dict per spec, in order.
+    """
+    if not specs:
+        return []
+    if pool == "process":
+        # worker processes read the runtime state from disk
+        runtime_config.flush()
+    executor_cls = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+    with executor_cls(max_workers=len(specs)) as executor:
+        return list(executor.map(run_session, specs))
@@ -0,0 +1,157 @@
+"""
+Simulation backend: python-can `virtual` bus + a software car_service.
+
+    import simulation
+    simulation.enable(["Files/my.dbc", config.Heart_beat_dbc])
+
+Afterwards every bus the backend opens is a virtual bus, and
+validate_vhal_layer() reads its dump from FakeCarService instead of adb.
+FakeCarService listens on the same virtual channel, decodes each frame
+with the same DBCs and types.h property mapping, and answers in the
+`dumpsys car_service get-property-value` format the RX parser expects.
+No PEAK dongle, head unit or adb is needed, so the TX/RX pipeline can be
+benchmarked and regression-tested on any machine.
+
+(A real `vcan0` also works: keep Testing_device = "Linux" and point
+Peak_interface_name at vcan0; only the car_service side is simulated here.)
+"""
+import re
+import threading
+
+import config
+import backend
+import drive_mode
+from backend import can, cantools
+
+# Message__Signal_RX_V = 123456  /* ... VehiclePropertyType:TYPE ... */
+TYPE_H_PATTERN = re.compile(
+    r"([A-Za-z0-9_]+)__([A-Za-z0-9_]+)_[RT]X_V\s*=\s*(\d+)(?:.*VehiclePropertyType:([\w\d]+))?"
+)
+
+VALUE_FIELDS = ("int32Values", "int64Values", "floatValues", "bytes", "string")
+TYPE_FIELD = {
+    "INT32": "int32Values",
+    "INT64": "int64Values",
+    "BYTES": "bytes",
+    "STRING": "string",
+}
+
+services = {}          # { channel: FakeCarService }
+
+
+def parse_type_h(type_h_file):
+    """Return { (message, signal): (prop_key, VehiclePropertyType) } from types.h."""
+    prop_map = {}
+    with open(type_h_file, "r", encoding="utf-8") as f:
+        for line in f:
+            m = TYPE_H_PATTERN.search(line)
+            if m:
+                prop_key = format(int(m.group(3)), "x")
+                prop_map[(m.group(1), m.group(2))] = (prop_key, m.group(4) or "FLOAT")
+    return prop_map
+
+
+class FakeCarService:
+    """Decodes frames from a virtual CAN channel into a VHAL property table."""
+
+    def __init__(self, channel, dbc_paths, type_h_file=None, mode=drive_mode.DRIVE):
+        self.channel = channel
+        self.dbs = [cantools.database.load_file(p) for p in dbc_paths]
+        self.prop_map = parse_type_h(type_h_file or config.type_h_file)
+        # fallback by signal name when the frame name differs between DBC versions
+        self.prop_by_signal = {sig: v for (_, sig), v in self.prop_map.items()}
+        self.properties = {}    # { prop_key: (type, value) }
+        self.lock = threading.Lock()
+        self.frames_seen = 0
+        self.bus = None
+        self.notifier = None
+        self.set_property(drive_mode.normalize_prop_id(config.Drive_mode_prop_ID), "INT32", mode)
+
+    def set_property(self, prop_key, prop_type, value):
+        with self.lock:
+            self.properties[prop_key] = (prop_type, value)
+
+    # ------------- CAN side -------------
+    def start(self):
+        self.bus = can.interface.Bus(channel=self.channel, bustype="virtual")
+        self.notifier = can.Notifier(self.bus, [self.on_message])
+
+    def stop(self):
+        if self.notifier is not None:
+            self.notifier.stop()
+            self.notifier = None
+        if self.bus is not None:
+            self.bus.shutdown()
+            self.bus = None
+
+    def on_message(self, msg):
+        self.frames_seen += 1
+        for db in self.dbs:
+            try:
+                message = db.get_message_by_frame_id(msg.arbitration_id)
+            except KeyError:
+                continue
+            try:
+                decoded = message.decode(msg.data, decode_choices=False)
+            except Exception:
+                return
+            for sig_name, value in decoded.items():
+                entry = self.prop_map.get((message.name, sig_name)) or self.prop_by_signal.get(sig_name)
+                if entry:
+                    self.set_property(entry[0], entry[1], value)
+            return
+
+    # ------------- dumpsys side -------------
+    def dump(self):
+        """Text in the `dumpsys car_service get-property-value` layout."""
+        with self.lock:
+            items = list(self.properties.items())
+        lines = []
+        for prop_key, (prop_type, value) in items:
+            field = TYPE_FIELD.get(prop_type, "floatValues")
+            if prop_type in ("INT32", "INT64"):
+                text = str(int(value))
+            elif field == "floatValues":
+                text = str(float(value))
+            else:
+                text = str(value)
+            lines.append(f"Property: 0x{prop_key}, areaId: 0, status: 0")
+            # every field is printed so the non-greedy RX regex never runs into the next property
+            lines.append("  " + ", ".join(
+                f"{name}: [{text if name == field else ''}]" for name in VALUE_FIELDS
+            ))
+        return "\n".join(lines) + "\n"
+
+
+def dump_provider(serial=None):
+    """backend.vhal_dump_provider: serial selects the session's channel, else the default one."""
+    service = services.get(serial) or services.get(config.Peak_interface_name)
+    if service is None and services:
+        service = next(iter(services.values()))
+    return service.dump() if service else ""
+
+
+def enable(dbc_paths, channels=None, type_h_file=None):
+    """
+    Switch the backend to simulation and start one FakeCarService per channel.
+    channels defaults to [config.Peak_interface_name].
+    """
+    backend.simulation_enabled = True
+    for channel in channels or [config.Peak_interface_name]:
+        if channel not in services:
+            service = FakeCarService(channel, dbc_paths, type_h_file)
+            service.start()
+            services[channel] = service
+    backend.vhal_dump_provider = dump_provider
+    backend.adb_device_connected = True
+    print(f"🧪 Simulation enabled on {', '.join(services)}")
+    return services
+
+
+def disable():
+    for service in services.values():
+        service.stop()
+    services.clear()
+    backend.vhal_dump_provider = None
+    backend.simulation_enabled = False
+    backend.adb_device_connected = False
@@ -0,0 +1,115 @@
+"""
+Priority-ordered periodic TX with bus load accounting and overflow backoff.
+
+    dispatcher = tx_dispatch.TxDispatcher(lambda entry: backend.send_frame_entry(bus, entry))
+    for pause in dispatcher.cycle(table.current):   # one heartbeat cycle
+        time.sleep(pause)                           # (await asyncio.sleep(pause) in async_core)
+    dispatcher.load                                 # expected bus load of that generation, 0..1+
+
+Per frame table generation (computed once, when a new generation shows up):
+  - the frames are ordered by CAN arbitration priority (lowest identifier
+    first; a standard frame beats an extended one with the same base id),
+    so the most important frames leave first when a cycle runs late;
+  - the expected bus load is the worst-case bit length of every frame
+    (DLC, standard / extended id, bit stuffing) sent once per period,
+    over config.Bit_rate; a warning is logged above config.Tx_bus_load_warning.
+
+Between two frames the dispatcher pauses for the frame's time on the wire
+plus an adaptive backoff. A send that fails (can.CanError, typically a
+full TX buffer) doubles the backoff and is retried up to config.Tx_retries
+times before the frame is dropped for this cycle; every frame that goes
+out on its first try shrinks the backoff again. Retried and dropped
+frames are counted.
+"""
+import config
+import log
+import metrics
+
+PERIOD = 0.08             # heartbeat cycle the frame set is sent at
+DEFAULT_BITRATE = 500000
+DEFAULT_RETRIES = 3
+DEFAULT_LOAD_WARNING = 0.7
+BACKOFF_START = 0.001     # first backoff after an overflow (s)
+BACKOFF_MAX = 0.02
+BACKOFF_MIN = 0.0001      # below this the backoff is dropped altogether
+BACKOFF_DECAY = 0.75      # per frame that goes out on its first try
+
+
+def frame_bits(dlc, extended=False):
+    """Worst-case bits of a classic CAN data frame incl. stuff bits and interframe space."""
+    if extended:
+        return 67 + 8 * dlc + (54 + 8 * dlc - 1) // 4
+    return 47 + 8 * dlc + (34 + 8 * dlc - 1) // 4
+
+
+def priority_key(entry):
+    """Arbitration order: base (11-bit) id, standard before extended, then the full id."""
+    base = entry.frame_id >> 18 if entry.is_extended else entry.frame_id
+    return base, entry.is_extended, entry.frame_id
+
+
+def bitrate():
+    try:
+        return int(getattr(config, "Bit_rate", DEFAULT_BITRATE))
+    except (TypeError, ValueError):
+        return DEFAULT_BITRATE
+
+
+def bus_load(entries, period=PERIOD, rate=None):
+    """Share of the bus the entries take when each is sent once per period."""
+    bits = sum(frame_bits(len(entry.data), entry.is_extended) for entry in entries)
+    return bits / (period * (rate or bitrate()))
+
+
+class TxDispatcher:
+    """Sends one frame table generation per cycle through send(entry) → bool."""
+
+    def __init__(self, send, period=PERIOD, name="heartbeat"):
+        self.send = send
+        self.period = period
+        self.name = name
+        self.retries = getattr(config, "Tx_retries", DEFAULT_RETRIES)
+        self.load_warning = getattr(config, "Tx_bus_load_warning", DEFAULT_LOAD_WARNING)
+        self.backoff = 0.0
+        self.load = 0.0
+        self._version = None
+        self._ordered = ()       # [(entry, wire time)] of the current generation
+        self.retried = metrics.counter("tx_frames_retried_total", "TX frames resent after a send error",
+                                       bus=name)
+        self.dropped = metrics.counter("tx_frames_dropped_total", "TX frames given up after all retries",
+                                       bus=name)
+        metrics.gauge("tx_bus_load_ratio", "Expected bus load of the periodic frames", func=lambda: self.load,
+                      bus=name)
+
+    def ordered(self, generation):
+        """Priority-ordered entries of a generation (+ load), recomputed only when it changes."""
+        if generation.version != self._version:
+            rate = bitrate()
+            entries = sorted(generation.entries, key=priority_key)
+            self._ordered = [(entry, frame_bits(len(entry.data), entry.is_extended) / rate)
+                             for entry in entries]
+            self.load = bus_load(entries, self.period, rate)
+            self._version = generation.version
+            if self.load > self.load_warning:
+                log.every(("tx_load", self.name), 5,
+                          f"⚠️ [{self.name}] expected bus load {self.load:.0%} "
+                          f"({len(entries)} frames / {self.period * 1000:.0f} ms at {rate} bit/s)")
+        return self._ordered
+
+    def cycle(self, generation):
+        """Send every frame of the generation once; yields the pause to take before going on."""
+        for entry, wire_time in self.ordered(generation):
+            for attempt in range(self.retries + 1):
+                if self.send(entry):
+                    if not attempt and self.backoff:
+                        self.backoff = self.backoff * BACKOFF_DECAY if self.backoff > BACKOFF_MIN else 0.0
+                    break
+                self.backoff = min(max(self.backoff * 2, BACKOFF_START), BACKOFF_MAX)
+                if attempt == self.retries:
+                    self.dropped.inc()
+                    log.every(("tx_drop", self.name), 5,
+                              f"⚠️ [{self.name}] TX buffer full — dropped {entry.frame_name} this cycle")
+                    break
+                self.retried.inc()
+                yield self.backoff
+            yield wire_time + self.backoff
@@ -0,0 +1,129 @@
+"""
+Vector sheet generation (DBC + types.h → CAN_Signals / FrameID / Results workbook).
+Kept free of Tkinter so the GUI, the headless runner and benchmarks.py can share it.
+"""
+import re
+
+import config
+from backend import cantools, openpyxl
+
+
+def create_excel_sheet(TYPE_H_PATH, DBC_PATH, OUTPUT_XLSX, time_values=None, values=None, only_signals=None):
+    """
+    time_values  : Time (ms) rows (default 1000 / 2000 / 3000)
+    values       : { signal: [value per time row] } written instead of the defaults
+                   (dbc_diff.migrate_vector keeps the values of an older vector this way)
+    only_signals : if given, only these signals get a column
+    """
+    # Build quick lookup for heartbeat values:
+    heartbeat_lookup = {}  # { frame_name: {signal: value} }
+
+    for hb in config.heart_beat_signals:
+        fname = hb["frame_name"]
+        heartbeat_lookup[fname] = hb["signals"]
+    try:
+        db = cantools.database.load_file(DBC_PATH)
+        frame_names = {msg.name for msg in db.messages}
+        frame_list = [{"Can_Messages": msg.name, "Can_ID": hex(msg.frame_id)} for msg in db.messages]
+
+        pattern = re.compile(r"([A-Za-z0-9_]+)__([A-Za-z0-9_]+)_[RT]X_V\s*=\s*(\d+)", re.IGNORECASE)
+
+        # --------------------------------------------------------------
+        # STEP 1: Build FULL signal list from DBC
+        # --------------------------------------------------------------
+        dbc_signals = []  # temporary list containing all signals from DBC
+        for msg in db.messages:
+            for sig in msg.signals:
+                dbc_signals.append({
+                    "message": msg.name,
+                    "signal": sig.name,
+                    "property_id": "N/A"  # default if type.h not found
+                })
+
+        # --------------------------------------------------------------
+        # STEP 2: Read TYPE_H file and build lookup
+        # --------------------------------------------------------------
+        typeh_lookup = {}
+        with open(TYPE_H_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                match = pattern.search(line)
+                if match:
+                    msg_name = match.group(1)
+                    signal_name = match.group(2)
+                    prop_id_dec = int(match.group(3))
+                    typeh_lookup[(msg_name, signal_name)] = hex(prop_id_dec)
+
+        # --------------------------------------------------------------
+        # STEP 3: Merge type.h values into full DBC signal list
+        # --------------------------------------------------------------
+        signals = []
+        for entry in dbc_signals:
+            if only_signals is not None and entry["signal"] not in only_signals:
+                continue
+            key = (entry["message"], entry["signal"])
+            entry["property_id"] = typeh_lookup.get(key, "N/A")
+            signals.append(entry)
+
+        wb = openpyxl.Workbook()
+        ws1 = wb.active
+        ws1.title = "CAN_Signals"
+        ws1["A1"] = "Property ID"
+        ws1["A2"] = "Time (ms)"
+
+        for idx, sig in enumerate(signals, start=2):
+            col = openpyxl.utils.get_column_letter(idx)
+            ws1[f"{col}1"] = sig["property_id"]
+            ws1[f"{col}2"] = sig["signal"]
+
+        time_values = time_values or [1000, 2000, 3000]
+        values = values or {}
+        for r, t in enumerate(time_values, start=3):
+            ws1[f"A{r}"] = t
+            for c, sig in enumerate(signals, start=2):
+                col_letter = openpyxl.utils.get_column_letter(c)
+
+                frame_name = sig["message"]
+                signal_name = sig["signal"]
+
+                # Default Tx value
+                tx_val = 0
+
+                # If heartbeat frame → use heartbeat default value
+                if frame_name in heartbeat_lookup:
+                    if signal_name in heartbeat_lookup[frame_name]:
+                        tx_val = heartbeat_lookup[frame_name][signal_name]
+
+                # Value kept from an older vector sheet
+                kept = values.get(signal_name)
+                if kept is not None and r - 3 < len(kept) and kept[r - 3] is not None:
+                    tx_val = kept[r - 3]
+
+                ws1[f"{col_letter}{r}"] = tx_val
+
+        ws2 = wb.create_sheet("FrameID")
+        ws2.append(["Can_Messages", "Can_ID"])
+        for frame in frame_list:
+            ws2.append([frame["Can_Messages"], frame["Can_ID"]])
+
+        ws3 = wb.create_sheet("Results")
+        ws3["A1"] = "Property ID"
+        ws3["A2"] = "Time (ms)"
+
+        col_idx = 2
+        for sig in signals:
+            start_col = col_idx
+            end_col = col_idx + 1
+            ws3.merge_cells(start_row=1, start_column=start_col, end_row=1, end_column=end_col)
+            ws3.cell(row=1, column=start_col, value=sig["property_id"])
+            ws3.merge_cells(start_row=2, start_column=start_col, end_row=2, end_column=end_col)
+            ws3.cell(row=2, column=start_col, value=sig["signal"])
+            ws3.cell(row=3, column=start_col, value="Tx")
+            ws3.cell(row=3, column=end_col, value="Rx Car Service")
+            col_idx += 2
+
+        wb.save(OUTPUT_XLSX)
+        print(f"✅ Excel file generated successfully: {OUTPUT_XLSX}")
+        return True
+    except Exception as e:
+        print(f"❌ Failed to create Excel: {e}")
+        return False
@@ -0,0 +1,151 @@
+"""
+Streaming parser for `adb shell dumpsys car_service get-property-value`.
+
+    parser = vhal_stream.DumpParser({"21600000": "floatValues", ...})
+    vhal_stream.stream_adb_dump(parser, serial)     # reads, feeds, stops early
+    parser.values                                    # { prop_key: "raw value text" }
+
+The dump is read as bytes in CHUNK_SIZE pieces and cut at every
+"Property: 0x<id>" marker. Only the block of a requested property is
+searched (for its own field, so a value never runs into the next
+property); other blocks are dropped as soon as the next marker shows up.
+The parser therefore holds one property block plus one chunk at most,
+whatever the dump size, and the reader kills adb once every requested
+property has been found instead of waiting for the rest of the dump.
+"""
+import re
+import subprocess
+import threading
+import time
+
+import metrics
+
+CHUNK_SIZE = 64 * 1024
+ADB_TIMEOUT = 10.0
+ADB_DUMP_ARGS = ["shell", "dumpsys", "car_service", "get-property-value"]
+
+MARKER = re.compile(rb"Property:\s*0x([0-9a-fA-F]+)")
+MARKER_TAIL = 64      # bytes kept between chunks when no marker was seen (split marker)
+
+# VehiclePropertyType → dump field holding the value
+TYPE_FIELDS = {
+    "INT32": "int32Values",
+    "INT64": "int64Values",
+    "BYTES": "bytes",
+    "STRING": "string",
+}
+FIELD_PATTERNS = {
+    field: re.compile(rb"\b" + field.encode() + rb":\s*\[([^\]]*)\]", re.IGNORECASE)
+    for field in ("int32Values", "int64Values", "floatValues", "bytes", "string")
+}
+
+dump_bytes = metrics.counter("adb_dump_bytes_total", "dumpsys bytes read")
+early_stops = metrics.counter("adb_dump_early_stops_total", "dumps cut short once every property was found")
+
+
+def field_for(prop_type):
+    return TYPE_FIELDS.get(prop_type, "floatValues")
+
+
+def prop_key(prop_id):
+    """'0x21600000' / '21600000' → '21600000' (the key of types.h and the dump)."""
+    return str(prop_id).lower().replace("0x", "").replace("’", "").replace("‘", "")
+
+
+class DumpParser:
+    """Incremental dump parser for a fixed set of { prop_key: field }."""
+
+    def __init__(self, wanted):
+        self.wanted = wanted
+        self.values = {}          # { prop_key: value text } found so far
+        self.buffer = b""         # current (unfinished) property block
+        self.bytes_read = 0
+        self.has_data = False     # any non-blank output (blank = no device)
+        self.parse_seconds = 0.0
+
+    @property
+    def complete(self):
+        return len(self.values) >= len(self.wanted)
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        start = time.perf_counter()
+        self.bytes_read += len(chunk)
+        if not self.has_data and chunk.strip():
+            self.has_data = True
+
+        data = self.buffer + chunk
+        markers = list(MARKER.finditer(data))
+        # every block but the last is complete: its end is the next marker
+        for marker, following in zip(markers, markers[1:]):
+            self._block(data, marker, following.start())
+        if markers:
+            last = markers[-1]
+            self.buffer = data[last.start():]
+            # the value of the last block may already be there → allows an early stop
+            # (unless its id could still continue in the next chunk)
+            if last.end() < len(data):
+                self._block(self.buffer, MARKER.match(self.buffer), len(self.buffer))
+        else:
+            self.buffer = data[-MARKER_TAIL:]
+        self.parse_seconds += time.perf_counter() - start
+
+    def feed_text(self, text):
+        self.feed(text.encode("utf-8", errors="replace"))
+        self.close()
+
+    def close(self):
+        """End of the dump: the last block ends here."""
+        marker = MARKER.match(self.buffer)
+        if marker:
+            self._block(self.buffer, marker, len(self.buffer))
+        self.buffer = b""
+
+    def _block(self, data, marker, end):
+        key = marker.group(1).decode("ascii").lower()
+        field = self.wanted.get(key)
+        if field is None or key in self.values:
+            return
+        match = FIELD_PATTERNS[field].search(data, marker.end(), end)
+        if match:
+            self.values[key] = match.group(1).strip().decode("utf-8", errors="replace")
+
+
+def stream_adb_dump(parser, serial=None, timeout=ADB_TIMEOUT):
+    """
+    Feed the dumpsys output of `serial` into parser chunk by chunk.
+    Stops (and kills adb) once parser.complete; raises
+    subprocess.TimeoutExpired after `timeout` seconds.
+    """
+    args = ["adb"] + (["-s", serial] if serial else []) + ADB_DUMP_ARGS
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.daemon = True
+    timer.start()
+    try:
+        while True:
+            chunk = proc.stdout.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            dump_bytes.inc(len(chunk))
+            parser.feed(chunk)
+            if parser.complete:
+                early_stops.inc()
+                break
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+    if timed_out.is_set() and not parser.complete:
+        raise subprocess.TimeoutExpired(args, timeout)
+    parser.close()
+    return parser